@@ -0,0 +1,163 @@
+"""Parse many source files in parallel, one output file per source.
+
+    python batch_parse.py submissions/ -o parsed/
+    python batch_parse.py manifest.txt -o parsed/ --jobs 8
+
+The input is a directory, searched recursively for --pattern, or a manifest
+listing one path per line (relative paths are taken from the manifest's
+directory). Each worker process loads the parser tables once and reuses its
+session for every file it is given. Workers write their outputs themselves
+and only send a short record back, so the parent never handles the trees.
+
+Outputs mirror the input layout under the output directory, each holding
+{"ast", "functions", "classes"}. summary.json lists, for every file, the
+syntax errors, lex and parse time and AST node count. With --cache-dir,
+duplicate submissions are parsed once and served from a ParseCache whose
+disk tier is shared by all workers.
+"""
+import argparse
+import contextlib
+import fnmatch
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import myparser
+from myast import Node
+from mycache import ParseCache
+from myemitter import EMITTERS, emit
+
+EXTENSIONS = {'json': '.json', 'ndjson': '.ndjson', 'cbor': '.cbor'}
+
+_session = None
+_cache = None
+
+
+def init_worker(fast_lexer, cache_dir=None):
+    global _session, _cache
+    myparser.build_tables()
+    _session = myparser.ParseSession(fast_lexer=fast_lexer)
+    if cache_dir is not None:
+        _cache = ParseCache(directory=cache_dir)
+
+
+def count_nodes(node):
+    count = 0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Node):
+            count += 1
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+    return count
+
+
+def parse_file(job):
+    """Parse one file and write its output, return its summary record"""
+    path, output_path, format = job
+    record = {'path': path, 'output': None, 'errors': [], 'lex_ms': None, 'parse_ms': None, 'nodes': 0}
+    messages = io.StringIO()
+    try:
+        with open(path) as f:
+            source = f.read()
+        # Syntax errors are printed by the lexer and parser
+        with contextlib.redirect_stdout(messages):
+            start = time.perf_counter()
+            tokens = _session.tokenize(source)
+            lexed = time.perf_counter()
+            if _cache is None:
+                result = _session.parse_tokens(tokens)
+            else:
+                result = _cache.parse(_session, source, tokens)
+            parsed = time.perf_counter()
+        record['lex_ms'] = round((lexed - start) * 1000, 3)
+        record['parse_ms'] = round((parsed - lexed) * 1000, 3)
+        if result.ast is not None:
+            record['nodes'] = count_nodes(result.ast)
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            emit({'ast': result.ast, 'functions': result.functions, 'classes': result.classes},
+                 output_path, format)
+            record['output'] = output_path
+    except Exception as e:
+        record['errors'].append(f"{type(e).__name__}: {e}")
+    record['errors'] = messages.getvalue().splitlines() + record['errors']
+    record['ok'] = record['output'] is not None and not record['errors']
+    return record
+
+
+def find_sources(target, pattern):
+    """Source paths of a directory or manifest, and the directory they are relative to"""
+    if os.path.isdir(target):
+        paths = []
+        for root, dirs, files in os.walk(target):
+            dirs.sort()
+            paths.extend(os.path.join(root, name) for name in sorted(files)
+                         if any(fnmatch.fnmatch(name, p) for p in pattern.split(',')))
+        return paths, target
+    base = os.path.dirname(os.path.abspath(target))
+    with open(target) as f:
+        paths = [os.path.join(base, line.strip()) for line in f
+                 if line.strip() and not line.lstrip().startswith('#')]
+    return paths, os.path.commonpath(paths) if len(paths) > 1 else base
+
+
+def output_path(path, base, output_dir, format):
+    relative = os.path.relpath(os.path.abspath(path), os.path.abspath(base))
+    if relative.startswith(os.pardir):
+        relative = os.path.basename(path)
+    return os.path.join(output_dir, relative + EXTENSIONS[format])
+
+
+def batch_parse(target, output_dir, jobs=None, pattern='*.txt,*.cpp', format='json', fast_lexer=False,
+                cache_dir=None):
+    """Parse every source of target across jobs processes, return the summary"""
+    paths, base = find_sources(target, pattern)
+    work = [(path, output_path(path, base, output_dir, format), format) for path in paths]
+    jobs = jobs or os.cpu_count() or 1
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=(fast_lexer, cache_dir)) as executor:
+        # Chunks keep the per-task overhead small for corpora of tiny files
+        chunksize = max(1, min(64, len(work) // (jobs * 4)))
+        files = list(executor.map(parse_file, work, chunksize=chunksize))
+    wall_time = time.perf_counter() - start
+    failed = [record for record in files if not record['ok']]
+    return {
+        'files': len(files),
+        'succeeded': len(files) - len(failed),
+        'failed': len(failed),
+        'jobs': jobs,
+        'wall_ms': round(wall_time * 1000, 3),
+        'lex_ms': round(sum(record['lex_ms'] or 0 for record in files), 3),
+        'parse_ms': round(sum(record['parse_ms'] or 0 for record in files), 3),
+        'nodes': sum(record['nodes'] for record in files),
+        'results': files,
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Parse a directory or manifest of source files in parallel")
+    arg_parser.add_argument('target', help="directory of sources, or a manifest file with one path per line")
+    arg_parser.add_argument('-o', '--output-dir', default='parsed', help="where outputs and summary.json go")
+    arg_parser.add_argument('-j', '--jobs', type=int, default=None, help="worker processes (default: CPU count)")
+    arg_parser.add_argument('--pattern', default='*.txt,*.cpp', help="comma separated file name patterns for directories")
+    arg_parser.add_argument('--format', choices=sorted(EMITTERS), default='json')
+    arg_parser.add_argument('--fast-lexer', action='store_true', help="lex with mylexer.FastLexer")
+    arg_parser.add_argument('--cache-dir', default=None, help="parse cache directory shared by the workers")
+    args = arg_parser.parse_args()
+
+    summary = batch_parse(args.target, args.output_dir, args.jobs, args.pattern, args.format, args.fast_lexer,
+                          args.cache_dir)
+    os.makedirs(args.output_dir, exist_ok=True)
+    summary_path = os.path.join(args.output_dir, 'summary.json')
+    with open(summary_path, 'w') as f:
+        json.dump(summary, f, indent=2)
+    print(f"Parsed {summary['files']} files with {summary['jobs']} workers in {summary['wall_ms'] / 1000:.2f} s, "
+          f"{summary['failed']} with errors. Summary written to {summary_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Memory, parse time and JSON emit time of the AST on large inputs.
+
+The memory of the node tree is compared with the same tree converted to
+plain dicts by to_dict(), which is the shape the parser used to build.
+"""
+import gc
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import myast
+import myemitter
+import myparser
+
+
+def many_functions_source(functions):
+    parts = ["class Node {\n    int data;\n    Node* next;\n};\n"]
+    for f in range(functions):
+        parts.append(f"int work{f}(int h) {{\n"
+                     f"    int a = h, b[4];\n"
+                     f"    Node* node = new Node{{h, nullptr}};\n"
+                     f"    while (h != 0) {{\n        node->data = h;\n        h = a;\n    }}\n"
+                     f"    if (a < h) {{\n        a = node->next->data;\n    }} else {{\n        delete node;\n    }}\n"
+                     f"}}\n")
+    parts.append("int main() {\n    work0(1);\n}\n")
+    return ''.join(parts)
+
+
+def allocated(build):
+    gc.collect()
+    tracemalloc.start()
+    value = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, size
+
+
+def main():
+    myparser.build_tables()
+    session = myparser.ParseSession()
+    for functions in (500, 2000):
+        source = many_functions_source(functions)
+        tokens = session.tokenize(source)
+        best = float('inf')
+        for _ in range(3):
+            start = time.perf_counter()
+            result = session.parse_tokens(tokens)
+            best = min(best, time.perf_counter() - start)
+        start = time.perf_counter()
+        myemitter.emit(result.ast, io.StringIO())
+        emit_time = time.perf_counter() - start
+        nodes = sum(1 for _ in walk(result.ast))
+        del result
+        result, node_bytes = allocated(lambda: session.parse_tokens(tokens))
+        dicts, dict_bytes = allocated(lambda: myast.to_dict(result.ast))
+        print(f"{len(tokens):>7} tokens, {nodes} nodes: parse {best * 1000:7.1f} ms, "
+              f"emit {emit_time * 1000:6.1f} ms, "
+              f"nodes {node_bytes / nodes:5.0f} B/node (whole parse result), "
+              f"dicts {dict_bytes / nodes:5.0f} B/node")
+
+
+def walk(node):
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, myast.Node):
+            yield node
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""Batch parsing throughput for 1 up to all CPU cores.
+
+A corpus of generated programs is parsed with an increasing number of
+worker processes. Files per second should grow linearly with the workers
+until the cores run out.
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import batch_parse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    with open(os.path.join(ROOT, 'tested_code.txt')) as f:
+        program = f.read()
+    corpus = tempfile.mkdtemp()
+    try:
+        for i in range(400):
+            with open(os.path.join(corpus, f'submission{i}.txt'), 'w') as f:
+                f.write(program)
+        cores = os.cpu_count() or 1
+        jobs = 1
+        while True:
+            output_dir = os.path.join(corpus, f'out{jobs}')
+            summary = batch_parse.batch_parse(corpus, output_dir, jobs)
+            print(f"{jobs:>3} workers: {summary['files'] / summary['wall_ms'] * 1000:7.1f} files/s "
+                  f"({summary['failed']} failed)")
+            if jobs >= cores:
+                break
+            jobs = min(jobs * 2, cores)
+    finally:
+        shutil.rmtree(corpus)
+
+
+if __name__ == '__main__':
+    main()
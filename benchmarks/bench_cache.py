@@ -0,0 +1,57 @@
+"""Parse time of a program vs fetching it from the parse cache.
+
+Covers an exact repeat (memory tier, no lexing), the same program with
+different whitespace and comments (lexed, then served from the cache) and a
+fresh process reading the disk tier.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mycache
+import myparser
+
+
+def many_functions_source(functions, statements):
+    parts = ["class Node {\n    int data;\n    Node* next;\n};\n"]
+    for f in range(functions):
+        body = ''.join(f"    int v{i} = h;\n" for i in range(statements))
+        parts.append(f"int work{f}(int h) {{\n{body}}}\n")
+    calls = ''.join(f"    work{f}({f});\n" for f in range(functions))
+    parts.append(f"int main() {{\n    Node* head = new Node{{1, nullptr}};\n{calls}}}\n")
+    return ''.join(parts)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    myparser.build_tables()
+    session = myparser.ParseSession()
+    directory = tempfile.mkdtemp()
+    try:
+        for functions in (50, 200):
+            source = many_functions_source(functions, 8)
+            reformatted = source.replace('    int v0 = h;', '  int   v0=h; // first')
+            cache = mycache.ParseCache(directory=directory)
+            parse = timed(session.parse, source)
+            miss = timed(cache.parse, session, source)
+            exact = timed(cache.parse, session, source)
+            layout = timed(cache.parse, session, reformatted)
+            disk = timed(mycache.ParseCache(directory=directory).parse, session, source)
+            print(f"{functions:>4} functions: parse {parse:7.1f} ms, miss {miss:7.1f} ms, "
+                  f"exact repeat {exact:5.2f} ms, reformatted {layout:6.1f} ms, disk {disk:6.1f} ms "
+                  f"{cache.stats()}")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""Output size and serialization time for call-heavy programs.
+
+Compares function calls that reference the function table with the inline
+mode, where every call site carries a copy of the callee body.
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import myemitter
+import myparser
+
+
+def call_heavy_source(body_size, calls):
+    body = ''.join(f"    int v{i} = h;\n" for i in range(body_size))
+    call_lines = ''.join("    work(1);\n" for _ in range(calls))
+    return f"int work(int h) {{\n{body}}}\nint main() {{\n{call_lines}}}\n"
+
+
+def measure(ast):
+    start = time.perf_counter()
+    text = json.dumps(ast, indent=2, default=myemitter.json_default)
+    return len(text), time.perf_counter() - start
+
+
+def main():
+    myparser.build_tables()
+    for body_size, calls in ((50, 100), (200, 500), (200, 2000)):
+        result = myparser.parse(call_heavy_source(body_size, calls))
+        size, elapsed = measure(result.ast)
+        inline_size, inline_elapsed = measure(
+            myemitter.inline_function_calls(result.ast, result.functions))
+        print(f"body={body_size:>4} calls={calls:>5}: "
+              f"reference {size / 1024:9.1f} KiB {elapsed * 1000:8.1f} ms | "
+              f"inline {inline_size / 1024:9.1f} KiB {inline_elapsed * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
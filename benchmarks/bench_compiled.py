@@ -0,0 +1,68 @@
+"""Step rate of the compiled closures against the tree-walking interpreter.
+
+Runs the linked-list programs of bench_interpreter three ways: Interpreter
+on the dict trees loaded back from the JSON output, Interpreter on the
+ParseResult nodes, and CompiledInterpreter (compile time included). Each
+is timed keeping every snapshot, as for timeline.json, and streaming them
+to a callback that drops them, as mytrace does. The timelines must match,
+snapshot for snapshot on the smallest program and in their step count and
+final snapshot on the others, whose full encoding takes minutes.
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import myparser
+from bench_interpreter import linked_list_source
+from mycompiler import CompiledInterpreter
+from myemitter import json_default
+from myinterpreter import Interpreter
+
+
+def loaded(result):
+    """The program as tester_code writes it and the interpreter reads it back"""
+    data = json.loads(json.dumps([result.ast, result.functions, result.classes], default=json_default))
+    return data[0], {int(key): value for key, value in data[1].items()}, data[2]
+
+
+def summary(timeline, full):
+    """Every snapshot if full, else the step count and the last snapshot"""
+    if full:
+        return timeline.to_dict(edges=False)['snapshots']
+    return timeline.steps, timeline.snapshots[-1].to_dict(edges=False)
+
+
+def steps_per_second(interpreter, program, on_step):
+    start = time.perf_counter()
+    timeline = interpreter(*program, max_steps=10 ** 7, on_step=on_step).run()
+    elapsed = time.perf_counter() - start
+    assert timeline.error is None, timeline.error
+    return timeline.steps / elapsed
+
+
+def main():
+    myparser.build_tables()
+    for appends in (50, 200, 400):
+        result = myparser.parse(linked_list_source(appends))
+        nodes = (result.ast, result.functions, result.classes)
+        dicts = loaded(result)
+        timeline = Interpreter(*dicts, max_steps=10 ** 7).run()
+        expected = summary(timeline, appends == 50)
+        assert summary(CompiledInterpreter(*nodes, max_steps=10 ** 7).run(), appends == 50) == expected
+        assert summary(CompiledInterpreter(*dicts, max_steps=10 ** 7).run(), appends == 50) == expected
+
+        for mode, on_step in (('kept', None), ('streamed', lambda snapshot: None)):
+            walking = steps_per_second(Interpreter, dicts, on_step)
+            walking_nodes = steps_per_second(Interpreter, nodes, on_step)
+            compiled = steps_per_second(CompiledInterpreter, nodes, on_step)
+            print(f"{appends:>4} appends, {timeline.steps:>7} steps, {mode:>8}: dicts {walking:8.0f} steps/s, "
+                  f"nodes {walking_nodes:8.0f} steps/s, compiled {compiled:8.0f} steps/s "
+                  f"({compiled / walking:4.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
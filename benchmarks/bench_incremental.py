@@ -0,0 +1,47 @@
+"""Refresh time after a one-line edit, full parse vs incremental parse.
+
+The source has a few thousand lines spread over many functions. The edit
+changes a single statement in one function body, as a keystroke would.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import myincremental
+import myparser
+
+
+def many_functions_source(functions, statements):
+    parts = ["class Node {\n    int data;\n    Node* next;\n};\n"]
+    for f in range(functions):
+        body = ''.join(f"    int v{i} = h;\n" for i in range(statements))
+        parts.append(f"int work{f}(int h) {{\n{body}}}\n")
+    calls = ''.join(f"    work{f}({f});\n" for f in range(functions))
+    parts.append(f"int main() {{\n    Node* head = new Node{{1, nullptr}};\n{calls}}}\n")
+    return ''.join(parts)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    myparser.build_tables()
+    for functions in (100, 300, 600):
+        source = many_functions_source(functions, 8)
+        edited = source.replace("int work7(int h) {\n    int v0 = h;", "int work7(int h) {\n    int v0 = 42;")
+        lines = source.count('\n')
+        _, full = timed(myparser.parse, edited)
+        parser = myincremental.IncrementalParser()
+        parser.update(source)
+        _, incremental = timed(parser.update, edited)
+        print(f"{lines:>6} lines: full {full * 1000:7.1f} ms, "
+              f"incremental {incremental * 1000:6.1f} ms ({parser.reparsed} unit re-parsed)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Speed and memory of interpreter timelines on linked-list programs.
+
+Every append walks the list, so the step count grows with the square of the
+number of nodes. The memory of the shared snapshots is compared with what
+the same timeline would take if every step held a full copy of memory.
+"""
+import copy
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import myinterpreter
+import myparser
+
+LINKED_LIST = """class Node {
+    int data;
+    Node* next;
+};
+
+class LinkedList {
+    Node* head;
+    LinkedList() {
+        head = nullptr;
+    }
+
+    void append(int value) {
+        Node* newNode = new Node{value, nullptr};
+        if (nullptr == head) {
+            head = newNode;
+        }
+        else {
+            Node* temp;
+            temp = head;
+            while (nullptr != temp->next) {
+                temp = temp->next;
+            }
+            temp->next = newNode;
+        }
+    }
+};
+"""
+
+
+def linked_list_source(appends):
+    calls = ''.join(f"    list.append({i});\n" for i in range(appends))
+    return f"{LINKED_LIST}\nint main() {{\n    LinkedList list;\n{calls}}}\n"
+
+
+def main():
+    myparser.build_tables()
+    for appends in (50, 200, 400):
+        result = myparser.parse(linked_list_source(appends))
+        start = time.perf_counter()
+        timeline = myinterpreter.run(result.ast, result.functions, result.classes, max_steps=10 ** 7)
+        elapsed = time.perf_counter() - start
+        assert timeline.error is None, timeline.error
+
+        del timeline
+        gc.collect()
+        tracemalloc.start()
+        timeline = myinterpreter.run(result.ast, result.functions, result.classes, max_steps=10 ** 7)
+        shared = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        # One full copy of the last state, as a copying interpreter would store per step
+        last = timeline[-2]
+        tracemalloc.start()
+        full_copy = copy.deepcopy((last.frames, dict(last.heap.items())))
+        copied = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del full_copy
+
+        steps = len(timeline)
+        print(f"{appends:>4} appends, {steps:>7} steps: {steps / elapsed:9.0f} steps/s, "
+              f"shared {shared / steps:6.0f} B/step, full copies ~{copied:8.0f} B/step "
+              f"({copied * steps / 2**20:8.1f} MiB in total vs {shared / 2**20:6.1f} MiB)")
+
+
+if __name__ == '__main__':
+    main()
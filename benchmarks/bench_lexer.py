@@ -0,0 +1,96 @@
+"""PLY lexer vs FastLexer: differential check, then tokens/sec.
+
+Both lexers must produce the same type, value, line and position for every
+token, and report the same illegal characters. The check runs on the sample
+program, on hand-picked edge cases and on random character soup before the
+throughput of each lexer is measured on multi-MB inputs.
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mylexer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+EDGE_CASES = [
+    'for nullptr NULL 12main 1else class classy x.5 a->b <= >= == != = < > ~A',
+    '#include <iostream>\nusing namespace std;\nint main() { return; }',
+    '#include <multi\nline>\nmain // comment main\nmain',
+    "'a' '\\n' '' 'ab' \"str\\\"ing\" \"multi\nline\" \"unterminated",
+    '1.5 2e10 3E-2 4.0e+1 5. .6 7e',
+    'mainé é $ @ # - + / \r\n\n\n\t x',
+    'using  namespace\tstd ; using namespace foo;',
+]
+
+SOUP = 'abcmainifelsewhilenewdeleteclassintvoid_0123456789 \t\r\n\'"\\.,;:{}[]()<>=!*&~-/#+$é'
+
+
+def lex_all(source, fast):
+    output = io.StringIO()
+    lexer = mylexer.FastLexer() if fast else mylexer.get_lexer().clone()
+    with contextlib.redirect_stdout(output):
+        tokens = mylexer.tokenize(source, lexer)
+    return [(t.type, t.value, t.lineno, t.lexpos) for t in tokens], output.getvalue(), lexer.lineno
+
+
+def check(source, label):
+    expected = lex_all(source, fast=False)
+    actual = lex_all(source, fast=True)
+    if expected != actual:
+        for i, (want, got) in enumerate(zip(expected[0], actual[0])):
+            if want != got:
+                raise AssertionError(f"{label}: token {i} differs, PLY {want} vs fast {got}")
+        raise AssertionError(f"{label}: token count, errors or final line differ")
+
+
+def differential_check():
+    with open(os.path.join(ROOT, 'tested_code.txt')) as f:
+        check(f.read(), 'tested_code.txt')
+    for i, source in enumerate(EDGE_CASES):
+        check(source, f'edge case {i}')
+    rng = random.Random(0)
+    for i in range(500):
+        check(''.join(rng.choice(SOUP) for _ in range(rng.randint(1, 200))), f'random input {i}')
+    print("differential check passed")
+
+
+def many_functions_source(functions):
+    parts = ["#include <iostream>\nusing namespace std;\n",
+             "class Node {\n    int data;\n    Node* next;\n};\n"]
+    for f in range(functions):
+        parts.append(f"int work{f}(int h) {{\n"
+                     f"    int values[10];\n"
+                     f"    string name = \"work{f}\"; // label\n"
+                     f"    Node* node = new Node{{h, nullptr}};\n"
+                     f"    while (h != 0) {{\n        node->data = 2.5e3;\n        h = 0;\n    }}\n"
+                     f"    delete node;\n}}\n")
+    return ''.join(parts)
+
+
+def throughput(source, fast):
+    lexer = mylexer.FastLexer() if fast else mylexer.get_lexer().clone()
+    start = time.perf_counter()
+    tokens = mylexer.tokenize(source, lexer)
+    return len(tokens), time.perf_counter() - start
+
+
+def main():
+    differential_check()
+    for functions in (5000, 20000):
+        source = many_functions_source(functions)
+        check(source, f'{functions} functions')
+        megabytes = len(source) / 1e6
+        count, ply_time = throughput(source, fast=False)
+        _, fast_time = throughput(source, fast=True)
+        print(f"{megabytes:5.1f} MB, {count} tokens: PLY {count / ply_time / 1e6:5.2f} M tokens/s, "
+              f"fast {count / fast_time / 1e6:5.2f} M tokens/s ({ply_time / fast_time:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
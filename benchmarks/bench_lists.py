@@ -0,0 +1,51 @@
+"""Parse time of long statement lists and large array initializers.
+
+With list-building actions that append in place the time per element should
+stay roughly flat as the input grows from 10k to 100k elements.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import myparser
+
+SIZES = (10000, 20000, 50000, 100000)
+
+
+def statements_source(n):
+    body = ''.join(f"    x = {i};\n" for i in range(n))
+    return f"int main() {{\n    int x;\n{body}}}\n"
+
+
+def initializer_source(n):
+    values = ', '.join(str(i) for i in range(n))
+    return f"int main() {{\n    int a[{n}] = {{{values}}};\n}}\n"
+
+
+def class_members_source(n):
+    members = ''.join(f"    int m{i};\n" for i in range(n))
+    return f"class Big {{\n{members}}};\nint main() {{\n    Big b;\n}}\n"
+
+
+def time_parse(source):
+    session = myparser.ParseSession()
+    start = time.perf_counter()
+    session.parse(source)
+    return time.perf_counter() - start
+
+
+def main():
+    myparser.build_tables()
+    for label, make_source in (('statements', statements_source),
+                               ('initializer', initializer_source),
+                               ('class members', class_members_source)):
+        print(label)
+        for n in SIZES:
+            elapsed = time_parse(make_source(n))
+            print(f"  n={n:>6}: {elapsed * 1000:8.1f} ms, {elapsed / n * 1e6:6.2f} us/element")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""Parse time of deeply nested if/else and while blocks.
+
+Scopes and IDs are assigned by a single resolver pass, so the time per
+nesting level should stay flat as the depth grows.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import myparser
+
+DEPTHS = (250, 500, 1000, 2000)
+
+
+def nested_source(depth):
+    lines = ["int main() {", "    int x = 0;"]
+    for level in range(depth):
+        if level % 2:
+            lines.append(f"while (x < {level}) {{")
+        else:
+            lines.append(f"if (x == {level}) {{")
+        lines.append(f"int v{level} = {level};")
+        lines.append("x = x;")
+    for level in reversed(range(depth)):
+        if level % 2:
+            lines.append("}")
+        else:
+            lines.append("} else { x = x; }")
+    lines.append("}")
+    return '\n'.join(lines) + '\n'
+
+
+def main():
+    myparser.build_tables()
+    myparser.parse(nested_source(10))  # warm up
+    for depth in DEPTHS:
+        source = nested_source(depth)
+        session = myparser.ParseSession()
+        start = time.perf_counter()
+        session.parse(source)
+        elapsed = time.perf_counter() - start
+        print(f"depth={depth:>5}: {elapsed * 1000:8.1f} ms, {elapsed / depth * 1e6:7.2f} us/level")
+
+
+if __name__ == '__main__':
+    main()
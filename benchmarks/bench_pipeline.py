@@ -0,0 +1,43 @@
+"""Lex time and parse time reported separately.
+
+The source is lexed once into a token buffer, the parser then reads from
+that buffer and the highlighter reuses it without lexing again.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import myparser
+
+
+def many_functions_source(functions, statements):
+    parts = ["class Node {\n    int data;\n    Node* next;\n};\n"]
+    for f in range(functions):
+        body = ''.join(f"    int v{i} = h;\n    v{i} = h;\n" for i in range(statements))
+        parts.append(f"int work{f}(int h) {{\n{body}}}\n")
+    calls = ''.join(f"    work{f}({f});\n" for f in range(functions))
+    parts.append(f"int main() {{\n    Node* head = new Node{{1, nullptr}};\n{calls}}}\n")
+    return ''.join(parts)
+
+
+def main():
+    myparser.build_tables()
+    session = myparser.ParseSession()
+    for functions in (50, 200, 800):
+        source = many_functions_source(functions, 8)
+        start = time.perf_counter()
+        tokens = session.tokenize(source)
+        lexed = time.perf_counter()
+        session.parse_tokens(tokens)
+        parsed = time.perf_counter()
+        tokens.highlight_tokens()
+        highlighted = time.perf_counter()
+        print(f"{len(tokens):>7} tokens: lex {(lexed - start) * 1000:7.1f} ms, "
+              f"parse {(parsed - lexed) * 1000:7.1f} ms, "
+              f"highlight {(highlighted - parsed) * 1000:6.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
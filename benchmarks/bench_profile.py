@@ -0,0 +1,53 @@
+"""Cost of the profiling hooks, and what they report.
+
+Parses the same program without a profiler, with a Profiler and with a
+memory-tracing Profiler, then prints the phases and slowest productions
+the last one recorded.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import myparser
+from myprofile import Profiler
+
+
+def many_functions_source(functions, statements):
+    parts = ["class Node {\n    int data;\n    Node* next;\n};\n"]
+    for f in range(functions):
+        body = ''.join(f"    int v{i} = h;\n    v{i} = h;\n" for i in range(statements))
+        parts.append(f"int work{f}(int h) {{\n{body}}}\n")
+    calls = ''.join(f"    work{f}({f});\n" for f in range(functions))
+    parts.append(f"int main() {{\n    Node* head = new Node{{1, nullptr}};\n{calls}}}\n")
+    return ''.join(parts)
+
+
+def timed_parse(source, profiler):
+    session = myparser.ParseSession(profiler=profiler)
+    start = time.perf_counter()
+    session.parse(source)
+    return time.perf_counter() - start
+
+
+def main():
+    myparser.build_tables()
+    source = many_functions_source(400, 8)
+    plain = min(timed_parse(source, None) for _ in range(3))
+    timed = min(timed_parse(source, Profiler()) for _ in range(3))
+    profiler = Profiler(memory=True)
+    traced = timed_parse(source, profiler)
+    print(f"plain {plain * 1000:7.1f} ms, profiled {timed * 1000:7.1f} ms ({timed / plain:4.2f}x), "
+          f"with memory {traced * 1000:7.1f} ms ({traced / plain:4.2f}x)")
+
+    report = profiler.report()
+    for path, stats in report['phases'].items():
+        print(f"  {path:<10} {stats['seconds'] * 1000:8.1f} ms, self {stats['self_seconds'] * 1000:8.1f} ms, "
+              f"peak {stats['peak_bytes'] / 2**20:6.1f} MiB")
+    for entry in report['productions'][:5]:
+        print(f"  {entry['calls']:>7} x {entry['seconds'] * 1000:7.1f} ms  {entry['production']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""How much of a broken program the recovering parse keeps, and its cost.
+
+Generated programs get a number of their statements broken by dropping
+the ';' that ends them, the mistake an editor sees most while typing. For
+each error count the recovered AST is compared to the AST of the intact
+program by the number of nodes with a source line, and the parse time to
+that of the intact program (the 0 errors row). Before timing, a few
+broken programs are checked to recover with their block structure intact.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import myparser
+from myast import Node
+from synthetic import generate
+
+ERRORS = (0, 1, 5, 20, 100)
+
+MAIN = 'the standard Main_Function '
+
+# Broken source -> (statement types kept at file level, statement types
+# kept in main, number of diagnostics)
+CASES = {
+    # The body of a broken condition keeps its scope, 'int z' stays in main
+    "int main() { if (x < ) { int y; } int z; }": ([MAIN], ['if_statement', 'declaration'], 1),
+    "int main() { while (x < ) { int y; } int z; }": ([MAIN], ['while_statement', 'declaration'], 1),
+    # A stray block is skipped up to its own '}'
+    "int main() { { int ; } int z; }": ([MAIN], ['declaration'], 1),
+    # Trailing junk at file level is dropped, not built into a statement
+    "int main() { int x; } garbage here": ([MAIN], ['declaration'], 1),
+    # Cut inside or right after an if/while condition, the source is closed
+    # and what came before is kept
+    "int g;\nint main() {\n int x;\n while (x": (['declaration', MAIN], ['declaration', 'while_statement'], 3),
+    "int g;\nint main() {\n int x;\n if (": (['declaration', MAIN], ['declaration', 'if_statement'], 3),
+    "int g;\nint main() {\n int x;\n if (x < 1)": (['declaration', MAIN], ['declaration', 'if_statement'], 2),
+}
+
+
+def count_lines(node):
+    """Number of nodes below node that carry a source line"""
+    if isinstance(node, list):
+        return sum(count_lines(item) for item in node)
+    if isinstance(node, (dict, Node)):
+        return ('line' in node) + sum(count_lines(value) for value in node.values()
+                                      if isinstance(value, (dict, Node, list)))
+    return 0
+
+
+def break_statements(source, errors, seed=0):
+    """source with the ';' of errors random statement lines removed"""
+    lines = source.split('\n')
+    statements = [i for i, line in enumerate(lines) if line.startswith('    ') and line.endswith(';')]
+    for i in random.Random(seed).sample(statements, errors):
+        lines[i] = lines[i][:-1]
+    return '\n'.join(lines)
+
+
+def check_cases(session):
+    for source, (top, body, diagnostics) in CASES.items():
+        result = session.parse(source)
+        main = next(stmt for stmt in result.ast if stmt.type == MAIN)
+        got = ([stmt.type for stmt in result.ast], [stmt.type for stmt in main.body], len(result.diagnostics))
+        assert got == (top, body, diagnostics), f"{source!r} recovered as {got}"
+
+
+def timed_parse(session, source):
+    start = time.perf_counter()
+    result = session.parse(source)
+    return result, time.perf_counter() - start
+
+
+def main():
+    myparser.build_tables()
+    session = myparser.ParseSession(recover=True)
+    check_cases(session)
+    source = generate(functions=100, classes=5, statements=6, depth=2)
+    total = count_lines(session.parse(source).ast)
+    base = None
+    for errors in ERRORS:
+        broken = break_statements(source, errors)
+        result, _ = timed_parse(session, broken)
+        seconds = min(timed_parse(session, broken)[1] for _ in range(5))
+        base = base or seconds
+        print(f"{errors:>4} errors: {len(result.diagnostics):>4} diagnostics, "
+              f"{count_lines(result.ast) / total:6.1%} of the nodes kept, "
+              f"parse {seconds * 1000:6.1f} ms ({seconds / base:4.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
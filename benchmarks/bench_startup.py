@@ -0,0 +1,47 @@
+"""Time-to-first-parse for fresh interpreter processes.
+
+Every process imports myparser and parses tested_code.txt, the same work a
+tester_code.py run does minus writing the JSON files. "cold" runs start from
+an empty table cache, "warm" runs reuse the tables written by build_tables.py.
+"""
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SNIPPET = (
+    "import myparser\n"
+    "with open('tested_code.txt') as f:\n"
+    "    myparser.parse(f.read())\n"
+)
+
+
+def run_once(cache_dir):
+    env = dict(os.environ, PARSER_CACHE_DIR=cache_dir)
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', SNIPPET], cwd=ROOT, env=env, check=True,
+                   stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def main(runs=10):
+    cache_dir = tempfile.mkdtemp(prefix='parser_cache_')
+    try:
+        cold = []
+        for _ in range(runs):
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            cold.append(run_once(cache_dir))
+        warm = [run_once(cache_dir) for _ in range(runs)]
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    for label, times in (('cold', cold), ('warm', warm)):
+        print(f"{label}: mean {statistics.mean(times) * 1000:.1f} ms, "
+              f"min {min(times) * 1000:.1f} ms over {runs} runs")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
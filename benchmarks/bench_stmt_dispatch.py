@@ -0,0 +1,74 @@
+"""Reduction cost of each statement form on statement-heavy inputs.
+
+Every statement form gets its own program of a few thousand statements.
+The grammar actions are timed with a myprofile.Profiler and the cost per
+reduction of the stmt productions is printed, next to the parse time per
+statement without profiling. Run it on an older checkout to compare.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import myparser
+from myprofile import Profiler
+
+CLASSES = """class Node {
+    int data;
+    Node* next;
+    Node(int d, int e) {
+        data = d;
+    }
+    void set(int d) {
+        data = d;
+    }
+};
+int f(int h) {
+    h = h;
+}
+"""
+
+STATEMENTS = {
+    'declaration': lambda i: f"int v{i} = {i};",
+    'assignment': lambda i: f"v = {i};",
+    'member assignment': lambda i: f"n->data = {i};",
+    'method call': lambda i: f"n->set({i});",
+    'function call': lambda i: f"f({i});",
+    'object': lambda i: f"Node o{i}({i}, {i});",
+    'new object': lambda i: f"Node* p{i} = new Node{{{i}, nullptr}};",
+    'delete': lambda i: "delete n;",
+}
+COUNT = 5000
+
+
+def statements_source(statement):
+    body = ''.join(f"    {statement(i)}\n" for i in range(COUNT))
+    return f"{CLASSES}int main() {{\n    int v;\n    Node* n;\n{body}}}\n"
+
+
+def main():
+    myparser.build_tables()
+    session = myparser.ParseSession()
+    for form, statement in STATEMENTS.items():
+        source = statements_source(statement)
+        tokens = session.tokenize(source)
+        start = time.perf_counter()
+        for _ in range(3):
+            session.reset()
+            session.parse_tree(tokens)
+        parse = (time.perf_counter() - start) / 3
+
+        profiler = Profiler()
+        profiled = myparser.ParseSession(profiler=profiler)
+        profiled.parse_tree(profiled.tokenize(source))
+        reductions = [entry for entry in profiler.report()['productions']
+                      if entry['production'].startswith('stmt ->') and entry['calls'] >= COUNT]
+        calls = sum(entry['calls'] for entry in reductions)
+        seconds = sum(entry['seconds'] for entry in reductions)
+        print(f"{form:>18}: {seconds / calls * 1e6:6.2f} us per stmt reduction, "
+              f"parse {parse / COUNT * 1e6:6.2f} us per statement")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""Lex, parse, resolve and emit time plus peak memory across program sizes.
+
+    python benchmarks/bench_suite.py            # measure and print
+    python benchmarks/bench_suite.py --update   # also store as the baseline
+    python benchmarks/bench_suite.py --check    # exit 1 on a regression
+
+Programs come from synthetic.generate, so every run measures the same
+sources. Each phase is timed on its own, best of --repeat runs, and the
+peak traced memory of the whole pipeline is taken from one more run under
+tracemalloc. Baselines are per machine and go to baselines.json next to
+this file (or --baseline). A phase regresses when it is both more than
+--tolerance times and 5 ms slower than its baseline, memory when it grows
+by more than 10%.
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import myparser
+from myemitter import write_result
+from myresolver import ScopeResolver
+from synthetic import generate
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+SIZES = {
+    'small': dict(functions=10, classes=2, statements=6, depth=2),
+    'medium': dict(functions=50, classes=8, statements=6, depth=3),
+    'large': dict(functions=300, classes=20, statements=6, depth=3),
+    'deep': dict(functions=4, classes=1, statements=2, depth=12),
+}
+PHASES = ('lex', 'parse', 'resolve', 'emit')
+MIN_REGRESSION = 0.005  # Seconds, anything smaller is noise
+
+
+def run_pipeline(session, source):
+    """Seconds per phase for one parse and JSON emit of source"""
+    times = {}
+    start = time.perf_counter()
+    tokens = session.tokenize(source)
+    times['lex'] = time.perf_counter() - start
+
+    session.reset()
+    start = time.perf_counter()
+    ast = session.parse_tree(tokens)
+    times['parse'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ScopeResolver(session).resolve(ast)
+    times['resolve'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    write_result(ast, session.functions_dict, session.classes_dict, io.StringIO(),
+                 io.StringIO(), io.StringIO(), indent=2)
+    times['emit'] = time.perf_counter() - start
+    return times
+
+
+def measure(source, repeat):
+    session = myparser.ParseSession()
+    best = dict.fromkeys(PHASES, float('inf'))
+    for _ in range(repeat):
+        for phase, seconds in run_pipeline(session, source).items():
+            best[phase] = min(best[phase], seconds)
+    tracemalloc.start()
+    try:
+        run_pipeline(session, source)
+        best['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best
+
+
+def regressions(results, baseline, tolerance):
+    """Descriptions of every measurement worse than its baseline"""
+    found = []
+    for size, measured in results.items():
+        expected = baseline.get(size)
+        if expected is None:
+            continue
+        for phase in PHASES:
+            if (measured[phase] > expected[phase] * tolerance
+                    and measured[phase] - expected[phase] > MIN_REGRESSION):
+                found.append(f"{size} {phase}: {measured[phase] * 1000:.1f} ms, "
+                             f"baseline {expected[phase] * 1000:.1f} ms")
+        if measured['peak_bytes'] > expected['peak_bytes'] * 1.1:
+            found.append(f"{size} memory: {measured['peak_bytes'] / 2**20:.1f} MiB, "
+                         f"baseline {expected['peak_bytes'] / 2**20:.1f} MiB")
+    return found
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Time the parse pipeline on generated programs")
+    arg_parser.add_argument('--sizes', default=','.join(SIZES), help="comma separated subset of " + ', '.join(SIZES))
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    arg_parser.add_argument('--baseline', default=BASELINE)
+    arg_parser.add_argument('--update', action='store_true', help="store the results as the baseline")
+    arg_parser.add_argument('--check', action='store_true', help="fail when slower than the baseline")
+    arg_parser.add_argument('--tolerance', type=float, default=1.3)
+    args = arg_parser.parse_args()
+
+    myparser.build_tables()
+    results = {}
+    for size in args.sizes.split(','):
+        source = generate(**SIZES[size])
+        results[size] = measured = measure(source, args.repeat)
+        phases = ', '.join(f"{phase} {measured[phase] * 1000:7.1f} ms" for phase in PHASES)
+        print(f"{size:>7} ({len(source) // 1024:>5} KiB): {phases}, peak {measured['peak_bytes'] / 2**20:6.1f} MiB")
+
+    if args.check:
+        if not os.path.exists(args.baseline):
+            sys.exit(f"No baseline at {args.baseline}, run with --update first")
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        if found:
+            sys.exit("Regressions:\n  " + '\n  '.join(found))
+        print("No regressions")
+    if args.update:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
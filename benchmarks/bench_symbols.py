@@ -0,0 +1,85 @@
+"""Build time, memory, ID lookups and export of the columnar symbol table.
+
+owner() is compared with a linear scan of the declarations.json records,
+which is how the visualizer finds the variable behind a memory ID today.
+"""
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import myparser
+from mysymbols import SymbolTable
+
+
+def many_symbols_source(functions):
+    parts = ["class Node {\n    int data;\n    Node* next;\n};\n"]
+    for f in range(functions):
+        parts.append(f"int work{f}(int h, int k) {{\n"
+                     f"    int a = h, b[4], grid[3][5];\n"
+                     f"    Node* node = new Node{{h, nullptr}};\n"
+                     f"    if (a < h) {{\n        int c = a;\n    }}\n"
+                     f"}}\n")
+    parts.append("int main() {\n    work0(1, 2);\n}\n")
+    return ''.join(parts)
+
+
+def linear_owner(records, memory_id):
+    for row, record in enumerate(records):
+        start, end = record['range']
+        if start <= memory_id <= end:
+            return row
+    return None
+
+
+def allocated(build):
+    gc.collect()
+    tracemalloc.start()
+    value = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, size
+
+
+def main():
+    myparser.build_tables()
+    session = myparser.ParseSession()
+    rng = random.Random(0)
+    for functions in (200, 2000):
+        result = session.parse(many_symbols_source(functions))
+        start = time.perf_counter()
+        table = SymbolTable.from_ast(result.ast)
+        build_time = time.perf_counter() - start
+        table, table_bytes = allocated(lambda: SymbolTable.from_ast(result.ast))
+        records, record_bytes = allocated(lambda: [table.symbol(row) for row in range(len(table))])
+        # Includes IDs past the last symbol, which have no owner
+        ids = [rng.randrange(100000, session.current_id + 10) for _ in range(2000)]
+
+        start = time.perf_counter()
+        owners = [table.owner(memory_id) for memory_id in ids]
+        indexed = (time.perf_counter() - start) / len(ids)
+        scanned_ids = ids[:200]
+        start = time.perf_counter()
+        expected = [linear_owner(records, memory_id) for memory_id in scanned_ids]
+        linear = (time.perf_counter() - start) / len(scanned_ids)
+        assert owners[:len(scanned_ids)] == expected, "owner() disagrees with the linear scan"
+        start = time.perf_counter()
+        for memory_id in ids:
+            table.element(memory_id)
+        element = (time.perf_counter() - start) / len(ids)
+        start = time.perf_counter()
+        table.interval_index()
+        export_time = time.perf_counter() - start
+
+        print(f"{len(table):>6} symbols: build {build_time * 1000:6.1f} ms, "
+              f"table {table_bytes / len(table):5.0f} B/symbol, records {record_bytes / len(table):5.0f} B/symbol | "
+              f"owner {indexed * 1e6:6.2f} us, element {element * 1e6:6.2f} us, "
+              f"linear scan {linear * 1e6:9.1f} us | interval_index {export_time * 1000:5.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
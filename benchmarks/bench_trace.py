@@ -0,0 +1,57 @@
+"""Size, write speed and seek latency of delta-encoded traces.
+
+Records the linked-list programs of bench_interpreter up to about a million
+steps, then reopens the trace and seeks to random steps. Reader memory only
+covers the keyframe index and the decoded state of one step.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import myparser
+import mytrace
+from bench_interpreter import linked_list_source
+
+
+def main():
+    myparser.build_tables()
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as directory:
+        for appends in (200, 1000):
+            result = myparser.parse(linked_list_source(appends))
+            path = os.path.join(directory, f'trace_{appends}.ndjson')
+            start = time.perf_counter()
+            with open(path, 'wb') as stream:
+                timeline = mytrace.record(result.ast, result.functions, result.classes, stream,
+                                          max_steps=10 ** 7)
+            record_time = time.perf_counter() - start
+            assert timeline.error is None, timeline.error
+            steps = timeline.steps
+            size = os.path.getsize(path)
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            reader = mytrace.TraceReader(path)
+            open_time = time.perf_counter() - start
+            targets = [rng.randrange(steps) for _ in range(50)]
+            start = time.perf_counter()
+            for step in targets:
+                reader.state(step)
+            seek_time = (time.perf_counter() - start) / len(targets)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            reader.close()
+
+            print(f"{appends:>5} appends, {steps:>8} steps: record {steps / record_time:7.0f} steps/s, "
+                  f"{size / 2**20:7.1f} MiB ({size / steps:5.1f} B/step) | open {open_time * 1000:5.1f} ms, "
+                  f"seek {seek_time * 1000:6.1f} ms, reader peak {peak / 2**20:5.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""Random programs in the C++ subset myparser accepts.
+
+    python benchmarks/synthetic.py --functions 50 --depth 3 > program.txt
+
+generate() builds a program from a seed, so the same knobs always give the
+same source. It has a Node class, `classes` classes with fields, default,
+parameterized and destructor members and methods, `functions` free
+functions and a main() using all of them. Every body holds `statements`
+statements, declarations of scalars, pointers and 1D/2D arrays,
+assignments, new/delete, member writes, method and function calls, and
+if/else and while blocks nested `depth` levels deep.
+"""
+import argparse
+import random
+
+TYPES = ('int', 'double', 'char', 'string')
+LITERALS = {'int': lambda rng: str(rng.randint(0, 999)),
+            'double': lambda rng: f"{rng.randint(0, 99)}.{rng.randint(0, 9)}",
+            'char': lambda rng: f"'{rng.choice('abcxyz')}'",
+            'string': lambda rng: f'"s{rng.randint(0, 99)}"'}
+COMPARISONS = ('<', '>', '<=', '>=', '==', '!=')
+
+NODE_CLASS = "class Node {\n    int data;\n    Node* next;\n};\n"
+
+
+class ProgramGenerator:
+    def __init__(self, rng, statements, depth):
+        self.rng = rng
+        self.statements = statements
+        self.depth = depth
+        self.counter = 0
+        self.classes = []  # (name, method names)
+        self.functions = []  # names of int f(int) functions
+
+    def fresh(self, prefix):
+        self.counter += 1
+        return f"{prefix}{self.counter}"
+
+    def body(self, scope, indent, depth):
+        """Lines of a block, scope holds the (name, type) of visible ints and pointers"""
+        scope = list(scope)
+        lines = []
+        # One block per body makes every branch reach the full depth
+        nested = self.rng.randrange(self.statements) if depth < self.depth else None
+        for i in range(self.statements):
+            if i == nested:
+                lines.extend(self.block(scope, indent, depth))
+            else:
+                lines.extend(self.statement(scope, indent, depth))
+        return lines
+
+    def statement(self, scope, indent, depth):
+        rng = self.rng
+        pad = '    ' * indent
+        ints = [name for name, kind in scope if kind == 'int']
+        nodes = [name for name, kind in scope if kind == 'Node*']
+        choice = rng.random()
+        if depth < self.depth and choice < 0.05:
+            return self.block(scope, indent, depth)
+        if choice < 0.35 or not ints:
+            var_type = rng.choice(TYPES)
+            name = self.fresh('v')
+            if var_type == 'int':
+                scope.append((name, 'int'))
+            return [f"{pad}{var_type} {name} = {LITERALS[var_type](rng)};"]
+        if choice < 0.45:
+            return [f"{pad}{rng.choice(ints)} = {rng.choice(ints + [LITERALS['int'](rng)])};"]
+        if choice < 0.55:
+            name = self.fresh('a')
+            if rng.random() < 0.5:
+                values = ', '.join(LITERALS['int'](rng) for _ in range(4))
+                return [f"{pad}int {name}[4] = {{{values}}};"]
+            rows = ', '.join('{' + ', '.join(LITERALS['int'](rng) for _ in range(3)) + '}' for _ in range(2))
+            return [f"{pad}int {name}[2][3] = {{{rows}}};"]
+        if choice < 0.65:
+            name = self.fresh('n')
+            scope.append((name, 'Node*'))
+            following = rng.choice(nodes) if nodes else 'nullptr'
+            return [f"{pad}Node* {name} = new Node{{{rng.choice(ints)}, {following}}};"]
+        if choice < 0.72 and nodes:
+            node = rng.choice(nodes)
+            if rng.random() < 0.5:
+                return [f"{pad}{node}->data = {rng.choice(ints)};"]
+            scope.remove((node, 'Node*'))
+            return [f"{pad}delete {node};"]
+        if choice < 0.8:
+            name = self.fresh('p')
+            return [f"{pad}int* {name} = new int[{rng.randint(1, 16)}];"]
+        if choice < 0.9 and self.classes:
+            class_name, methods = rng.choice(self.classes)
+            name = self.fresh('o')
+            lines = [f"{pad}{class_name} {name}({rng.choice(ints)}, {rng.choice(ints)});"]
+            if methods:
+                lines.append(f"{pad}{name}.{rng.choice(methods)}({rng.choice(ints)});")
+            return lines
+        if self.functions:
+            return [f"{pad}{rng.choice(self.functions)}({rng.choice(ints)});"]
+        return [f"{pad}{rng.choice(ints)} = {LITERALS['int'](rng)};"]
+
+    def block(self, scope, indent, depth):
+        rng = self.rng
+        pad = '    ' * indent
+        ints = [name for name, kind in scope if kind == 'int'] or ['0']
+        condition = f"{rng.choice(ints)} {rng.choice(COMPARISONS)} {rng.choice(ints)}"
+        keyword = 'while' if rng.random() < 0.4 else 'if'
+        lines = [f"{pad}{keyword} ({condition}) {{"]
+        lines.extend(self.body(scope, indent + 1, depth + 1))
+        if keyword == 'if' and rng.random() < 0.5:
+            lines.append(f"{pad}}}")
+            lines.append(f"{pad}else {{")
+            lines.extend(self.body(scope, indent + 1, depth + 1))
+        lines.append(f"{pad}}}")
+        return lines
+
+    def class_declaration(self, methods):
+        rng = self.rng
+        name = f"C{len(self.classes)}"
+        fields = [('f0', 'int'), ('f1', 'int')]
+        lines = [f"class {name} {{", "    int f0;", f"    int f1 = {LITERALS['int'](rng)};",
+                 "    Node* head;",
+                 f"    {name}() {{", "        f0 = 0;", "        head = nullptr;", "    }",
+                 f"    {name}(int a, int b) {{", "        f0 = a;", "        f1 = b;", "    }"]
+        method_names = []
+        for m in range(methods):
+            method = f"m{m}"
+            method_names.append(method)
+            lines.append(f"    void {method}(int x) {{")
+            lines.extend(self.body(fields + [('x', 'int')], 2, 0))
+            lines.append("    }")
+        lines.extend([f"    ~{name}() {{", "        delete head;", "    }", "};"])
+        self.classes.append((name, method_names))
+        return lines
+
+    def function_declaration(self):
+        name = f"work{len(self.functions)}"
+        lines = [f"int {name}(int h) {{"]
+        lines.extend(self.body([('h', 'int')], 1, 0))
+        lines.append("}")
+        self.functions.append(name)
+        return lines
+
+
+def generate(functions=10, classes=2, methods=2, statements=8, depth=2, seed=0):
+    """Source of a program of the given shape, the same for the same arguments"""
+    generator = ProgramGenerator(random.Random(seed), statements, depth)
+    lines = ["#include <iostream>", "using namespace std;", "", NODE_CLASS]
+    for _ in range(classes):
+        lines.extend(generator.class_declaration(methods))
+        lines.append("")
+    for _ in range(functions):
+        lines.extend(generator.function_declaration())
+        lines.append("")
+    lines.append("int main() {")
+    lines.append("    int seed = 1;")
+    lines.extend(generator.body([('seed', 'int')], 1, 0))
+    lines.append("}")
+    return '\n'.join(lines) + '\n'
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Print a random program of the parsed C++ subset")
+    arg_parser.add_argument('--functions', type=int, default=10)
+    arg_parser.add_argument('--classes', type=int, default=2)
+    arg_parser.add_argument('--methods', type=int, default=2, help="methods per class")
+    arg_parser.add_argument('--statements', type=int, default=8, help="statements per block")
+    arg_parser.add_argument('--depth', type=int, default=2, help="maximum if/while nesting")
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args()
+    print(generate(args.functions, args.classes, args.methods, args.statements, args.depth, args.seed), end='')
+
+
+if __name__ == '__main__':
+    main()
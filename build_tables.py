@@ -0,0 +1,13 @@
+"""Generate the lexer and parser tables ahead of time.
+
+Run this once after changing the grammar (or as part of packaging the
+Electron app) so that parser processes start from cached tables.
+"""
+import myparser
+
+if __name__ == '__main__':
+    for name, directory in zip(('Lexer', 'Parser'), myparser.build_tables()):
+        if directory is None:
+            print(f"{name} tables built in memory, no writable cache directory")
+        else:
+            print(f"{name} tables written to {directory}")
@@ -0,0 +1,407 @@
+"""AST node classes built by the grammar actions in myparser.
+
+Every node keeps its fields in __slots__, in the order they appear in the
+JSON output. A field that was never set is absent, the same as a missing
+key in the old dict nodes. Nodes also answer the dict methods used on the
+tree (get, [], in, items, ...), so code walking the tree works on both.
+A slot whose name ends in '_' is the field without it, for fields whose
+name is taken by one of those methods (Declarator.values_ is 'values').
+"""
+import sys
+
+
+class Node:
+    __slots__ = ()
+    type = None  # Value of the 'type' key, None for nodes without one
+    fields = ()
+
+    def __init_subclass__(cls):
+        slots = ()
+        for klass in reversed(cls.__mro__):
+            slots += klass.__dict__.get('__slots__', ())
+        # Field name -> attribute holding it
+        cls.attributes = {slot.rstrip('_'): slot for slot in slots}
+        cls.renamed = any(slot.endswith('_') for slot in slots)
+        cls.fields = (('type',) if cls.type is not None else ()) + tuple(cls.attributes)
+        if cls.type is not None:
+            cls.attributes = {'type': 'type', **cls.attributes}
+
+    def get(self, key, default=None):
+        attribute = self.attributes.get(key)
+        if attribute is None:
+            return default
+        return getattr(self, attribute, default)
+
+    def __getitem__(self, key):
+        attribute = self.attributes.get(key)
+        if attribute is not None:
+            try:
+                return getattr(self, attribute)
+            except AttributeError:
+                pass
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        attribute = self.attributes.get(key)
+        if attribute is None or attribute == 'type':
+            raise KeyError(f"{type(self).__name__} has no field '{key}'")
+        setattr(self, attribute, value)
+
+    def __contains__(self, key):
+        attribute = self.attributes.get(key)
+        return attribute is not None and hasattr(self, attribute)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def keys(self):
+        return [key for key, _ in self.items()]
+
+    def values(self):
+        return [value for _, value in self.items()]
+
+    def items(self):
+        missing = _MISSING
+        return [(key, value) for key, attribute in self.attributes.items()
+                if (value := getattr(self, attribute, missing)) is not missing]
+
+    def as_dict(self):
+        """Fields of this node only, children are left as they are"""
+        if not _FAST_STATE:
+            return dict(self.items())
+        # object.__getstate__ collects the set slots in C, in slot order (a
+        # subclass adding slots of its own would list those first)
+        state = self.__getstate__()
+        fields = state[1] if isinstance(state, tuple) else {}
+        if self.renamed:
+            fields = {key.rstrip('_'): value for key, value in fields.items()}
+        if self.type is None:
+            return fields
+        return {'type': self.type, **fields}
+
+    def to_dict(self):
+        """The node and everything below it as plain dicts and lists"""
+        return to_dict(self)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{k}={v!r}' for k, v in self.items())})"
+
+
+_MISSING = object()
+
+# Python 3.11+ returns (None, {slot: value}) for slotted objects
+_FAST_STATE = sys.version_info >= (3, 11)
+
+
+def to_dict(value):
+    if isinstance(value, Node):
+        return {key: to_dict(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [to_dict(item) for item in value]
+    if isinstance(value, dict):
+        return {key: to_dict(item) for key, item in value.items()}
+    return value
+
+
+# Statements
+
+class ClassDeclaration(Node):
+    __slots__ = ('line', 'scope', 'name', 'members')
+    type = 'class_declaration'
+
+    def __init__(self, line, name, members):
+        self.line = line
+        self.scope = 'global'
+        self.name = name
+        self.members = members
+
+
+class Declaration(Node):
+    __slots__ = ('data_type', 'declarations')
+    type = 'declaration'
+
+    def __init__(self, data_type, declarations):
+        self.data_type = data_type
+        self.declarations = declarations
+
+
+class Declarator(Node):
+    """One variable of a declaration, e.g. the 'x = 1' in 'int x = 1, y;'"""
+    __slots__ = ('name', 'pointer', 'points_to', 'value', 'allocation', 'allocated_type',
+                 'constructor_type', 'constructor_args', 'arg_param_map', 'array_size',
+                 'dimensions', 'values_', 'line', 'scope', 'id', 'range')
+
+    def __init__(self, name):
+        self.name = name
+
+
+class ObjectDeclaration(Node):
+    __slots__ = ('line', 'scope', 'id', 'constructor_type', 'class_type', 'name', 'object_name',
+                 'arg_param_map')
+    type = 'object_declaration'
+
+    def __init__(self, line, constructor_type, class_type):
+        self.line = line
+        self.scope = None
+        self.id = None
+        self.constructor_type = constructor_type
+        self.class_type = class_type
+
+
+class ClassPointerDeclaration(Node):
+    __slots__ = ('line', 'scope', 'id', 'class_type', 'name', 'pointer_category', 'allocation',
+                 'allocated_type', 'constructor_type', 'constructor_args', 'arg_param_map')
+    type = 'class_pointer_declaration'
+
+    def __init__(self, line, class_type, name):
+        self.line = line
+        self.scope = None
+        self.id = None
+        self.class_type = class_type
+        self.name = name
+
+
+class FunctionDeclaration(Node):
+    __slots__ = ('line', 'scope', 'id', 'name', 'return_type', 'params', 'body')
+    type = 'function declaration'
+
+    def __init__(self, line, name, return_type, params, body):
+        self.line = line
+        self.scope = 'global'
+        self.id = None
+        self.name = name
+        self.return_type = return_type
+        self.params = params
+        self.body = body
+
+
+class MainFunction(Node):
+    __slots__ = ('line', 'scope', 'name', 'return_type', 'body')
+    type = 'the standard Main_Function '
+
+    def __init__(self, line, return_type, body):
+        self.line = line
+        self.scope = 'global'
+        self.name = 'main'
+        self.return_type = return_type
+        self.body = body
+
+
+class FunctionCall(Node):
+    __slots__ = ('line', 'scope', 'name', 'arg_param_map', 'function_ref')
+    type = 'function_call'
+
+    def __init__(self, line, name, arg_param_map, function_ref):
+        self.line = line
+        self.scope = None
+        self.name = name
+        self.arg_param_map = arg_param_map
+        self.function_ref = function_ref
+
+
+class Assignment(Node):
+    __slots__ = ('line', 'scope', 'name', 'id', 'value')
+    type = 'assignment'
+
+    def __init__(self, line, name, value):
+        self.line = line
+        self.scope = None
+        self.name = name
+        self.value = value
+
+
+class MemberAssignment(Node):
+    __slots__ = ('line', 'scope', 'object', 'object_id', 'member', 'operator', 'pointer_access', 'value')
+    type = 'member_assignment'
+
+    def __init__(self, line, object, member, operator, value):
+        self.line = line
+        self.scope = None
+        self.object = object
+        self.member = member
+        self.operator = operator
+        if operator == 'arrow':
+            self.pointer_access = True
+        self.value = value
+
+
+class MethodCall(Node):
+    __slots__ = ('line', 'scope', 'object', 'method', 'operator', 'pointer_access', 'args',
+                 'arg_param_map')
+    type = 'method_call'
+
+    def __init__(self, line, object, method, operator, args):
+        self.line = line
+        self.scope = None
+        self.object = object
+        self.method = method
+        self.operator = operator
+        if operator == 'arrow':
+            self.pointer_access = True
+        self.args = args
+
+
+class DeleteStatement(Node):
+    __slots__ = ('line', 'scope', 'target')
+    type = 'delete_statement'
+
+    def __init__(self, line, target):
+        self.line = line
+        self.scope = None
+        self.target = target
+
+
+class IfStatement(Node):
+    __slots__ = ('line', 'scope', 'condition', 'if_body', 'else_body')
+    type = 'if_statement'
+
+    def __init__(self, line, condition, if_body):
+        self.line = line
+        self.scope = None
+        self.condition = condition
+        self.if_body = if_body
+
+
+class WhileStatement(Node):
+    __slots__ = ('line', 'scope', 'condition', 'body')
+    type = 'while_statement'
+
+    def __init__(self, line, condition, body):
+        self.line = line
+        self.scope = None
+        self.condition = condition
+        self.body = body
+
+
+# Class members
+
+class MemberVariable(Node):
+    __slots__ = ('data_type', 'name', 'pointer', 'self_referential', 'points_to', 'default_value',
+                 'scope', 'id')
+    type = 'member_variable'
+
+    def __init__(self, data_type, name):
+        self.data_type = data_type
+        self.name = name
+
+
+class MemberFunction(Node):
+    __slots__ = ('return_type', 'name', 'belongs_to_class', 'params', 'body')
+    type = 'member_function'
+
+    def __init__(self, return_type, name, params, body):
+        self.return_type = return_type
+        self.name = name
+        self.belongs_to_class = ''
+        self.params = params
+        self.body = body
+
+
+class Constructor(Node):
+    __slots__ = ('name', 'line', 'params', 'body')
+    type = 'constructor'
+
+    def __init__(self, name, line, params, body):
+        self.name = name
+        self.line = line
+        self.params = params
+        self.body = body
+
+
+class ParameterizedConstructor(Constructor):
+    __slots__ = ()
+    type = 'parameterized constructor'
+
+
+class Destructor(Node):
+    __slots__ = ('name', 'line', 'body')
+    type = 'destructor'
+
+    def __init__(self, name, line, body):
+        self.name = name
+        self.line = line
+        self.body = body
+
+
+class Parameter(Node):
+    __slots__ = ('data_type', 'name', 'scope', 'id')
+    type = 'parameter'
+
+    def __init__(self, data_type, name):
+        self.data_type = data_type
+        self.name = name
+
+
+# Expressions
+
+class Variable(Node):
+    __slots__ = ('name', 'scope', 'id', 'class_type')
+    type = 'variable'
+
+    def __init__(self, name):
+        self.name = name
+        self.scope = None
+
+
+class NullPtr(Node):
+    __slots__ = ('value',)
+    type = 'nullptr'
+
+    def __init__(self):
+        self.value = 'nullptr'
+
+
+class MemberAccess(Node):
+    __slots__ = ('object', 'member', 'operator', 'pointer_access')
+    type = 'member_access'
+
+    def __init__(self, object, member, operator):
+        self.object = object
+        self.member = member
+        self.operator = operator
+        if operator == 'arrow':
+            self.pointer_access = True
+
+
+class NewArray(Node):
+    __slots__ = ('data_type', 'size')
+    type = 'new_array'
+
+    def __init__(self, data_type, size):
+        self.data_type = data_type
+        self.size = size
+
+
+class Address(Node):
+    __slots__ = ('name', 'id')
+    type = 'address'
+
+    def __init__(self, name):
+        self.name = name
+
+
+class PointsTo(Node):
+    """Target of a pointer initialized with &name"""
+    __slots__ = ('name', 'id')
+
+    def __init__(self, name):
+        self.name = name
+
+
+class Comparison(Node):
+    __slots__ = ('left', 'operator', 'right')
+    type = 'comparison'
+
+    def __init__(self, left, operator, right):
+        self.left = left
+        self.operator = operator
+        self.right = right
+
+
+class ArgParam(Node):
+    """One argument of a call paired with the parameter it binds to"""
+    __slots__ = ('param_name', 'arg_value')
+
+    def __init__(self, param_name, arg_value):
+        self.param_name = param_name
+        self.arg_value = arg_value
@@ -0,0 +1,236 @@
+import hashlib
+import os
+import pickle
+import copy
+import threading
+from collections import OrderedDict
+
+import myparser
+from myast import Node
+from myparser import ParseResult
+
+# Bump when cached trees change shape without a grammar change (resolver,
+# myast node layout), so older pickles are not read back as current
+CACHE_FORMAT = 1
+
+
+def token_key(tokens):
+    """Hash of the token types and values, whitespace and comments never reach it"""
+    digest = hashlib.sha1()
+    for tok in tokens:
+        digest.update(f'{tok.type}\x00{tok.value}\x01'.encode())
+    return digest.hexdigest()
+
+
+def line_mapping(old_lines, new_lines):
+    """Old line -> new line when every old line lands on a single new line, else None"""
+    mapping = {}
+    for old, new in zip(old_lines, new_lines):
+        if mapping.setdefault(old, new) != new:
+            return None
+    return mapping
+
+
+def remap_lines(node, mapping, memo):
+    """Copy node with every 'line' moved through mapping, shared nodes stay shared"""
+    if isinstance(node, Node):
+        if id(node) in memo:
+            return memo[id(node)]
+        copied = memo[id(node)] = copy.copy(node)
+        for key, value in node.items():
+            if key == 'line' and isinstance(value, int):
+                copied[key] = mapping.get(value, value)
+            elif isinstance(value, (Node, dict, list)):
+                copied[key] = remap_lines(value, mapping, memo)
+        return copied
+    if isinstance(node, dict):
+        if id(node) in memo:
+            return memo[id(node)]
+        copied = memo[id(node)] = {}
+        for key, value in node.items():
+            if key == 'line' and isinstance(value, int):
+                copied[key] = mapping.get(value, value)
+            else:
+                copied[key] = remap_lines(value, mapping, memo)
+        return copied
+    if isinstance(node, list):
+        if id(node) in memo:
+            return memo[id(node)]
+        copied = memo[id(node)] = []
+        copied.extend(remap_lines(item, mapping, memo) for item in node)
+        return copied
+    return node
+
+
+class CacheEntry:
+    """Parse result of one token stream and the line of every token in it"""
+    def __init__(self, ast, functions, classes, lines):
+        self.ast = ast
+        self.functions = functions
+        self.classes = classes
+        self.lines = lines
+
+
+class ParseCache:
+    """Content-addressed cache of parse results.
+
+    Results are keyed by a hash of the token stream, so sources that differ
+    only in whitespace or comments share an entry. When the layout moved
+    tokens to other lines, the cached tree is copied with its lines updated.
+    Recent entries live in memory (LRU, max_entries), and with a directory
+    they are also pickled to disk, evicting the least recently used files
+    once they take more than max_bytes. Files live in a subdirectory named
+    after CACHE_FORMAT and the grammar version, so an upgraded parser never
+    reads results of an older one.
+
+    Results of memory hits are shared between callers and must not be
+    modified.
+    """
+    def __init__(self, max_entries=256, directory=None, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # token key -> CacheEntry
+        self.sources = OrderedDict()  # source hash -> CacheEntry, skips lexing exact repeats
+        self.lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.entry_dir = None
+        if directory is not None:
+            self.entry_dir = os.path.join(directory, f'v{CACHE_FORMAT}-{myparser._grammar_version()}')
+            os.makedirs(self.entry_dir, exist_ok=True)
+
+    @property
+    def hits(self):
+        return self.memory_hits + self.disk_hits
+
+    def stats(self):
+        return {'hits': self.hits, 'memory_hits': self.memory_hits, 'disk_hits': self.disk_hits,
+                'misses': self.misses, 'entries': len(self.entries)}
+
+    def parse(self, session, source, tokens=None):
+        """Return the ParseResult of source, parsing with session only on a miss.
+
+        tokens is the TokenBuffer of source when the caller already lexed it.
+        """
+        source_key = hashlib.sha1(source.encode()).hexdigest()
+        with self.lock:
+            entry = self.sources.get(source_key)
+            if entry is not None:
+                self.sources.move_to_end(source_key)
+                self.memory_hits += 1
+                return ParseResult(entry.ast, entry.functions, entry.classes)
+        if tokens is None:
+            tokens = session.tokenize(source)
+        key = token_key(tokens)
+        lines = [tok.lineno for tok in tokens]
+        entry, tier = self.lookup(key)
+        if entry is not None:
+            if entry.lines != lines:
+                mapping = line_mapping(entry.lines, lines)
+                if mapping is None:
+                    entry = None
+                else:
+                    memo = {}
+                    entry = CacheEntry(remap_lines(entry.ast, mapping, memo),
+                                       remap_lines(entry.functions, mapping, memo),
+                                       remap_lines(entry.classes, mapping, memo), lines)
+        if entry is None:
+            result = session.parse_tokens(tokens)
+            if result.ast is None or result.diagnostics:
+                # Report syntax errors again on every request, printed or as diagnostics
+                with self.lock:
+                    self.misses += 1
+                return result
+            entry = CacheEntry(result.ast, result.functions, result.classes, lines)
+            tier = None
+            self.store_disk(key, entry)
+        with self.lock:
+            if tier == 'memory':
+                self.memory_hits += 1
+            elif tier == 'disk':
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+            self.remember(source_key, key, entry)
+        return ParseResult(entry.ast, entry.functions, entry.classes, tokens)
+
+    def lookup(self, key):
+        """(entry, 'memory' or 'disk'), or (None, None) on a miss"""
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is not None:
+            return entry, 'memory'
+        path = self.disk_path(key)
+        if path is None:
+            return None, None
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+            os.utime(path)  # Mark as recently used for eviction
+        except FileNotFoundError:
+            return None, None
+        except Exception:
+            # Truncated, or refers to classes that no longer exist
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None, None
+        return entry, 'disk'
+
+    def remember(self, source_key, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        self.sources[source_key] = entry
+        self.sources.move_to_end(source_key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        while len(self.sources) > self.max_entries:
+            self.sources.popitem(last=False)
+
+    def disk_path(self, key):
+        if self.entry_dir is None:
+            return None
+        return os.path.join(self.entry_dir, key + '.pickle')
+
+    def store_disk(self, key, entry):
+        path = self.disk_path(key)
+        if path is None:
+            return
+        # Write under a temporary name so readers never see a partial file
+        temporary = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temporary, 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+        self.evict_disk()
+
+    def evict_disk(self):
+        """Remove the least recently used files until the directory fits max_bytes"""
+        files = []
+        total = 0
+        for name in os.listdir(self.entry_dir):
+            if not name.endswith('.pickle'):
+                continue
+            path = os.path.join(self.entry_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        files.sort()
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.sources.clear()
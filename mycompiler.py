@@ -0,0 +1,393 @@
+"""Compiled execution mode for myinterpreter.
+
+CompiledInterpreter runs the same programs with the same memory model and
+produces the same timelines, snapshot for snapshot, as Interpreter. The
+difference is that every block is compiled once into Python closures before
+it first runs. Names are resolved at compile time to the slot holding them:
+the declaration ID of a local or global variable, or the member ID of a
+field of this. Statements no longer dispatch on their 'type' or look names
+up through the open blocks on every execution.
+
+Blocks are compiled lazily and cached by body and by the names visible when
+they start, which for a function body is its parameters, the class of this
+and the globals. Rare statements (arrays, objects, delete) are not compiled
+and run through the Interpreter handlers, which find names dynamically.
+"""
+from myinterpreter import COMPARISONS, NULL_NAMES, Instance, Interpreter, Ref
+from myast import Node
+
+
+class Scope:
+    """Compile-time view of the names a block sees"""
+    def __init__(self, blocks, members, globals):
+        self.blocks = blocks  # name -> declaration ID, innermost last
+        self.members = members  # name -> member ID of this, or {}
+        self.globals = globals
+
+    def child(self):
+        return Scope(self.blocks + [{}], self.members, self.globals)
+
+    def declare(self, name, slot):
+        self.blocks[-1][name] = slot
+
+    def resolve(self, name):
+        """('local', ID), ('member', ID), ('global', ID) or (None, None)"""
+        for block in reversed(self.blocks):
+            if name in block:
+                return 'local', block[name]
+        if name in self.members:
+            return 'member', self.members[name]
+        if name in self.globals:
+            return 'global', self.globals[name]
+        return None, None
+
+
+def node_type(value):
+    return value.get('type') if isinstance(value, (dict, Node)) else None
+
+
+def is_null(value):
+    value_type = node_type(value)
+    return value_type == 'nullptr' or (value_type == 'variable' and value['name'] in NULL_NAMES)
+
+
+class CompiledInterpreter(Interpreter):
+    """Interpreter running blocks compiled to closures"""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.compiled = {}
+        self.compilers = {
+            'declaration': self.compile_declaration,
+            'class_pointer_declaration': self.compile_class_pointer_declaration,
+            'assignment': self.compile_assignment,
+            'member_assignment': self.compile_member_assignment,
+            'method_call': self.compile_method_call,
+            'function_call': self.compile_function_call,
+            'if_statement': self.compile_if,
+            'while_statement': self.compile_while,
+        }
+
+    def execute_block(self, body, new_block=False):
+        activation = self.activations[-1]
+        this = activation.this
+        class_name = self.read(this).type_name if this is not None else None
+        global_names = self.activations[0].blocks[0] if self.activations[0].blocks else {}
+        key = (id(body), new_block, class_name, tuple(tuple(block.items()) for block in activation.blocks),
+               tuple(global_names.items()))
+        block = self.compiled.get(key)
+        if block is None:
+            members = self.layouts[class_name].member_ids if class_name is not None else {}
+            scope = Scope([dict(block) for block in activation.blocks], members, dict(global_names))
+            if new_block:
+                scope = scope.child()
+            block = self.compiled[key] = self.compile_block(body, scope)
+        if new_block:
+            activation.blocks.append({})
+            block()
+            self.exit_block()
+        else:
+            block()
+
+    # Statements
+
+    def compile_block(self, body, scope):
+        steps = tuple(self.compile_statement(stmt, scope) for stmt in body)
+        if len(steps) == 1:
+            return steps[0]
+
+        def block():
+            for step in steps:
+                step()
+        return block
+
+    def compile_inner_block(self, body, scope):
+        """Closure opening a block, running body and closing it again"""
+        scope = scope.child()
+        block = self.compile_block(body, scope)
+        if scope.blocks[-1]:
+            def inner_block():
+                self.activations[-1].blocks.append({})
+                block()
+                self.exit_block()
+            return inner_block
+        # Nothing is declared in it, so the block leaves no trace in memory
+        return block
+
+    def compile_statement(self, stmt, scope):
+        stmt_type = stmt.get('type')
+        compiler = self.compilers.get(stmt_type)
+        if compiler is not None:
+            return compiler(stmt, scope)
+        handler = self.statements.get(stmt_type)
+        if handler is None:
+            return lambda: self.fail(f"cannot execute {stmt_type}")
+        if stmt_type == 'object_declaration':
+            scope.declare(stmt.get('name', stmt.get('object_name')), stmt['id'])
+        return lambda: handler(stmt)
+
+    def compile_declaration(self, stmt, scope):
+        steps = []
+        for decl in stmt['declarations']:
+            if 'dimensions' in decl or 'points_to' in decl or decl.get('allocation') == 'new':
+                single = {'data_type': stmt['data_type'], 'declarations': [decl]}
+                steps.append(lambda single=single: self.exec_declaration(single))
+            else:
+                steps.append(self.compile_declare(decl.get('line'), decl['name'], decl['id'],
+                                                  self.compile_value(decl.get('value'), scope)))
+            scope.declare(decl['name'], decl['id'])
+        if len(steps) == 1:
+            return steps[0]
+
+        def declaration():
+            for step in steps:
+                step()
+        return declaration
+
+    def compile_declare(self, line, name, slot, value):
+        def declare():
+            if line is not None:
+                self.line = line
+            new_value = value()
+            self.activations[-1].blocks[-1][name] = slot
+            frames = self.frames
+            self.frames = frames[:-1] + (frames[-1].with_local(slot, new_value),)
+            self.snapshot(self.line)
+        return declare
+
+    def compile_class_pointer_declaration(self, stmt, scope):
+        if stmt.get('allocation') == 'new':
+            step = lambda: self.exec_class_pointer_declaration(stmt)
+        else:
+            step = self.compile_declare(stmt['line'], stmt['name'], stmt['id'], lambda: None)
+        scope.declare(stmt['name'], stmt['id'])
+        return step
+
+    def compile_assignment(self, stmt, scope):
+        line = stmt['line']
+        kind, slot = scope.resolve(stmt['name'])
+        value = self.compile_value(stmt['value'], scope)
+        if kind == 'local':
+            def assign():
+                self.line = line
+                new_value = value()
+                frames = self.frames
+                self.frames = frames[:-1] + (frames[-1].with_local(slot, new_value),)
+                self.snapshot(line)
+            return assign
+        location = self.compile_name_location(stmt['name'], kind, slot)
+
+        def assign():
+            self.line = line
+            ref = location()
+            self.write(ref, value())
+            self.snapshot(line)
+        return assign
+
+    def compile_member_assignment(self, stmt, scope):
+        line = stmt['line']
+        member = stmt['member']
+        target = stmt['object']
+        if isinstance(target, str):
+            target = {'type': 'variable', 'name': target}
+        if stmt['operator'] == 'arrow':
+            pointer = self.compile_value(target, scope)
+            base = lambda: self.pointer(pointer())
+        else:
+            base = self.compile_location(target, scope)
+        value = self.compile_value(stmt['value'], scope)
+
+        def assign():
+            self.line = line
+            ref = self.member_ref(base(), member)
+            self.write(ref, value())
+            self.snapshot(line)
+        return assign
+
+    def compile_method_call(self, stmt, scope):
+        line = stmt['line']
+        method_name = stmt['method']
+        if stmt['operator'] == 'arrow':
+            pointer = self.compile_value(stmt['object'], scope)
+            receiver_of = lambda: self.pointer(pointer())
+        else:
+            receiver_of = self.compile_location(stmt['object'], scope)
+        args = tuple(self.compile_value(arg, scope) for arg in stmt.get('args') or [])
+
+        def method_call():
+            self.line = line
+            receiver = receiver_of()
+            instance = self.read(receiver)
+            layout = self.layouts.get(instance.type_name) if isinstance(instance, Instance) else None
+            method = layout.methods.get(method_name) if layout is not None else None
+            if method is None:
+                self.fail(f"no method '{method_name}'")
+            self.call(f"function:{layout.name}.{method_name}", method, [arg() for arg in args], receiver)
+            self.snapshot(line)
+        return method_call
+
+    def compile_function_call(self, stmt, scope):
+        line = stmt['line']
+        function = self.functions.get(stmt.get('function_ref'))
+        if function is None:
+            def function_call():
+                self.line = line
+                self.snapshot(line)
+            return function_call
+        name = f"function:{function['name']}"
+        args = tuple(self.compile_value(pair['arg_value'], scope) for pair in stmt.get('arg_param_map') or [])
+
+        def function_call():
+            self.line = line
+            self.call(name, function, [arg() for arg in args])
+            self.snapshot(line)
+        return function_call
+
+    def compile_if(self, stmt, scope):
+        line = stmt['line']
+        condition = self.compile_value(stmt['condition'], scope)
+        if_block = self.compile_inner_block(stmt['if_body'], scope)
+        else_block = self.compile_inner_block(stmt['else_body'], scope) if 'else_body' in stmt else None
+
+        def if_statement():
+            self.line = line
+            result = condition()
+            self.snapshot(line)
+            if result:
+                if_block()
+            elif else_block is not None:
+                else_block()
+        return if_statement
+
+    def compile_while(self, stmt, scope):
+        line = stmt['line']
+        condition = self.compile_value(stmt['condition'], scope)
+        body = self.compile_inner_block(stmt['body'], scope)
+
+        def while_statement():
+            snapshot = self.snapshot
+            while True:
+                self.line = line
+                result = condition()
+                snapshot(line)
+                if not result:
+                    break
+                body()
+        return while_statement
+
+    # Expressions
+
+    def compile_value(self, value, scope):
+        value_type = node_type(value)
+        if value_type == 'variable':
+            name = value['name']
+            if name in NULL_NAMES:
+                return lambda: None
+            return self.compile_read(name, *scope.resolve(name))
+        if value_type == 'member_access':
+            return self.compile_member_read(value, scope)
+        if value_type == 'comparison':
+            return self.compile_comparison(value, scope)
+        if value_type == 'nullptr':
+            return lambda: None
+        if value_type is not None or isinstance(value, list):
+            # new_array, address and array initializers stay dynamic
+            return lambda: self.evaluate(value)
+        return lambda: value
+
+    def compile_read(self, name, kind, slot):
+        if kind == 'local':
+            def read_local():
+                try:
+                    return self.frames[-1].locals[slot]
+                except KeyError:
+                    self.fail(f"access to variable {slot} out of scope")
+            return read_local
+        if kind == 'global':
+            return lambda: self.read(Ref(0, slot))
+        if kind == 'member':
+            def read_member():
+                this = self.frames[-1].this
+                container = self.heap.get(this.slot) if this.frame is None else None
+                if container.__class__ is Instance:
+                    return container.fields.get(slot)
+                return self.read(Ref(this.frame, this.slot, slot))
+            return read_member
+        return lambda: self.fail(f"'{name}' is not declared")
+
+    def compile_name_location(self, name, kind, slot):
+        if kind == 'local':
+            return lambda: Ref(len(self.frames) - 1, slot)
+        if kind == 'global':
+            return lambda: Ref(0, slot)
+        if kind == 'member':
+            def member_location():
+                this = self.frames[-1].this
+                return Ref(this.frame, this.slot, slot)
+            return member_location
+        return lambda: self.fail(f"'{name}' is not declared")
+
+    def compile_location(self, value, scope):
+        value_type = node_type(value)
+        if value_type == 'variable':
+            return self.compile_name_location(value['name'], *scope.resolve(value['name']))
+        if value_type == 'member_access':
+            base = self.compile_member_base(value, scope)
+            member = value['member']
+            return lambda: self.member_ref(base(), member)
+        return lambda: self.fail("expression is not a variable")
+
+    def compile_member_base(self, value, scope):
+        """Ref of the object whose member value accesses"""
+        if value['operator'] == 'arrow':
+            pointer = self.compile_value(value['object'], scope)
+            return lambda: self.pointer(pointer())
+        return self.compile_location(value['object'], scope)
+
+    def compile_member_read(self, value, scope):
+        member_name = value['member']
+        # Member ID of member_name in every class that has one
+        member_ids = {name: layout.member_ids[member_name] for name, layout in self.layouts.items()
+                      if member_name in layout.member_ids}
+        if value['operator'] == 'arrow':
+            pointer = self.compile_value(value['object'], scope)
+            def read_member():
+                target = pointer()
+                if target.__class__ is Ref and target.frame is None and target.member is None:
+                    # Fast path, a field of a live heap object (PersistentMap.get inlined)
+                    address = target.slot
+                    h = hash(address)
+                    container = self.heap.root[h & 15][(h >> 4) & 15].get(address)
+                    if container.__class__ is Instance:
+                        member = member_ids.get(container.type_name)
+                        if member is not None:
+                            return container.fields.get(member)
+                return self.read(self.member_ref(self.pointer(target), member_name))
+            return read_member
+        base = self.compile_location(value['object'], scope)
+        return lambda: self.read(self.member_ref(base(), member_name))
+
+    def compile_comparison(self, value, scope):
+        left = self.compile_value(value['left'], scope)
+        right = self.compile_value(value['right'], scope)
+        operator = value['operator']
+        if operator in ('==', '!=') and (is_null(value['left']) or is_null(value['right'])):
+            # Only None equals None, so null checks are identity tests
+            operand = right if is_null(value['left']) else left
+            if operator == '==':
+                return lambda: operand() is None
+            return lambda: operand() is not None
+        compare = COMPARISONS[operator]
+
+        def comparison():
+            left_value = left()
+            right_value = right()
+            try:
+                return compare(left_value, right_value)
+            except TypeError:
+                self.fail(f"cannot compare {left_value!r} {operator} {right_value!r}")
+        return comparison
+
+
+def run(ast, functions, classes, **options):
+    """Execute a resolved program with compiled blocks and return its Timeline"""
+    return CompiledInterpreter(ast, functions, classes, **options).run()
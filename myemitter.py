@@ -0,0 +1,222 @@
+import json
+import operator
+import struct
+
+from myast import Node
+from myprofile import phase
+from mysymbols import SymbolTable
+
+
+# json.JSONEncoder(default=...) hook encoding AST nodes as their fields. A
+# C-level call, the encoder makes one for every node in the tree
+json_default = operator.methodcaller('as_dict')
+
+
+def inline_function_calls(node, functions_dict):
+    """Return a dict copy of node where every function call embeds its callee body"""
+    if isinstance(node, (dict, Node)):
+        copied = {key: inline_function_calls(value, functions_dict) for key, value in node.items()}
+        if node.get('type') == 'function_call':
+            function_data = functions_dict.get(node.get('function_ref'), {})
+            copied['body'] = inline_function_calls(function_data.get('body'), functions_dict)
+        return copied
+    if isinstance(node, list):
+        return [inline_function_calls(item, functions_dict) for item in node]
+    return node
+
+
+class JsonEmitter:
+    """Writes a top-level list or dict as JSON, one element at a time.
+
+    Elements are encoded and written as soon as they are reached, so the
+    full document is never held in memory as a string. With indent=None the
+    output is compact and uses the C encoder.
+    """
+    binary = False
+
+    def __init__(self, stream, indent=None):
+        self.stream = stream
+        self.indent = indent
+        if indent is None:
+            self.encoder = json.JSONEncoder(separators=(',', ':'), default=json_default)
+        else:
+            self.encoder = json.JSONEncoder(indent=indent, default=json_default)
+
+    def encode(self, value):
+        text = self.encoder.encode(value)
+        if self.indent is None:
+            return text
+        # Nested one level down, below the enclosing list or dict
+        return text.replace('\n', '\n' + ' ' * self.indent)
+
+    def write(self, document, transform=None):
+        if isinstance(document, dict):
+            opening, closing = '{', '}'
+            items = ((f'{json.dumps(key)}:', value) for key, value in document.items())
+        else:
+            opening, closing = '[', ']'
+            items = (('', value) for value in document)
+        separator = ',' if self.indent is None else ',\n' + ' ' * self.indent
+        key_space = '' if self.indent is None else ' '
+        self.stream.write(opening)
+        first = True
+        for key, value in items:
+            if first:
+                if self.indent is not None:
+                    self.stream.write('\n' + ' ' * self.indent)
+                first = False
+            else:
+                self.stream.write(separator)
+            if transform:
+                value = transform(value)
+            self.stream.write(key + (key_space if key else '') + self.encode(value))
+        if not first and self.indent is not None:
+            self.stream.write('\n')
+        self.stream.write(closing)
+
+
+class NdjsonEmitter:
+    """Writes one compact JSON line per list element, or per dict entry"""
+    binary = False
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.encoder = json.JSONEncoder(separators=(',', ':'), default=json_default)
+
+    def write(self, document, transform=None):
+        if isinstance(document, dict):
+            items = ({key: value} for key, value in document.items())
+        else:
+            items = iter(document)
+        for item in items:
+            if transform:
+                item = transform(item)
+            self.stream.write(self.encoder.encode(item))
+            self.stream.write('\n')
+
+
+class CborEmitter:
+    """Writes CBOR (RFC 8949) with an indefinite-length top-level container.
+
+    The top-level list or dict is streamed, each element is encoded into a
+    small buffer and flushed before the next one is visited.
+    """
+    binary = True
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, document, transform=None):
+        buffer = bytearray()
+        if isinstance(document, dict):
+            self.stream.write(b'\xbf')
+            for key, value in document.items():
+                if transform:
+                    value = transform(value)
+                self.encode(key, buffer)
+                self.encode(value, buffer)
+                self.stream.write(buffer)
+                buffer.clear()
+        else:
+            self.stream.write(b'\x9f')
+            for value in document:
+                if transform:
+                    value = transform(value)
+                self.encode(value, buffer)
+                self.stream.write(buffer)
+                buffer.clear()
+        self.stream.write(b'\xff')
+
+    def encode_head(self, major, value, buffer):
+        major <<= 5
+        if value < 24:
+            buffer.append(major | value)
+        elif value < 0x100:
+            buffer.append(major | 24)
+            buffer.append(value)
+        elif value < 0x10000:
+            buffer.append(major | 25)
+            buffer += struct.pack('>H', value)
+        elif value < 0x100000000:
+            buffer.append(major | 26)
+            buffer += struct.pack('>I', value)
+        else:
+            buffer.append(major | 27)
+            buffer += struct.pack('>Q', value)
+
+    def encode(self, value, buffer):
+        if value is None:
+            buffer.append(0xf6)
+        elif value is True:
+            buffer.append(0xf5)
+        elif value is False:
+            buffer.append(0xf4)
+        elif isinstance(value, int):
+            if value >= 0:
+                self.encode_head(0, value, buffer)
+            else:
+                self.encode_head(1, -1 - value, buffer)
+        elif isinstance(value, float):
+            buffer.append(0xfb)
+            buffer += struct.pack('>d', value)
+        elif isinstance(value, str):
+            data = value.encode('utf-8')
+            self.encode_head(3, len(data), buffer)
+            buffer += data
+        elif isinstance(value, (list, tuple)):
+            self.encode_head(4, len(value), buffer)
+            for item in value:
+                self.encode(item, buffer)
+        elif isinstance(value, (dict, Node)):
+            items = value.items()
+            self.encode_head(5, len(items), buffer)
+            for key, item in items:
+                self.encode(key, buffer)
+                self.encode(item, buffer)
+        else:
+            raise TypeError(f"Cannot encode {type(value).__name__} as CBOR")
+
+
+EMITTERS = {
+    'json': JsonEmitter,
+    'ndjson': NdjsonEmitter,
+    'cbor': CborEmitter,
+}
+
+
+def emit(document, target, format='json', transform=None, **options):
+    """Stream document to target, a path or an open file-like object"""
+    emitter_class = EMITTERS[format]
+    if hasattr(target, 'write'):
+        emitter_class(target, **options).write(document, transform)
+        return
+    mode = 'wb' if emitter_class.binary else 'w'
+    with open(target, mode) as stream:
+        emitter_class(stream, **options).write(document, transform)
+
+
+def write_result(ast, functions_dict, classes_dict, ast_target, functions_target=None,
+                 classes_target=None, format='json', inline_calls=False, symbols_target=None,
+                 symbols=None, profiler=None, **options):
+    """Write the AST and, when targets are given, the function and class tables.
+
+    symbols_target receives the ID interval index of symbols, a SymbolTable
+    built from ast when not given. Each output is timed as a phase of
+    profiler, see myprofile.
+    """
+    transform = None
+    if inline_calls:
+        transform = lambda stmt: inline_function_calls(stmt, functions_dict)
+    with phase(profiler, 'ast'):
+        emit(ast, ast_target, format, transform, **options)
+    if functions_target is not None:
+        with phase(profiler, 'functions'):
+            emit(functions_dict, functions_target, format, **options)
+    if classes_target is not None:
+        with phase(profiler, 'classes'):
+            emit(classes_dict, classes_target, format, **options)
+    if symbols_target is not None:
+        with phase(profiler, 'symbols'):
+            if symbols is None:
+                symbols = SymbolTable.from_ast(ast)
+            emit(symbols.interval_index(), symbols_target, format, **options)
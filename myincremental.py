@@ -0,0 +1,162 @@
+import hashlib
+import re
+from collections import ChainMap
+
+from myast import Node
+from myparser import ParseResult, ParseSession
+from myresolver import ScopeResolver
+
+
+# Braces and semicolons decide where units end, strings, character literals
+# and comments are matched only so that their contents are skipped
+UNIT_BOUNDARY = re.compile(r'"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\])\'|//[^\n]*|[{};]')
+LEADING_SPACE = re.compile(r'\s*')
+FIRST_WORD = re.compile(r'(?:\s+|#include[ \t]*<[^>]+>|//[^\n]*)*(\w*)')
+
+
+def split_units(source):
+    """Split source into top-level units: classes, functions and declarations.
+
+    Returns (start offset, end offset, first line, interface) for each unit.
+    The interface is the part other units can depend on: the header of a
+    function, or the whole text of a class or global declaration. This only
+    scans for unit boundaries, the units themselves are lexed when parsed.
+    """
+    units = []
+    depth = 0
+    line = 1
+    position = 0
+    start = None
+    for match in UNIT_BOUNDARY.finditer(source):
+        char = match.group()
+        if char not in '{};':
+            continue
+        if start is None:
+            start = LEADING_SPACE.match(source, position).end()
+            line += source.count('\n', position, start)
+            is_class = FIRST_WORD.match(source, start).group(1) == 'class'
+            body_start = None
+        if char == '{':
+            if depth == 0 and body_start is None:
+                body_start = match.start()
+            depth += 1
+        elif char == '}':
+            depth -= 1
+        if depth == 0 and (char == ';' or (char == '}' and not is_class)):
+            end = match.end()
+            header_end = body_start if body_start is not None and not is_class else end
+            units.append((start, end, line, source[start:header_end]))
+            line += source.count('\n', start, end)
+            position = end
+            start = None
+    if start is None:
+        start = LEADING_SPACE.match(source, position).end()
+        line += source.count('\n', position, start)
+    if start < len(source):
+        units.append((start, len(source), line, source[start:]))
+    return units
+
+
+def shift_lines(node, delta, seen):
+    """Move every 'line' in node by delta, visiting shared nodes once"""
+    if isinstance(node, (dict, Node)):
+        if id(node) in seen:
+            return
+        seen.add(id(node))
+        if isinstance(node.get('line'), int):
+            node['line'] += delta
+        for value in node.values():
+            if isinstance(value, (dict, Node, list)):
+                shift_lines(value, delta, seen)
+    elif isinstance(node, list):
+        for item in node:
+            shift_lines(item, delta, seen)
+
+
+class ParsedUnit:
+    """Resolved statements of one top-level unit, the IDs they use and its syntax errors"""
+    def __init__(self, ast, classes, symbols, first_id, id_count, start_line, diagnostics):
+        self.ast = ast
+        self.classes = classes
+        self.symbols = symbols
+        self.first_id = first_id
+        self.id_count = id_count
+        self.start_line = start_line
+        self.diagnostics = diagnostics  # 'pos' relative to the unit start
+
+
+class IncrementalParser:
+    """Re-parses only the top-level units of a file that changed.
+
+    Units are cached by their text and by the interfaces of the units before
+    them, so editing a function body re-parses that function alone while
+    editing a class also refreshes the units that may use it. Unchanged units
+    keep their memory IDs, changed ones get a fresh block of IDs that never
+    overlaps with a live unit. With recover every unit is parsed in the
+    recovering mode of ParseSession and the diagnostics of all units are
+    returned with the result.
+    """
+    def __init__(self, first_id=100000, recover=False):
+        self.session = ParseSession(recover=recover)
+        self.units = {}
+        self.next_free_id = first_id
+        self.reparsed = 0
+
+    def update(self, source):
+        """Parse the new version of source, return a ParseResult"""
+        session = self.session
+        session.reset()
+        globals_symbols = {}
+        context = hashlib.sha1()
+        units = {}
+        ast = []
+        diagnostics = []
+        self.reparsed = 0
+        for start, end, start_line, interface in split_units(source):
+            text = source[start:end]
+            key = (hashlib.sha1(text.encode()).hexdigest(), context.hexdigest())
+            unit = self.units.get(key)
+            if unit is None:
+                unit = self.parse_unit(text, start_line, globals_symbols)
+                self.reparsed += 1
+            else:
+                self.reuse_unit(unit, start_line)
+            units[key] = unit
+            globals_symbols.update(unit.symbols)
+            context.update(interface.encode())
+            ast.extend(unit.ast)
+            for diagnostic in unit.diagnostics:
+                if diagnostic['pos'] is not None:
+                    diagnostic = dict(diagnostic, pos=diagnostic['pos'] + start)
+                diagnostics.append(diagnostic)
+        self.units = units
+        return ParseResult(ast, session.functions_dict, session.classes_dict, diagnostics=diagnostics)
+
+    def parse_unit(self, text, start_line, globals_symbols):
+        session = self.session
+        known_classes = set(session.classes_dict)
+        errors = len(session.diagnostics)
+        stmts = session.parse_tree(session.tokenize(text, start_line)) or []
+        session.current_id = first_id = self.next_free_id
+        symbols = ChainMap({}, globals_symbols)
+        ScopeResolver(session).resolve(stmts, symbols)
+        self.next_free_id = session.current_id
+        classes = {name: info for name, info in session.classes_dict.items() if name not in known_classes}
+        return ParsedUnit(stmts, classes, symbols.maps[0], first_id,
+                          session.current_id - first_id, start_line, session.diagnostics[errors:])
+
+    def reuse_unit(self, unit, start_line):
+        """Splice a cached unit back in, moved to its new first line"""
+        session = self.session
+        if unit.start_line != start_line:
+            seen = set()
+            shift_lines(unit.ast, start_line - unit.start_line, seen)
+            shift_lines(list(unit.classes.values()), start_line - unit.start_line, seen)
+            shift_lines(unit.diagnostics, start_line - unit.start_line, seen)
+            unit.start_line = start_line
+        for stmt in unit.ast:
+            if stmt.get('type') == 'function declaration':
+                session.functions_dict[stmt['name']] = stmt
+        for name, info in unit.classes.items():
+            session.classes_dict[name] = info
+            session.index_class(name, info['members'])
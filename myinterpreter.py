@@ -0,0 +1,720 @@
+"""Step-through interpreter over the resolved AST.
+
+Runs the global declarations and main() of a parsed program and records a
+Snapshot of memory after every statement: the stack frames with their
+variables, the heap objects and, on request, the pointer edges between them.
+Variables are keyed by the memory ID the resolver gave their declaration,
+object fields by the ID of their member variable, and heap objects get new
+IDs counting on from the last ID of the program.
+
+Snapshots share structure. Frames, objects and the heap are never changed in
+place, a write builds a new version that reuses everything it did not touch,
+so a snapshot costs a handful of small objects however large memory is.
+
+    python myinterpreter.py tested_code.txt -o timeline.json
+
+The interpreter works on ParseResult trees and on the same trees loaded
+back from output.json, functions.json and classes.json.
+"""
+import argparse
+import operator
+import sys
+
+from myast import Node
+from myemitter import emit
+
+NULL_NAMES = ('nullptr', 'NULL')  # Lexed as identifiers, see mylexer.KEYWORDS
+
+COMPARISONS = {
+    '==': operator.eq, '!=': operator.ne, '<': operator.lt,
+    '>': operator.gt, '<=': operator.le, '>=': operator.ge,
+}
+
+
+class ExecutionError(Exception):
+    pass
+
+
+class StepLimitExceeded(ExecutionError):
+    pass
+
+
+class PersistentMap:
+    """Immutable hash map sharing structure between versions.
+
+    Keys are spread over a two-level trie of 16-way tuples with small dicts
+    at the bottom. set() and remove() copy one path, two tuples and a dict,
+    and share everything else with the version they were called on.
+    """
+    __slots__ = ('root', 'size')
+
+    def __init__(self, root=None, size=0):
+        self.root = _EMPTY_ROOT if root is None else root
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, key):
+        h = hash(key)
+        return key in self.root[h & 15][(h >> 4) & 15]
+
+    def get(self, key, default=None):
+        h = hash(key)
+        return self.root[h & 15][(h >> 4) & 15].get(key, default)
+
+    def set(self, key, value):
+        h = hash(key)
+        i, j = h & 15, (h >> 4) & 15
+        branch = self.root[i]
+        bucket = dict(branch[j])
+        size = self.size if key in bucket else self.size + 1
+        bucket[key] = value
+        branch = branch[:j] + (bucket,) + branch[j + 1:]
+        return PersistentMap(self.root[:i] + (branch,) + self.root[i + 1:], size)
+
+    def remove(self, key):
+        h = hash(key)
+        i, j = h & 15, (h >> 4) & 15
+        branch = self.root[i]
+        if key not in branch[j]:
+            return self
+        bucket = dict(branch[j])
+        del bucket[key]
+        branch = branch[:j] + (bucket,) + branch[j + 1:]
+        return PersistentMap(self.root[:i] + (branch,) + self.root[i + 1:], self.size - 1)
+
+    def items(self):
+        for branch in self.root:
+            for bucket in branch:
+                yield from bucket.items()
+
+
+_EMPTY_ROOT = (({},) * 16,) * 16
+
+
+class Ref:
+    """Address of a value: local slot of frame number frame, or heap object
+    slot when frame is None, and optionally one field (member ID or array
+    index) inside it"""
+    __slots__ = ('frame', 'slot', 'member')
+
+    def __init__(self, frame, slot, member=None):
+        self.frame = frame
+        self.slot = slot
+        self.member = member
+
+    def __eq__(self, other):
+        return (isinstance(other, Ref) and self.frame == other.frame and self.slot == other.slot
+                and self.member == other.member)
+
+    def __hash__(self):
+        return hash((self.frame, self.slot, self.member))
+
+    def __repr__(self):
+        return f"Ref({self.frame}, {self.slot}, {self.member})"
+
+    def to_dict(self):
+        ref = {'heap': self.slot} if self.frame is None else {'frame': self.frame, 'id': self.slot}
+        if self.member is not None:
+            ref['member'] = self.member
+        return ref
+
+
+class Instance:
+    """Object or array value, fields maps member IDs or indexes to values"""
+    __slots__ = ('type_name', 'fields')
+
+    def __init__(self, type_name, fields):
+        self.type_name = type_name
+        self.fields = fields
+
+    def with_field(self, member, value):
+        fields = dict(self.fields)
+        fields[member] = value
+        return Instance(self.type_name, fields)
+
+
+class Frame:
+    """One function call: its scope name, receiver and variables by ID.
+
+    call numbers the calls of a run, versions of the same call share it.
+    """
+    __slots__ = ('function', 'this', 'locals', 'call')
+
+    def __init__(self, function, this=None, locals=None, call=0):
+        self.function = function
+        self.this = this
+        self.locals = {} if locals is None else locals
+        self.call = call
+
+    def with_local(self, slot, value):
+        locals = dict(self.locals)
+        locals[slot] = value
+        return Frame(self.function, self.this, locals, self.call)
+
+    def without(self, slots):
+        return Frame(self.function, self.this,
+                     {slot: value for slot, value in self.locals.items() if slot not in slots}, self.call)
+
+
+class Snapshot:
+    """Memory after one step, sharing its frames and heap with other steps"""
+    __slots__ = ('step', 'line', 'frames', 'heap')
+
+    def __init__(self, step, line, frames, heap):
+        self.step = step
+        self.line = line
+        self.frames = frames
+        self.heap = heap
+
+    def edges(self):
+        """(source, target) Ref of every pointer in memory"""
+        edges = []
+        for depth, frame in enumerate(self.frames):
+            for slot, value in frame.locals.items():
+                add_edges(edges, Ref(depth, slot), value)
+        for address, value in self.heap.items():
+            add_edges(edges, Ref(None, address), value)
+        return edges
+
+    def to_dict(self, edges=True):
+        snapshot = {
+            'step': self.step,
+            'line': self.line,
+            'frames': [{'function': frame.function,
+                        'this': encode_value(frame.this),
+                        'variables': {slot: encode_value(value) for slot, value in frame.locals.items()}}
+                       for frame in self.frames],
+            'heap': {address: encode_value(value) for address, value in sorted(self.heap.items())},
+        }
+        if edges:
+            snapshot['edges'] = [[source.to_dict(), target.to_dict()] for source, target in self.edges()]
+        return snapshot
+
+
+def add_edges(edges, source, value):
+    if isinstance(value, Ref):
+        edges.append((source, value))
+    elif isinstance(value, Instance):
+        for member, field in value.fields.items():
+            if isinstance(field, Ref):
+                edges.append((Ref(source.frame, source.slot, member), field))
+
+
+def encode_value(value):
+    if isinstance(value, Ref):
+        return value.to_dict()
+    if isinstance(value, Instance):
+        return {'type': value.type_name, 'fields': {member: encode_value(field)
+                                                    for member, field in value.fields.items()}}
+    if isinstance(value, tuple):
+        return [encode_value(item) for item in value]
+    return value
+
+
+class Timeline:
+    """Snapshots of one run, and the error that stopped it if any.
+
+    steps counts every step taken, snapshots is empty when they were handed
+    to an on_step callback instead.
+    """
+    def __init__(self, snapshots, error=None, steps=None):
+        self.snapshots = snapshots
+        self.error = error
+        self.steps = len(snapshots) if steps is None else steps
+
+    def __len__(self):
+        return len(self.snapshots)
+
+    def __getitem__(self, step):
+        return self.snapshots[step]
+
+    def to_dict(self, edges=True):
+        return {'error': self.error, 'snapshots': [snapshot.to_dict(edges) for snapshot in self.snapshots]}
+
+
+class ClassLayout:
+    """Member variables, methods and constructors of one class"""
+    def __init__(self, info):
+        self.name = info['name']
+        self.members = []
+        self.member_ids = {}
+        self.methods = {}
+        self.constructor = None
+        self.constructors = {}  # argument count -> parameterized constructor
+        self.destructor = None
+        for member in info['members']:
+            member_type = member.get('type')
+            if member_type == 'member_variable':
+                self.members.append(member)
+                self.member_ids[member['name']] = member['id']
+            elif member_type == 'member_function':
+                self.methods.setdefault(member['name'], member)
+            elif member_type == 'constructor':
+                self.constructor = member
+            elif member_type == 'parameterized constructor':
+                self.constructors.setdefault(len(member['params']), member)
+            elif member_type == 'destructor':
+                self.destructor = member
+
+
+class Activation:
+    """Interpreter side of a frame: the names declared in each open block"""
+    def __init__(self, depth, this=None):
+        self.depth = depth
+        self.this = this
+        self.blocks = [{}]
+
+
+def last_id(node):
+    """Highest memory ID used in node, 0 if there is none"""
+    highest = 0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (dict, Node)):
+            if isinstance(node.get('id'), int):
+                highest = max(highest, node['id'])
+            if isinstance(node.get('range'), str):
+                highest = max(highest, int(node['range'].split('-')[1]))
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+    return highest
+
+
+class Interpreter:
+    """Tree-walking interpreter dispatching on the 'type' of every node.
+
+    heap_start is the first heap ID, by default the one after the last ID
+    of the program. A run stops with an error after max_steps steps, so
+    programs that never end still give a timeline. With on_step every
+    Snapshot is passed to it as soon as it is taken and not kept.
+    """
+    def __init__(self, ast, functions, classes, max_steps=100000, heap_start=None, on_step=None):
+        self.ast = ast
+        self.on_step = on_step
+        self.functions = functions
+        self.layouts = {name: ClassLayout(info) for name, info in classes.items()}
+        self.max_steps = max_steps
+        if heap_start is None:
+            heap_start = max(last_id(ast), last_id(list(classes.values()))) + 1
+        self.heap_start = heap_start
+        self.statements = {
+            'declaration': self.exec_declaration,
+            'object_declaration': self.exec_object_declaration,
+            'class_pointer_declaration': self.exec_class_pointer_declaration,
+            'assignment': self.exec_assignment,
+            'member_assignment': self.exec_member_assignment,
+            'method_call': self.exec_method_call,
+            'function_call': self.exec_function_call,
+            'delete_statement': self.exec_delete,
+            'if_statement': self.exec_if,
+            'while_statement': self.exec_while,
+        }
+
+    def run(self):
+        """Execute the program and return its Timeline"""
+        self.frames = ()
+        self.heap = PersistentMap()
+        self.next_address = self.heap_start
+        self.snapshots = []
+        self.steps = 0
+        self.calls = 0
+        self.activations = []
+        self.line = None
+        error = None
+        try:
+            self.push_frame('global')
+            self.snapshot(None)
+            main = None
+            for stmt in self.ast:
+                stmt_type = stmt.get('type')
+                if stmt_type == 'the standard Main_Function ':
+                    main = stmt
+                elif stmt_type in self.statements:
+                    self.execute(stmt)
+            if main is not None:
+                self.push_frame('function:main')
+                self.execute_block(main['body'])
+                self.pop_frame()
+                self.snapshot(None)
+        except ExecutionError as e:
+            error = str(e)
+        except RecursionError:
+            error = f"line {self.line}: call stack overflow"
+        return Timeline(self.snapshots, error, self.steps)
+
+    def snapshot(self, line):
+        if self.steps >= self.max_steps:
+            raise StepLimitExceeded(f"stopped after {self.max_steps} steps")
+        snapshot = Snapshot(self.steps, line, self.frames, self.heap)
+        self.steps += 1
+        if self.on_step is None:
+            self.snapshots.append(snapshot)
+        else:
+            self.on_step(snapshot)
+
+    def fail(self, message):
+        raise ExecutionError(f"line {self.line}: {message}")
+
+    # Frames and blocks
+
+    def push_frame(self, function, this=None):
+        self.activations.append(Activation(len(self.frames), this))
+        self.calls += 1
+        self.frames += (Frame(function, this, call=self.calls),)
+
+    def pop_frame(self):
+        activation = self.activations[-1]
+        while activation.blocks:
+            self.exit_block()
+        self.activations.pop()
+        self.frames = self.frames[:-1]
+
+    def execute_block(self, body, new_block=False):
+        if new_block:
+            self.activations[-1].blocks.append({})
+        for stmt in body:
+            self.execute(stmt)
+        if new_block:
+            self.exit_block()
+
+    def exit_block(self):
+        """Close the innermost block, destroying the objects declared in it"""
+        activation = self.activations[-1]
+        block = activation.blocks[-1]
+        for slot in reversed(list(block.values())):
+            value = self.frames[activation.depth].locals.get(slot)
+            if isinstance(value, Instance):
+                self.destroy(Ref(activation.depth, slot), value)
+        activation.blocks.pop()
+        if block:
+            self.replace_frame(activation.depth, self.frames[activation.depth].without(set(block.values())))
+
+    def replace_frame(self, depth, frame):
+        self.frames = self.frames[:depth] + (frame,) + self.frames[depth + 1:]
+
+    def declare(self, name, slot, value):
+        activation = self.activations[-1]
+        activation.blocks[-1][name] = slot
+        self.replace_frame(activation.depth, self.frames[activation.depth].with_local(slot, value))
+
+    def lookup(self, name):
+        """Ref of the variable name: a local, a member of this, or a global"""
+        activation = self.activations[-1]
+        for block in reversed(activation.blocks):
+            if name in block:
+                return Ref(activation.depth, block[name])
+        this = activation.this
+        if this is not None:
+            member = self.layouts[self.read(this).type_name].member_ids.get(name)
+            if member is not None:
+                return Ref(this.frame, this.slot, member)
+        if self.activations[0].blocks and name in self.activations[0].blocks[0]:
+            return Ref(0, self.activations[0].blocks[0][name])
+        self.fail(f"'{name}' is not declared")
+
+    # Memory
+
+    def read(self, ref):
+        if ref.frame is None:
+            value = self.heap.get(ref.slot)
+            if value is None:
+                self.fail(f"access to freed memory {ref.slot}")
+        else:
+            try:
+                value = self.frames[ref.frame].locals[ref.slot]
+            except (IndexError, KeyError):
+                self.fail(f"access to variable {ref.slot} out of scope")
+        if ref.member is None:
+            return value
+        return value.fields.get(ref.member)
+
+    def write(self, ref, value):
+        if ref.member is not None:
+            container = self.read(Ref(ref.frame, ref.slot))
+            value = container.with_field(ref.member, value)
+        if ref.frame is None:
+            if ref.slot not in self.heap:
+                self.fail(f"write to freed memory {ref.slot}")
+            self.heap = self.heap.set(ref.slot, value)
+        else:
+            try:
+                frame = self.frames[ref.frame]
+            except IndexError:
+                self.fail(f"write to variable {ref.slot} out of scope")
+            self.replace_frame(ref.frame, frame.with_local(ref.slot, value))
+
+    def allocate(self, value, size=1):
+        address = self.next_address
+        self.next_address += size
+        self.heap = self.heap.set(address, value)
+        return Ref(None, address)
+
+    def allocate_array(self, data_type, size):
+        return self.allocate(Instance(f'{data_type}[{size}]', dict.fromkeys(range(int(size)))), int(size))
+
+    def construct(self, class_name, ref, args):
+        """Initialize the object at ref and run the constructor matching args"""
+        layout = self.layouts.get(class_name)
+        if layout is None:
+            self.fail(f"unknown class '{class_name}'")
+        self.write(ref, Instance(class_name, dict.fromkeys(layout.member_ids.values())))
+        for member in layout.members:
+            if 'points_to' in member:
+                target = layout.member_ids.get(member['points_to']['name'])
+                self.write(Ref(ref.frame, ref.slot, member['id']), Ref(ref.frame, ref.slot, target))
+            elif 'default_value' in member:
+                self.write(Ref(ref.frame, ref.slot, member['id']), self.evaluate(member['default_value']))
+        if args:
+            constructor = layout.constructors.get(len(args))
+            if constructor is not None:
+                self.call(f'parameterized constructor:{class_name}', constructor, args, ref)
+            else:
+                # Aggregate initialization, e.g. new Node{value, nullptr}
+                for member, value in zip(layout.members, args):
+                    self.write(Ref(ref.frame, ref.slot, member['id']), value)
+        elif layout.constructor is not None:
+            self.call(f'constructor:{class_name}', layout.constructor, [], ref)
+
+    def destroy(self, ref, value):
+        layout = self.layouts.get(value.type_name)
+        if layout is not None and layout.destructor is not None:
+            self.call(f'destructor:{value.type_name}', layout.destructor, [], ref)
+
+    def call(self, function, declaration, args, this=None):
+        """Run a function or method body in a new frame"""
+        self.push_frame(function, this)
+        params = declaration.get('params', [])
+        for param, value in zip(params, args):
+            self.declare(param['name'], param['id'], value)
+        for param in params[len(args):]:
+            self.declare(param['name'], param['id'], None)
+        self.snapshot(self.line)
+        line = self.line
+        self.execute_block(declaration['body'])
+        self.pop_frame()
+        self.line = line
+
+    # Expressions
+
+    def evaluate(self, value):
+        if isinstance(value, (dict, Node)):
+            value_type = value.get('type')
+            if value_type == 'variable':
+                if value['name'] in NULL_NAMES:
+                    return None
+                return self.read(self.lookup(value['name']))
+            if value_type == 'member_access':
+                return self.read(self.member_location(value))
+            if value_type == 'comparison':
+                left = self.evaluate(value['left'])
+                right = self.evaluate(value['right'])
+                try:
+                    return COMPARISONS[value['operator']](left, right)
+                except TypeError:
+                    self.fail(f"cannot compare {left!r} {value['operator']} {right!r}")
+            if value_type == 'nullptr':
+                return None
+            if value_type == 'new_array':
+                return self.allocate_array(value['data_type'], value['size'])
+            if value_type == 'address':
+                return self.lookup(value['name'])
+            self.fail(f"cannot evaluate {value_type}")
+        if isinstance(value, list):
+            return tuple(self.evaluate(item) for item in value)
+        return value
+
+    def location(self, value):
+        """Ref of an assignable expression"""
+        value_type = value.get('type') if isinstance(value, (dict, Node)) else None
+        if value_type == 'variable':
+            return self.lookup(value['name'])
+        if value_type == 'member_access':
+            return self.member_location(value)
+        self.fail("expression is not a variable")
+
+    def member_location(self, value):
+        if value['operator'] == 'arrow':
+            target = self.pointer(self.evaluate(value['object']))
+        else:
+            target = self.location(value['object'])
+        return self.member_ref(target, value['member'])
+
+    def pointer(self, value):
+        if value is None:
+            self.fail("null pointer dereference")
+        if not isinstance(value, Ref):
+            self.fail(f"{value!r} is not a pointer")
+        return value
+
+    def member_ref(self, target, member_name):
+        if target.member is not None:
+            self.fail(f"member '{member_name}' of a nested object")
+        instance = self.read(target)
+        layout = self.layouts.get(instance.type_name) if isinstance(instance, Instance) else None
+        member = layout.member_ids.get(member_name) if layout is not None else None
+        if member is None:
+            self.fail(f"no member '{member_name}'")
+        return Ref(target.frame, target.slot, member)
+
+    # Statements
+
+    def execute(self, stmt):
+        handler = self.statements.get(stmt.get('type'))
+        if handler is None:
+            self.fail(f"cannot execute {stmt.get('type')}")
+        handler(stmt)
+
+    def exec_declaration(self, stmt):
+        for decl in stmt['declarations']:
+            self.line = decl.get('line', self.line)
+            if 'dimensions' in decl:
+                value = self.array_value(decl['dimensions'], decl.get('values'))
+            elif 'points_to' in decl:
+                value = self.lookup(decl['points_to']['name'])
+            elif decl.get('allocation') == 'new':
+                if 'array_size' in decl:
+                    value = self.allocate_array(stmt['data_type'], decl['array_size'])
+                elif decl['allocated_type'] in self.layouts:
+                    value = self.allocate(None)
+                    self.construct(decl['allocated_type'], value,
+                                   self.evaluate(decl.get('constructor_args', [])))
+                else:
+                    value = self.allocate_array(decl['allocated_type'], 1)
+            else:
+                value = self.evaluate(decl.get('value'))
+            self.declare(decl['name'], decl['id'], value)
+            self.snapshot(self.line)
+
+    def array_value(self, dimensions, values):
+        size = int(dimensions[0])
+        values = list(values or [])[:size]
+        if len(dimensions) == 1:
+            items = [self.evaluate(item) for item in values]
+        else:
+            items = [self.array_value(dimensions[1:], item) for item in values]
+        empty = None if len(dimensions) == 1 else self.array_value(dimensions[1:], None)
+        return tuple(items) + (empty,) * (size - len(items))
+
+    def exec_object_declaration(self, stmt):
+        self.line = stmt['line']
+        name = stmt.get('name', stmt.get('object_name'))
+        self.declare(name, stmt['id'], None)
+        args = [self.evaluate(pair['arg_value']) for pair in stmt.get('arg_param_map') or []]
+        self.construct(stmt['class_type'], Ref(self.activations[-1].depth, stmt['id']), args)
+        self.snapshot(self.line)
+
+    def exec_class_pointer_declaration(self, stmt):
+        self.line = stmt['line']
+        value = None
+        if stmt.get('allocation') == 'new':
+            value = self.allocate(None)
+            self.construct(stmt['allocated_type'], value, self.evaluate(stmt.get('constructor_args', [])))
+        self.declare(stmt['name'], stmt['id'], value)
+        self.snapshot(self.line)
+
+    def exec_assignment(self, stmt):
+        self.line = stmt['line']
+        self.write(self.lookup(stmt['name']), self.evaluate(stmt['value']))
+        self.snapshot(self.line)
+
+    def exec_member_assignment(self, stmt):
+        self.line = stmt['line']
+        target = stmt['object']
+        if isinstance(target, str):
+            target = {'type': 'variable', 'name': target}
+        if stmt['operator'] == 'arrow':
+            ref = self.pointer(self.evaluate(target))
+        else:
+            ref = self.location(target)
+        self.write(self.member_ref(ref, stmt['member']), self.evaluate(stmt['value']))
+        self.snapshot(self.line)
+
+    def exec_method_call(self, stmt):
+        self.line = stmt['line']
+        if stmt['operator'] == 'arrow':
+            receiver = self.pointer(self.evaluate(stmt['object']))
+        else:
+            receiver = self.location(stmt['object'])
+        instance = self.read(receiver)
+        layout = self.layouts.get(instance.type_name) if isinstance(instance, Instance) else None
+        method = layout.methods.get(stmt['method']) if layout is not None else None
+        if method is None:
+            self.fail(f"no method '{stmt['method']}'")
+        args = [self.evaluate(arg) for arg in stmt.get('args') or []]
+        self.call(f"function:{layout.name}.{stmt['method']}", method, args, receiver)
+        self.snapshot(self.line)
+
+    def exec_function_call(self, stmt):
+        self.line = stmt['line']
+        function = self.functions.get(stmt.get('function_ref'))
+        if function is not None:
+            args = [self.evaluate(pair['arg_value']) for pair in stmt.get('arg_param_map') or []]
+            self.call(f"function:{function['name']}", function, args)
+        # Calls to undeclared functions do nothing but still take a step
+        self.snapshot(self.line)
+
+    def exec_delete(self, stmt):
+        self.line = stmt['line']
+        ref = self.evaluate(stmt['target'])
+        if ref is not None:
+            if not isinstance(ref, Ref) or ref.frame is not None or ref.member is not None:
+                self.fail("delete of memory not allocated with new")
+            value = self.read(ref)
+            if isinstance(value, Instance):
+                self.destroy(ref, value)
+            self.heap = self.heap.remove(ref.slot)
+        self.snapshot(self.line)
+
+    def exec_if(self, stmt):
+        self.line = stmt['line']
+        condition = self.evaluate(stmt['condition'])
+        self.snapshot(self.line)
+        if condition:
+            self.execute_block(stmt['if_body'], True)
+        elif 'else_body' in stmt:
+            self.execute_block(stmt['else_body'], True)
+
+    def exec_while(self, stmt):
+        while True:
+            self.line = stmt['line']
+            condition = self.evaluate(stmt['condition'])
+            self.snapshot(self.line)
+            if not condition:
+                break
+            self.execute_block(stmt['body'], True)
+
+
+def run(ast, functions, classes, **options):
+    """Execute a resolved program and return its Timeline"""
+    return Interpreter(ast, functions, classes, **options).run()
+
+
+def main():
+    import myparser
+
+    arg_parser = argparse.ArgumentParser(description="Run a program and write its memory timeline")
+    arg_parser.add_argument('source', nargs='?', default='tested_code.txt')
+    arg_parser.add_argument('-o', '--output', default='timeline.json')
+    arg_parser.add_argument('--max-steps', type=int, default=100000)
+    arg_parser.add_argument('--compiled', action='store_true', help="run with mycompiler.CompiledInterpreter")
+    args = arg_parser.parse_args()
+
+    with open(args.source) as f:
+        result = myparser.parse(f.read())
+    if result.ast is None:
+        sys.exit("The program has syntax errors")
+    interpreter = Interpreter
+    if args.compiled:
+        from mycompiler import CompiledInterpreter as interpreter
+    timeline = interpreter(result.ast, result.functions, result.classes, max_steps=args.max_steps).run()
+    emit(timeline.to_dict(), args.output, indent=2)
+    print(f"{len(timeline)} steps written to {args.output}"
+          + (f", stopped with: {timeline.error}" if timeline.error else ""))
+
+
+if __name__ == '__main__':
+    main()
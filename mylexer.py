@@ -1,5 +1,19 @@
+import hashlib
+import importlib.util
+import os
+import re
+import sys
+import tempfile
+import threading
+
+import ply
 import ply.lex as lex
 
+# Generated lexer/parser tables are cached here, one subdirectory per grammar
+# version, so stale tables are never picked up after a rule changes
+CACHE_DIR = os.environ.get('PARSER_CACHE_DIR',
+                           os.path.join(os.path.dirname(os.path.abspath(__file__)), '.parser_cache'))
+
 tokens = (
     'MAIN', 'TYPE', 'IDENTIFIER', 'NUMBER', 'CHAR_LITERAL', 'STRING_LITERAL',
     'EQUALS', 'SEMICOLON', 'COMMA', 'LBRACE', 'RBRACE', 'LBRACKET', 'RBRACKET',
@@ -75,16 +89,19 @@ def t_NUMBER(t):
         t.value = float(t.value)
     else:
         t.value = int(t.value)
+    t.lexend = t.lexer.lexpos  # The value no longer has the length of the lexeme
     return t
 
 def t_CHAR_LITERAL(t):
     r"'(\\.|[^'\\])'"
     t.value = t.value[1:-1]  # Strip quotes
+    t.lexend = t.lexer.lexpos
     return t
 
 def t_STRING_LITERAL(t):
     r'\"(\\.|[^"\\])*\"'
     t.value = t.value[1:-1]  # Strip quotes
+    t.lexend = t.lexer.lexpos
     return t
 
 t_LPAREN = r'\('
@@ -145,4 +162,219 @@ def t_error(t):
     print(f"Illegal character '{t.value[0]}'")
     t.lexer.skip(1)
 
-lexer = lex.lex()
\ No newline at end of file
+def rules_version(*parts):
+    """Short hash of the given rule definitions and the PLY version"""
+    digest = hashlib.sha1(ply.__version__.encode())
+    for part in parts:
+        digest.update(repr(part).encode())
+    return digest.hexdigest()[:12]
+
+def table_cache_dir(version):
+    """Writable directory for the tables of version, or None when there is none.
+
+    Falls back to a per-user temporary directory when CACHE_DIR cannot be
+    created, e.g. for an installed copy or a read-only home.
+    """
+    fallback = os.path.join(tempfile.gettempdir(), f'parser_cache-{getattr(os, "getuid", lambda: "user")()}')
+    for base in (CACHE_DIR, fallback):
+        path = os.path.join(base, version)
+        try:
+            os.makedirs(path, exist_ok=True)
+        except OSError:
+            continue
+        if os.access(path, os.W_OK):
+            return path
+    return None
+
+def load_table_module(path, name):
+    """Import a generated table module from path, or return None if missing"""
+    if not os.path.exists(path):
+        return None
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def _lexer_version():
+    module = sys.modules[__name__]
+    rules = []
+    for name in sorted(dir(module)):
+        if name.startswith('t_'):
+            value = getattr(module, name)
+            rules.append((name, value.__doc__ if callable(value) else value))
+    return rules_version(tokens, rules)
+
+_lexer = None
+_lexer_lock = threading.Lock()
+
+def get_lexer():
+    """Build the lexer on first use, from cached tables when available"""
+    global _lexer
+    if _lexer is None:
+        with _lexer_lock:
+            if _lexer is None:
+                version = _lexer_version()
+                outputdir = table_cache_dir(version)
+                if outputdir is None:
+                    # Nowhere to cache the tables, build them in memory
+                    _lexer = lex.lex(module=sys.modules[__name__])
+                    return _lexer
+                tabname = f'lextab_{version}'
+                lextab = load_table_module(os.path.join(outputdir, tabname + '.py'), tabname)
+                _lexer = lex.lex(module=sys.modules[__name__], optimize=1,
+                                 lextab=lextab or tabname, outputdir=outputdir)
+    return _lexer
+
+# Fast lexer mode. Words are matched once and looked up here, in the same
+# order the t_ rules above would try them, so 'class' is CLASS and not TYPE.
+# t_NULLPTR comes after t_IDENTIFIER and never matches, nullptr stays an
+# IDENTIFIER in both modes
+KEYWORDS = {
+    'main': 'MAIN', 'class': 'CLASS',
+    'int': 'TYPE', 'float': 'TYPE', 'double': 'TYPE', 'char': 'TYPE', 'string': 'TYPE', 'void': 'TYPE',
+    'new': 'NEW', 'delete': 'DELETE', 'if': 'IF', 'else': 'ELSE', 'for': 'FOR', 'while': 'WHILE',
+}
+
+OPERATORS = {
+    '(': 'LPAREN', ')': 'RPAREN', '[': 'LBRACKET', ']': 'RBRACKET', '{': 'LBRACE', '}': 'RBRACE',
+    '=': 'EQUALS', ';': 'SEMICOLON', ',': 'COMMA', '<=': 'LE', '>=': 'GE', '==': 'EQ', '!=': 'NE',
+    '<': 'LT', '>': 'GT', '*': 'POINTER', '&': 'ADDRESS', '->': 'ARROW', '.': 'DOT', '~': 'TILDE',
+}
+
+# The keyword rules need a word boundary on both sides, a word that starts
+# right after a number (e.g. "1else") falls through to a plain IDENTIFIER.
+# Ignored whitespace is folded into the front of every match, and anything
+# no rule accepts is matched one character at a time as an error
+MASTER_PATTERN = re.compile(r'''[ \t\r]*(?:
+    (?P<skip>\#include[ \t]*<[^>]+>|using[ \t]+namespace[ \t]+std[ \t]*;|//.*)
+  | (?P<word>\b[a-zA-Z_][a-zA-Z0-9_]*\b)
+  | (?P<operator>->|<=|>=|==|!=|[()\[\]{};,=<>*&.~])
+  | (?P<newline>\n+)
+  | (?P<identifier>[a-zA-Z_][a-zA-Z0-9_]*)
+  | (?P<number>\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+  | (?P<char>'(?:\\.|[^'\\])')
+  | (?P<string>"(?:\\.|[^"\\])*")
+  | (?P<error>[^ \t\r])
+)''', re.VERBOSE)
+
+class FastLexer:
+    """Single-pattern lexer producing the same tokens as the PLY lexer.
+
+    Drop-in for the PLY lexer object: input(), token(), iteration, clone()
+    and lineno behave the same, and every token has the type, value, lineno
+    and lexpos PLY would give it, plus lexend, the offset after the lexeme.
+    """
+    def __init__(self):
+        self.lineno = 1
+        self.lexpos = 0
+        self.lexdata = ''
+        self._tokens = iter(())
+
+    def clone(self):
+        return FastLexer()
+
+    def input(self, source):
+        self.lexdata = source
+        self.lexpos = 0
+        self._tokens = self._scan()
+
+    def token(self):
+        return next(self._tokens, None)
+
+    def __iter__(self):
+        return self._tokens
+
+    def _scan(self):
+        keywords = KEYWORDS
+        operators = OPERATORS
+        make_token = lex.LexToken
+        lineno = self.lineno
+        for m in MASTER_PATTERN.finditer(self.lexdata):
+            kind = m.lastgroup
+            value = m.group(kind)
+            if kind == 'word':
+                token_type = keywords.get(value, 'IDENTIFIER')
+            elif kind == 'operator':
+                token_type = operators[value]
+            elif kind == 'newline':
+                lineno += len(value)
+                self.lineno = lineno
+                continue
+            elif kind == 'skip':
+                continue
+            elif kind == 'identifier':
+                token_type = 'IDENTIFIER'
+            elif kind == 'number':
+                token_type = 'NUMBER'
+                value = float(value) if '.' in value or 'e' in value or 'E' in value else int(value)
+            elif kind == 'char':
+                token_type = 'CHAR_LITERAL'
+                value = value[1:-1]
+            elif kind == 'string':
+                token_type = 'STRING_LITERAL'
+                value = value[1:-1]
+            else:
+                print(f"Illegal character '{value}'")
+                continue
+            tok = make_token()
+            tok.type = token_type
+            tok.value = value
+            tok.lineno = lineno
+            tok.lexpos = m.start(kind)
+            tok.lexend = m.end(kind)
+            yield tok
+        self.lexpos = len(self.lexdata)
+
+def token_length(tok):
+    """Length of the source text of tok.
+
+    Numbers and literals carry lexend, their value lost the quotes or the
+    original spelling. Every other value is the lexeme itself.
+    """
+    lexend = getattr(tok, 'lexend', None)
+    return lexend - tok.lexpos if lexend is not None else len(str(tok.value))
+
+class TokenBuffer:
+    """Tokens of one source, lexed once and replayable.
+
+    The parser pulls tokens through token(), the same buffer can then be
+    reused for diagnostics, editor highlighting or cache keys.
+    """
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def __iter__(self):
+        return iter(self.tokens)
+
+    def token(self):
+        if self.position >= len(self.tokens):
+            return None
+        tok = self.tokens[self.position]
+        self.position += 1
+        return tok
+
+    def rewind(self):
+        self.position = 0
+
+    def highlight_tokens(self):
+        """Token kinds and positions for syntax highlighting in the editor"""
+        return [{'type': tok.type, 'line': tok.lineno, 'pos': tok.lexpos,
+                 'length': token_length(tok)} for tok in self.tokens]
+
+def tokenize(source, lexer=None, lineno=1, fast=False):
+    """Lex source into a TokenBuffer, with the FastLexer when fast is set"""
+    if lexer is None:
+        lexer = FastLexer() if fast else get_lexer().clone()
+    lexer.lineno = lineno
+    lexer.input(source)
+    return TokenBuffer(list(lexer))
+
+def __getattr__(name):
+    # Keep "mylexer.lexer" working without building the lexer at import time
+    if name == 'lexer':
+        return get_lexer()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -1,6 +1,23 @@
+import copy
+import os
+import sys
+import threading
+
+import ply.lex as lex
 import ply.yacc as yacc
+import mylexer
+import myprofile
 from mylexer import tokens
-import json
+from myast import (
+    Address, ArgParam, Assignment, ClassDeclaration, ClassPointerDeclaration, Comparison,
+    Constructor, Declaration, Declarator, DeleteStatement, Destructor, FunctionCall,
+    FunctionDeclaration, IfStatement, MainFunction, MemberAccess, MemberAssignment, MemberFunction,
+    MemberVariable, MethodCall, NewArray, Node, NullPtr, ObjectDeclaration, Parameter,
+    ParameterizedConstructor, PointsTo, Variable, WhileStatement,
+)
+from myemitter import write_result
+from myresolver import ScopeResolver
+from mysymbols import SymbolTable
 
 # Define operator precedence and associativity
 precedence = (
@@ -8,72 +25,25 @@ precedence = (
     ('left', 'DOT', 'ARROW'),  # Member access operators
 )
 
-scope_stack = []
-functions_dict = {}
-classes_dict = {}  # Store class information including constructors
-current_id = 100000
-
-def get_next_id(size=1):
-    global current_id
-    if size == 1:
-        id_value = current_id
-        current_id += 1
-        return id_value
+start = 'program'
+
+# Top-level statements get their own list so that a stray '}' there is
+# skipped by error recovery instead of ending a block that is not open
+def p_program(p):
+    '''program : program stmt
+               | empty'''
+    if len(p) == 2:
+        p[0] = []
     else:
-        # For arrays, return a range of IDs
-        start_id = current_id
-        current_id += size
-        return list(range(start_id, current_id))
-
-def get_current_scope():
-    return scope_stack[-1] if scope_stack else 'global'
-
-def set_scope(scope_name):
-    scope_stack.append(scope_name)
-
-def pop_scope():
-    if scope_stack:
-        scope_stack.pop()
-
-def set_scope_for_value(value, scope):
-    """Recursively set scope for variables in value expressions"""
-    if isinstance(value, dict):
-        if value.get('type') == 'variable':
-            value['scope'] = scope
-        elif value.get('type') == 'member_access':
-            # Set scope for the object part if it's a variable
-            if isinstance(value.get('object'), dict) and value['object'].get('type') == 'variable':
-                value['object']['scope'] = scope
-        elif value.get('type') == 'comparison':
-            # Set scope for both sides of the comparison
-            set_scope_for_value(value.get('left'), scope)
-            set_scope_for_value(value.get('right'), scope)
-        elif value.get('type') == 'method_call':
-            # Set scope for the object and arguments in method calls
-            if isinstance(value.get('object'), dict):
-                set_scope_for_value(value['object'], scope)
-            if value.get('args'):
-                for arg in value['args']:
-                    if isinstance(arg, dict):
-                        set_scope_for_value(arg, scope)
-        elif value.get('type') == 'function_call':
-            # Set scope for arguments in function calls
-            if value.get('arg_param_map'):
-                for arg_param in value['arg_param_map']:
-                    if isinstance(arg_param.get('arg_value'), dict):
-                        set_scope_for_value(arg_param['arg_value'], scope)
-        elif value.get('type') == 'array_access':
-            # Set scope for array variable and index
-            if isinstance(value.get('array'), dict):
-                set_scope_for_value(value['array'], scope)
-            if isinstance(value.get('index'), dict):
-                set_scope_for_value(value['index'], scope)
-
-    elif isinstance(value, list):
-        # Handle lists of values (like argument lists)
-        for item in value:
-            if isinstance(item, dict):
-                set_scope_for_value(item, scope)
+        if p[2] is not None:
+            p[1].append(p[2])
+        p[0] = p[1]
+
+def p_program_error(p):
+    '''program : program error'''
+    # Tokens up to the next statement were dropped, the error itself is
+    # reported by ParseSession.syntax_error
+    p[0] = p[1]
 
 def p_stmt_list(p):
     '''stmt_list : stmt_list stmt 
@@ -82,463 +52,170 @@ def p_stmt_list(p):
     if len(p) == 2:
         p[0] = [p[1]] if p[1] is not None else []
     else:
-        p[0] = p[1] + [p[2]]
+        # Append in place, rebuilding the list would be quadratic in its length
+        if p[2] is not None:
+            p[1].append(p[2])
+        p[0] = p[1]
+
+def p_stmt_list_error(p):
+    '''stmt_list : stmt_list error'''
+    # Resynchronizes on the next statement or the '}' closing the block
+    p[0] = p[1]
 
 def p_empty(p):
     '''empty :'''
     p[0] = None
 
-def p_stmt(p):
-    '''stmt : TYPE var_list SEMICOLON 
-            | TYPE IDENTIFIER LPAREN param_list RPAREN LBRACE stmt_list RBRACE
-            | TYPE MAIN LPAREN RPAREN LBRACE stmt_list RBRACE
-            | IDENTIFIER POINTER IDENTIFIER SEMICOLON
-            | IDENTIFIER LPAREN arg_list RPAREN SEMICOLON
-            | IDENTIFIER EQUALS value SEMICOLON
-            | value DOT IDENTIFIER EQUALS value SEMICOLON
-            | value ARROW IDENTIFIER EQUALS value SEMICOLON
-            | value DOT IDENTIFIER LPAREN RPAREN SEMICOLON
-            | value ARROW IDENTIFIER LPAREN RPAREN SEMICOLON
-            | value DOT IDENTIFIER LPAREN arg_list RPAREN SEMICOLON
-            | value ARROW IDENTIFIER LPAREN arg_list RPAREN SEMICOLON
-            | CLASS IDENTIFIER LBRACE class_members RBRACE SEMICOLON
-            | IDENTIFIER IDENTIFIER SEMICOLON
-            | IDENTIFIER IDENTIFIER LPAREN arg_list RPAREN SEMICOLON
-            | IDENTIFIER POINTER IDENTIFIER EQUALS NEW IDENTIFIER SEMICOLON
-            | IDENTIFIER POINTER IDENTIFIER EQUALS NEW IDENTIFIER LBRACE arg_list RBRACE SEMICOLON
-            | DELETE value SEMICOLON
-            | if_stmt
+# Every statement form has its own action, so PLY calls the right one
+# directly instead of p_stmt telling the forms apart by length and tokens
+
+def p_stmt_declaration(p):
+    '''stmt : TYPE var_list SEMICOLON'''
+    for decl in p[2]:
+        decl.line = p.lineno(1)
+    p[0] = Declaration(p[1], p[2])
+
+def p_stmt_function(p):
+    '''stmt : TYPE IDENTIFIER LPAREN param_list RPAREN LBRACE stmt_list RBRACE'''
+    func_name = p[2]
+    p[0] = FunctionDeclaration(p.lineno(2), func_name, p[1], p[4], p[7])
+    p.parser.session.functions_dict[func_name] = p[0]
+
+def p_stmt_main(p):
+    '''stmt : TYPE MAIN LPAREN RPAREN LBRACE stmt_list RBRACE'''
+    p[0] = MainFunction(p.lineno(2), p[1], p[6])
+
+def p_stmt_class_pointer(p):
+    '''stmt : IDENTIFIER POINTER IDENTIFIER SEMICOLON'''
+    p[0] = ClassPointerDeclaration(p.lineno(1), p[1], p[3])
+    p[0].pointer_category = 'class_object'
+
+def p_stmt_function_call(p):
+    '''stmt : IDENTIFIER LPAREN arg_list RPAREN SEMICOLON'''
+    session = p.parser.session
+    func_name = p[1]
+    arg_param_map = session.create_function_arg_param_map(func_name, p[3])
+
+    # Calls refer to the callee by name, its body lives in the
+    # function table (see inline_function_calls for the old shape)
+    p[0] = FunctionCall(p.lineno(1), func_name, arg_param_map,
+                        func_name if func_name in session.functions_dict else None)
+
+def p_stmt_assignment(p):
+    '''stmt : IDENTIFIER EQUALS value SEMICOLON'''
+    p[0] = Assignment(p.lineno(1), p[1], p[3])
+
+def p_stmt_member_assignment(p):
+    '''stmt : value DOT IDENTIFIER EQUALS value SEMICOLON
+            | value ARROW IDENTIFIER EQUALS value SEMICOLON'''
+    # Extract object name from the variable structure
+    object_name = p[1]['name'] if isinstance(p[1], Node) and 'name' in p[1] else p[1]
+    operator = 'dot' if p[2] == '.' else 'arrow'
+    p[0] = MemberAssignment(p.lineno(2), object_name, p[3], operator, p[5])
+
+def p_stmt_method_call(p):
+    '''stmt : value DOT IDENTIFIER LPAREN RPAREN SEMICOLON
+            | value ARROW IDENTIFIER LPAREN RPAREN SEMICOLON'''
+    operator = 'dot' if p[2] == '.' else 'arrow'
+    p[0] = MethodCall(p.lineno(2), p[1], p[3], operator, [])
+
+def p_stmt_method_call_args(p):
+    '''stmt : value DOT IDENTIFIER LPAREN arg_list RPAREN SEMICOLON
+            | value ARROW IDENTIFIER LPAREN arg_list RPAREN SEMICOLON'''
+    # arg_param_map depends on the receiver's declared type, the
+    # resolver fills it in once scopes are known
+    operator = 'dot' if p[2] == '.' else 'arrow'
+    p[0] = MethodCall(p.lineno(2), p[1], p[3], operator, p[5] if p[5] else [])
+    p[0].arg_param_map = None
+
+def p_stmt_class(p):
+    '''stmt : CLASS IDENTIFIER LBRACE class_members RBRACE SEMICOLON'''
+    session = p.parser.session
+    class_name = p[2]
+    for member in p[4]:
+        if member.type == 'member_function':
+            member.belongs_to_class = class_name
+    p[0] = ClassDeclaration(p.lineno(2), class_name, p[4])
+
+    # Store class information in session.classes_dict
+    constructors = []
+    destructors = []
+    for member in p[4]:
+        if member.type in ['constructor', 'parameterized constructor']:
+            constructors.append(member)
+        elif member.type == 'destructor':
+            destructors.append(member)
+
+    session.classes_dict[class_name] = {
+        'name': class_name,
+        'members': p[4],
+        'constructors': constructors,
+        'destructors': destructors,
+        'line': p.lineno(2)
+    }
+    session.index_class(class_name, p[4])
+
+def p_stmt_object(p):
+    '''stmt : IDENTIFIER IDENTIFIER SEMICOLON'''
+    p[0] = ObjectDeclaration(p.lineno(1), 'default_constructor_call', p[1])
+    p[0].name = p[2]
+
+def p_stmt_object_args(p):
+    '''stmt : IDENTIFIER IDENTIFIER LPAREN arg_list RPAREN SEMICOLON'''
+    class_name = p[1]
+    arg_param_map = p.parser.session.create_constructor_arg_param_map(class_name, p[4], allow_aggregate=False)
+
+    p[0] = ObjectDeclaration(p.lineno(1), 'parameterized_constructor_call', class_name)
+    p[0].object_name = p[2]
+    p[0].arg_param_map = arg_param_map
+
+def p_stmt_new_object(p):
+    '''stmt : IDENTIFIER POINTER IDENTIFIER EQUALS NEW IDENTIFIER SEMICOLON'''
+    p[0] = ClassPointerDeclaration(p.lineno(1), p[1], p[3])
+    p[0].allocation = 'new'
+    p[0].allocated_type = p[6]
+    p[0].constructor_type = 'default_constructor_call'
+
+def p_stmt_new_object_args(p):
+    '''stmt : IDENTIFIER POINTER IDENTIFIER EQUALS NEW IDENTIFIER LBRACE arg_list RBRACE SEMICOLON'''
+    # Create arg_param_map for parameterized constructor
+    arg_param_map = p.parser.session.create_constructor_arg_param_map(p[6], p[8])
+
+    p[0] = ClassPointerDeclaration(p.lineno(1), p[1], p[3])
+    p[0].allocation = 'new'
+    p[0].allocated_type = p[6]
+    p[0].constructor_type = 'parameterized_constructor_call'
+    p[0].constructor_args = p[8]
+    p[0].arg_param_map = arg_param_map
+
+def p_stmt_delete(p):
+    '''stmt : DELETE value SEMICOLON'''
+    p[0] = DeleteStatement(p.lineno(1), p[2])
+
+def p_stmt_block(p):
+    '''stmt : if_stmt
             | while_stmt'''
-    
-    if len(p) == 7 and p[1] == 'class':  # Class declaration
-        class_name = p[2]
-        class_scope = f'class:{class_name}'
-        set_scope(class_scope)
-        for member in p[4]:
-            if member.get('type') == 'member_variable':
-                member['scope'] = class_scope
-                member['id'] = get_next_id()
-                data_type = member.get('data_type', '')
-                if data_type not in ['int', 'string', 'char', 'double', 'float', 'void']:
-                    member['data_type'] = f'class:{data_type}'
-            elif member.get('type') == 'member_function':
-                member['belongs_to_class'] = class_name
-                func_scope = f'function:{class_name}.{member["name"]}'
-                set_scope(func_scope)
-                for param in member['params']:
-                    param['scope'] = func_scope
-                    param['id'] = get_next_id()
-                process_statement_scope(member['body'], func_scope)
-                pop_scope()
-        p[0] = {
-            'type': 'class_declaration',
-            'line': p.lineno(2),
-            'scope': 'global',
-            'name': class_name,
-            'members': p[4]
-        }
-        
-        # Store class information in classes_dict
-        constructors = []
-        destructors = []
-        for member in p[4]:
-            if member.get('type') in ['constructor', 'parameterized constructor']:
-                constructors.append(member)
-            elif member.get('type') == 'destructor':
-                destructors.append(member)
-        
-        classes_dict[class_name] = {
-            'name': class_name,
-            'members': p[4],
-            'constructors': constructors,
-            'destructors': destructors,
-            'line': p.lineno(2)
-        }
-        
-        pop_scope()
-    elif len(p) == 4 and p[1] == 'delete':  # DELETE value SEMICOLON
-        current_scope = get_current_scope()
-        p[0] = {
-            'type': 'delete_statement',
-            'line': p.lineno(1),
-            'scope': current_scope,
-            'target': p[2]
-        }
-        # Set scope for the target if it's a variable
-        if isinstance(p[2], dict) and p[2].get('type') == 'variable':
-            p[2]['scope'] = current_scope
-    elif len(p) == 4:  # TYPE var_list SEMICOLON or Object declaration
-        if p[1] in ['int', 'string', 'char', 'double', 'float']:  # Regular variable declaration
-            for decl in p[2]:
-                current_scope = get_current_scope()
-                decl['scope'] = current_scope
-                decl['line'] = p.lineno(1)
-                if 'dimensions' in decl:
-                    size = 1
-                    for dim in decl['dimensions']:
-                        size *= int(dim)
-                    decl['id'] = get_next_id(size)
-                else:
-                    decl['id'] = get_next_id()
-                # Set scope for the declaration's value (e.g., new_array)
-                if decl.get('value'):
-                    set_scope_for_value(decl['value'], current_scope)
-            p[0] = {'type': 'declaration', 'data_type': p[1], 'declarations': p[2]}
-        else:  # Object declaration (IDENTIFIER IDENTIFIER)
-            current_scope = get_current_scope()
-            p[0] = {
-                'type': 'object_declaration',
-                'line': p.lineno(1),
-                'scope': current_scope,
-                'id': get_next_id(),
-                'constructor_type': 'default_constructor_call',
-                'class_type': p[1],
-                'name': p[2]
-            }
-    
-    elif len(p) == 9:  # function with body
-        func_name = p[2]
-        The_Function_ID = get_next_id()
-        func_scope = f'function:{func_name}'
-        set_scope(func_scope)
-        for param in p[4]:
-            param['scope'] = func_scope
-            param['id'] = get_next_id()
-        process_statement_scope(p[7], func_scope)
-        p[0] = {
-            'type': 'function declaration',
-            'line': p.lineno(2),
-            'scope': 'global',
-            'id': The_Function_ID,
-            'name': func_name,
-            'return_type': p[1],
-            'params': p[4],
-            'body': p[7]
-        }
-        functions_dict[func_name] = p[0]
-        pop_scope()
-
-    elif len(p) == 8 and p[2] == 'main':  # main function specifically
-        set_scope('function:main')
-        process_statement_scope(p[6], 'function:main')
-        p[0] = {
-            'type': 'the standard Main_Function ',
-            'line': p.lineno(2),
-            'scope': 'global',
-            'name': 'main',
-            'return_type': p[1],
-            'body': p[6]
-        }
-        pop_scope()
-    elif len(p) == 2 and hasattr(p[1], 'get') and p[1].get('type') == 'if_statement':  # if statement from if_stmt rule
-        p[0] = p[1]  # Just pass through the if statement
-    elif len(p) == 2 and hasattr(p[1], 'get') and p[1].get('type') == 'while_statement':  # while statement from while_stmt rule
-        p[0] = p[1]  # Just pass through the while statement
-    elif len(p) == 7 and p[3] == '(' and p[5] == ')':  # Parameterized constructor call: IDENTIFIER IDENTIFIER LPAREN arg_list RPAREN SEMICOLON
-        current_scope = get_current_scope()
-        class_name = p[1]
-        
-        # Find the parameterized constructor for this class
-        constructor_params = []
-        arg_param_map = []
-        
-        if class_name in classes_dict:
-            class_info = classes_dict[class_name]
-            for constructor in class_info['constructors']:
-                if constructor.get('type') == 'parameterized constructor':
-                    constructor_params = constructor.get('params', [])
-                    break
-        
-        # Create arg_param_map if we have matching constructor
-        if len(constructor_params) == len(p[4]):
-            arg_param_map = [{'param_name': constructor_params[i]['name'], 'arg_value': p[4][i]} for i in range(len(constructor_params))]
-        
-        p[0] = {
-            'type': 'object_declaration',
-            'line': p.lineno(1),
-            'scope': current_scope,
-            'id': get_next_id(),
-            'constructor_type': 'parameterized_constructor_call',
-            'class_type': class_name,
-            'object_name': p[2],
-            'arg_param_map': arg_param_map
-        }
-    elif len(p) == 6 and (p[2] == '.' or p[2] == '->') and p[4] == '(' and p[5] == ')':  # Method call with no args: obj.method(); or ptr->method1();
-        current_scope = get_current_scope()
-        
-        # Set scope for the object if it's a variable
-        if isinstance(p[1], dict):
-            set_scope_for_value(p[1], current_scope)
-        
-        if p[2] == '.':  # Dot operator
-            p[0] = {
-                'type': 'method_call',
-                'line': p.lineno(2),
-                'scope': current_scope,
-                'object': p[1],
-                'method': p[3],
-                'operator': 'dot',
-                'args': []
-            }
-        elif p[2] == '->':  # Arrow operator
-            p[0] = {
-                'type': 'method_call',
-                'line': p.lineno(2),
-                'scope': current_scope,
-                'object': p[1],
-                'method': p[3],
-                'operator': 'arrow',
-                'pointer_access': True,
-                'args': []
-            }
-    elif len(p) == 6:  # function call or parameterized constructor call
-        # Check if it's a parameterized constructor call (IDENTIFIER IDENTIFIER LPAREN arg_list RPAREN SEMICOLON)
-        if p[3] == '(' and p[5] == ')':  # This means p[2] is an identifier (object name)
-            current_scope = get_current_scope()
-            class_name = p[1]
-            
-            # Find the parameterized constructor for this class
-            constructor_params = []
-            arg_param_map = []
-            
-            if class_name in classes_dict:
-                class_info = classes_dict[class_name]
-                for constructor in class_info['constructors']:
-                    if constructor.get('type') == 'parameterized constructor':
-                        constructor_params = constructor.get('params', [])
-                        break
-            
-            # Create arg_param_map if we have matching constructor
-            if len(constructor_params) == len(p[4]):
-                arg_param_map = [{'param_name': constructor_params[i]['name'], 'arg_value': p[4][i]} for i in range(len(constructor_params))]
-            
-            p[0] = {
-                'type': 'object_declaration',
-                'line': p.lineno(1),
-                'scope': current_scope,
-                'id': get_next_id(),
-                'constructor_type': 'parameterized_constructor_call',
-                'class_type': class_name,
-                'object_name': p[2],
-                'arg_param_map': arg_param_map
-            }
-        # Otherwise it's a function call (IDENTIFIER LPAREN arg_list RPAREN SEMICOLON)
-        else:
-            func_name = p[1]
-            function_data = functions_dict.get(func_name, {})
-            function_params = function_data.get('params', [])
-            arg_param_map = []
-            if len(function_params) == len(p[3]):
-                arg_param_map = [{'param_name': function_params[i]['name'], 'arg_value': p[3][i]} for i in range(len(function_params))]
-            current_scope = get_current_scope()
-            function_body = function_data.get('body', None)
-            
-            p[0] = {
-                'type': 'function_call',
-                'line': p.lineno(1),
-                'scope': current_scope,
-                'name': func_name,
-                'arg_param_map': arg_param_map,
-                'body': function_body
-            }
-    elif len(p) == 5:  # IDENTIFIER POINTER IDENTIFIER SEMICOLON (Class pointer declaration) or assignment
-        if p[2] == '*' and p[4] == ';':  # Class pointer declaration (IDENTIFIER POINTER IDENTIFIER SEMICOLON)
-            current_scope = get_current_scope()
-            p[0] = {
-                'type': 'class_pointer_declaration',
-                'line': p.lineno(1),
-                'scope': current_scope,
-                'id': get_next_id(),
-                'class_type': p[1],
-                'name': p[3],
-                'pointer_category': 'class_object'
-            }
-        else:  # assignment (IDENTIFIER EQUALS value SEMICOLON)
-            current_scope = get_current_scope()
-            p[0] = {
-                'type': 'assignment',
-                'line': p.lineno(1),
-                'scope': current_scope,
-                'name': p[1],
-                'value': p[3]
-            }
-            # Set scope for the assignment's value (e.g., new_array)
-            if isinstance(p[3], dict):
-                set_scope_for_value(p[3], current_scope)
-    elif len(p) == 8 and (p[2] == '.' or p[2] == '->') and p[4] == '(' and p[6] == ')':  # Method call with args: obj.method(args); or ptr->method(args);
-        current_scope = get_current_scope()
-        
-        # Set scope for the object if it's a variable
-        if isinstance(p[1], dict):
-            set_scope_for_value(p[1], current_scope)
-        
+    p[0] = p[1]
 
-        
-        # Set scope for arguments
-        if p[5]:  # arg_list
-            for arg in p[5]:
-                if isinstance(arg, dict):
-                    set_scope_for_value(arg, current_scope)
-        
-        # Create arg_param_map for method calls
-        method_name = p[3]
-        args = p[5] if p[5] else []
-        arg_param_map = create_method_arg_param_map(method_name, args)
-        
-        if p[2] == '.':  # Dot operator
-            p[0] = {
-                'type': 'method_call',
-                'line': p.lineno(2),
-                'scope': current_scope,
-                'object': p[1],
-                'method': method_name,
-                'operator': 'dot',
-                'args': args,
-                'arg_param_map': arg_param_map
-            }
-        elif p[2] == '->':  # Arrow operator
-            p[0] = {
-                'type': 'method_call',
-                'line': p.lineno(2),
-                'scope': current_scope,
-                'object': p[1],
-                'method': method_name,
-                'operator': 'arrow',
-                'pointer_access': True,
-                'args': args,
-                'arg_param_map': arg_param_map
-            }
-    elif len(p) == 7 and (p[2] == '.' or p[2] == '->') and p[4] == '(' and p[5] == ')':  # Method call with no args: obj.method(); or ptr->method1(); (when obj is parsed as value)
-        current_scope = get_current_scope()
-        
-        # Set scope for the object if it's a variable
-        if isinstance(p[1], dict):
-            set_scope_for_value(p[1], current_scope)
-        
-        if p[2] == '.':  # Dot operator
-            p[0] = {
-                'type': 'method_call',
-                'line': p.lineno(2),
-                'scope': current_scope,
-                'object': p[1],
-                'method': p[3],
-                'operator': 'dot',
-                'args': []
-            }
-        elif p[2] == '->':  # Arrow operator
-            p[0] = {
-                'type': 'method_call',
-                'line': p.lineno(2),
-                'scope': current_scope,
-                'object': p[1],
-                'method': p[3],
-                'operator': 'arrow',
-                'pointer_access': True,
-                'args': []
-            }
-    elif len(p) == 8 and p[2] == '*' and p[4] == '=' and p[5] == 'new':  # IDENTIFIER POINTER IDENTIFIER EQUALS NEW IDENTIFIER SEMICOLON
-        current_scope = get_current_scope()
-        p[0] = {
-            'type': 'class_pointer_declaration',
-            'line': p.lineno(1),
-            'scope': current_scope,
-            'id': get_next_id(),
-            'class_type': p[1],
-            'name': p[3],
-            'allocation': 'new',
-            'allocated_type': p[6],
-            'constructor_type': 'default_constructor_call'
-        }
-    elif len(p) == 11 and p[2] == '*' and p[4] == '=' and p[5] == 'new' and p[7] == '{':  # IDENTIFIER POINTER IDENTIFIER EQUALS NEW IDENTIFIER LBRACE arg_list RBRACE SEMICOLON
-        current_scope = get_current_scope()
-        # Set scope for constructor arguments
-        for arg in p[8]:
-            if isinstance(arg, dict):
-                set_scope_for_value(arg, current_scope)
-        
-        # Create arg_param_map for parameterized constructor
-        class_name = p[6]
-        constructor_args = p[8]
-        arg_param_map = create_constructor_arg_param_map(class_name, constructor_args)
-        
-        p[0] = {
-            'type': 'class_pointer_declaration',
-            'line': p.lineno(1),
-            'scope': current_scope,
-            'id': get_next_id(),
-            'class_type': p[1],
-            'name': p[3],
-            'allocation': 'new',
-            'allocated_type': p[6],
-            'constructor_type': 'parameterized_constructor_call',
-            'constructor_args': p[8],
-            'arg_param_map': arg_param_map
-                    }
-    elif len(p) == 7 and p[4] != '(':  # member access assignment (obj.member = value or ptr->member = value) - but NOT method calls!
-        current_scope = get_current_scope()
-        # Extract object name from the variable structure
-        object_name = p[1]['name'] if isinstance(p[1], dict) and 'name' in p[1] else p[1]
-        
-        if p[2] == '.':  # Dot operator
-            p[0] = {
-                'type': 'member_assignment',
-                'line': p.lineno(2),
-                'scope': current_scope,
-                'object': object_name,
-                'member': p[3],
-                'operator': 'dot',
-                'value': p[5]
-            }
-        elif p[2] == '->':  # Arrow operator
-            p[0] = {
-                'type': 'member_assignment',
-                'line': p.lineno(2),
-                'scope': current_scope,
-                'object': object_name,
-                'member': p[3],
-                'operator': 'arrow',
-                'pointer_access': True,
-                'value': p[5]
-            }
-    elif len(p) == 8 and (p[2] == '.' or p[2] == '->') and p[4] == '(' and p[6] == ')':  # Method call with args via dot/arrow: obj.method(args) or ptr->method(args)
-        current_scope = get_current_scope()
-        # Extract object from the value structure
-        object_ref = p[1]
-        method_name = p[3]
-        args = p[5]
-        
-        # Create arg_param_map for method calls
-        arg_param_map = create_method_arg_param_map(method_name, args)
-        
-        if p[2] == '.':  # Dot operator method call with args
-            p[0] = {
-                'type': 'method_call',
-                'line': p.lineno(2),
-                'scope': current_scope,
-                'object': object_ref,
-                'method': method_name,
-                'operator': 'dot',
-                'args': args,
-                'arg_param_map': arg_param_map
-            }
-        elif p[2] == '->':  # Arrow operator method call with args
-            p[0] = {
-                'type': 'method_call',
-                'line': p.lineno(2),
-                'scope': current_scope,
-                'object': object_ref,
-                'method': method_name,
-                'operator': 'arrow',
-                'pointer_access': True,
-                'args': args,
-                'arg_param_map': arg_param_map
-            }
+def p_stmt_empty(p):
+    '''stmt : SEMICOLON'''
+    p[0] = None
+
+def p_stmt_block_error(p):
+    '''stmt : LBRACE error RBRACE'''
+    # A stray block is skipped as a whole, its '}' must not close the
+    # enclosing function
+    p[0] = None
 
 
 def p_var_list(p):
     '''var_list : declarator
                 | var_list COMMA declarator'''
-    p[0] = [p[1]] if len(p) == 2 else p[1] + [p[3]]
+    if len(p) == 2:
+        p[0] = [p[1]]
+    else:
+        p[1].append(p[3])
+        p[0] = p[1]
 
 def p_declarator(p):
     '''declarator : IDENTIFIER
@@ -553,78 +230,80 @@ def p_declarator(p):
                   | IDENTIFIER LBRACKET NUMBER RBRACKET EQUALS LBRACE array_values RBRACE
                   | IDENTIFIER LBRACKET NUMBER RBRACKET LBRACKET NUMBER RBRACKET
                   | IDENTIFIER LBRACKET NUMBER RBRACKET LBRACKET NUMBER RBRACKET EQUALS LBRACE array_values_2d RBRACE'''
-    decl = {}
+    session = p.parser.session
     if len(p) == 2: # int p
-        decl['name'] = p[1]
+        decl = Declarator(p[1])
     elif len(p) == 3: # int *p
-        decl['name'] = p[2]
-        decl['pointer'] = 'pointer declaration'
+        decl = Declarator(p[2])
+        decl.pointer = 'pointer declaration'
     elif len(p) == 4:#value assigment 
-        decl['name'] = p[1]
-        decl['value'] = p[3]
-    elif len(p) == 5 and p[4].get('type') == 'address':# int p = address of value
-        decl['name'] = p[2]
-        decl['pointer'] = 'pointer declaration'
-        decl['points_to'] = {'name': p[4]['name']}
+        decl = Declarator(p[1])
+        decl.value = p[3]
+    elif len(p) == 5 and isinstance(p[4], Address):# int p = address of value
+        decl = Declarator(p[2])
+        decl.pointer = 'pointer declaration'
+        decl.points_to = PointsTo(p[4].name)
     elif len(p) == 6 and p[4] == 'new': #simple new (both TYPE and IDENTIFIER)
-        decl['name'] = p[2]
-        decl['allocation'] = 'new'
-        decl['allocated_type'] = p[5]
+        decl = Declarator(p[2])
+        decl.allocation = 'new'
+        decl.allocated_type = p[5]
         # Check if it's a class type (IDENTIFIER) or primitive type (TYPE)
         if isinstance(p[5], str) and p[5] not in ['int', 'string', 'char', 'double', 'float', 'void']:
-            decl['pointer'] = 'class pointer declaration'
-            decl['constructor_type'] = 'default_constructor_call'
+            decl.pointer = 'class pointer declaration'
+            decl.constructor_type = 'default_constructor_call'
         else:
-            decl['pointer'] = 'a pointer declaration'
+            decl.pointer = 'a pointer declaration'
     elif len(p) == 9 and p[4] == 'new' and p[6] == '{':  # new ClassName{args} (like: new Node{value, nullptr})
-        decl['name'] = p[2]
-        decl['pointer'] = 'class pointer declaration'
-        decl['allocation'] = 'new'
-        decl['allocated_type'] = p[5]
-        decl['constructor_type'] = 'parameterized_constructor_call'
-        decl['constructor_args'] = p[7]
-        
-        # Set scope for constructor arguments
-        current_scope = get_current_scope()
-        for arg in p[7]:
-            if isinstance(arg, dict):
-                set_scope_for_value(arg, current_scope)
-        
+        decl = Declarator(p[2])
+        decl.pointer = 'class pointer declaration'
+        decl.allocation = 'new'
+        decl.allocated_type = p[5]
+        decl.constructor_type = 'parameterized_constructor_call'
+        decl.constructor_args = p[7]
+
         # Create arg_param_map for parameterized constructor
         class_name = p[5]
         constructor_args = p[7]
-        arg_param_map = create_constructor_arg_param_map(class_name, constructor_args)
-        decl['arg_param_map'] = arg_param_map
+        arg_param_map = session.create_constructor_arg_param_map(class_name, constructor_args)
+        decl.arg_param_map = arg_param_map
     elif len(p) == 9 and p[4] == 'new' and p[6] == '[':# array new
-        decl['name'] = p[2]
-        decl['pointer'] = 'array pointer declaration'
-        decl['allocation'] = 'new'
-        decl['array_size'] = p[7]
-    elif len(p) == 5 and not isinstance(p[4], dict):# 1 dim array
-        decl['name'] = p[1]
-        decl['dimensions'] = [p[3]]
+        decl = Declarator(p[2])
+        decl.pointer = 'array pointer declaration'
+        decl.allocation = 'new'
+        decl.array_size = p[7]
+    elif len(p) == 5 and not isinstance(p[4], Node):# 1 dim array
+        decl = Declarator(p[1])
+        decl.dimensions = [p[3]]
     elif len(p) == 9:# declared 1d array with dim and value
-        decl['name'] = p[1]
-        decl['dimensions'] = [p[3]]
-        decl['values'] = p[7]
+        decl = Declarator(p[1])
+        decl.dimensions = [p[3]]
+        decl.values_ = p[7]
     elif len(p) == 8:# 2 dim array
-        decl['name'] = p[1]
-        decl['dimensions'] = [p[3], p[6]]
+        decl = Declarator(p[1])
+        decl.dimensions = [p[3], p[6]]
     elif len(p) == 12:# declared 2d array with dim and value
-        decl['name'] = p[1]
-        decl['dimensions'] = [p[3], p[6]]
-        decl['values'] = p[10]
+        decl = Declarator(p[1])
+        decl.dimensions = [p[3], p[6]]
+        decl.values_ = p[10]
     p[0] = decl
 
 def p_array_values(p):
     '''array_values : value
                     | array_values COMMA value'''
-    p[0] = [p[1]] if len(p) == 2 else p[1] + [p[3]]
+    if len(p) == 2:
+        p[0] = [p[1]]
+    else:
+        p[1].append(p[3])
+        p[0] = p[1]
 
 def p_array_values_2d(p):
     '''array_values_2d : LBRACE array_values RBRACE
                        | array_values_2d COMMA LBRACE array_values RBRACE'''
-    p[0] = [p[2]] if len(p) == 4 else p[1] + [p[4]]
+    if len(p) == 4:
+        p[0] = [p[2]]
+    else:
+        p[1].append(p[4])
+        p[0] = p[1]
 
 def p_param_list(p):
     '''param_list : empty
@@ -633,11 +312,12 @@ def p_param_list(p):
     if len(p) == 2:
         p[0] = [] if p[1] is None else [p[1]]
     else:
-        p[0] = p[1] + [p[3]]
+        p[1].append(p[3])
+        p[0] = p[1]
 
 def p_param(p):
     '''param : TYPE IDENTIFIER'''
-    p[0] = {'type': 'parameter', 'data_type': p[1], 'name': p[2]}
+    p[0] = Parameter(p[1], p[2])
 
 def p_arg_list(p):
     '''arg_list : empty
@@ -646,7 +326,8 @@ def p_arg_list(p):
     if len(p) == 2:
         p[0] = [] if p[1] is None else [p[1]]
     else:
-        p[0] = p[1] + [p[3]]
+        p[1].append(p[3])
+        p[0] = p[1]
 
 def p_value(p):
     '''value : NUMBER
@@ -660,48 +341,22 @@ def p_value(p):
              | NEW IDENTIFIER LBRACKET NUMBER RBRACKET'''
     if len(p) == 2:  # Simple values
         if p.slice[1].type == 'IDENTIFIER':
-            current_scope = get_current_scope()
-            p[0] = {
-                'type': 'variable',
-                'name': p[1],
-                'scope': current_scope
-            }
+            p[0] = Variable(p[1])
         elif p.slice[1].type == 'NULLPTR':
-            p[0] = {
-                'type': 'nullptr',
-                'value': 'nullptr'
-            }
+            p[0] = NullPtr()
         else:
             p[0] = p[1]
     elif len(p) == 4:  # Member access
 
         
-        if p[2] == '.':  # Dot operator
-            p[0] = {
-                'type': 'member_access',
-                'object': p[1],
-                'member': p[3],
-                'operator': 'dot'
-            }
-        elif p[2] == '->':  # Arrow operator
-            p[0] = {
-                'type': 'member_access',
-                'object': p[1],
-                'member': p[3],
-                'operator': 'arrow',
-                'pointer_access': True
-            }
+        p[0] = MemberAccess(p[1], p[3], 'dot' if p[2] == '.' else 'arrow')
     elif len(p) == 6:  # new array allocation: NEW TYPE/IDENTIFIER LBRACKET NUMBER RBRACKET
         if p[1] == 'new':
-            p[0] = {
-                'type': 'new_array',
-                'data_type': p[2],
-                'size': p[4]
-            }
+            p[0] = NewArray(p[2], p[4])
 
 def p_address_of_value(p):
     '''address_of_value : ADDRESS IDENTIFIER'''
-    p[0] = {'type': 'address', 'name': p[2]}
+    p[0] = Address(p[2])
 
 def p_class_members(p):
     '''class_members : class_member
@@ -710,7 +365,13 @@ def p_class_members(p):
     if len(p) == 2:
         p[0] = [p[1]] if p[1] is not None else []
     else:
-        p[0] = p[1] + [p[2]]
+        p[1].append(p[2])
+        p[0] = p[1]
+
+def p_class_members_error(p):
+    '''class_members : class_members error'''
+    # Resynchronizes on the next member or the '}' closing the class
+    p[0] = p[1]
 
 def p_class_member(p):
     '''class_member : TYPE IDENTIFIER SEMICOLON
@@ -726,227 +387,80 @@ def p_class_member(p):
                    | parameterized_constructor
                    | destructor'''
     if len(p) == 4:  # Member variable without default value
-        p[0] = {
-            'type': 'member_variable',
-            'data_type': p[1],
-            'name': p[2]
-        }
+        p[0] = MemberVariable(p[1], p[2])
     elif len(p) == 5:  # Pointer member without default value
-        p[0] = {
-            'type': 'member_variable',
-            'data_type': p[1],
-            'name': p[3],
-            'pointer': 'pointer declaration'
-        }
+        p[0] = MemberVariable(p[1], p[3])
+        p[0].pointer = 'pointer declaration'
     elif len(p) == 6:  # Member variable with default value
-        p[0] = {
-            'type': 'member_variable',
-            'data_type': p[1],
-            'name': p[2],
-            'default_value': p[4]
-        }
+        p[0] = MemberVariable(p[1], p[2])
+        p[0].default_value = p[4]
     elif len(p) == 7:  # Pointer member with default value
-        if isinstance(p[5], dict):
-            if p[5].get('type') == 'address':  # Address assignment (using &)
-                p[0] = {
-                    'type': 'member_variable',
-                    'data_type': p[1],
-                    'name': p[3],
-                    'pointer': 'pointer declaration',
-                    'points_to': {'name': p[5]['name']}
-                }
-            elif p[5].get('type') == 'variable' and p[5].get('name') == 'nullptr':  # nullptr assignment
-                p[0] = {
-                    'type': 'member_variable',
-                    'data_type': p[1],
-                    'name': p[3],
-                    'pointer': 'pointer declaration',
-                    'default_value': {
-                        'type': 'nullptr',
-                        'value': 'nullptr'
-                    }
-                }
+        if isinstance(p[5], Node):
+            p[0] = MemberVariable(p[1], p[3])
+            p[0].pointer = 'pointer declaration'
+            if p[5].type == 'address':  # Address assignment (using &)
+                p[0].points_to = PointsTo(p[5].name)
+            elif p[5].type == 'variable' and p[5].name == 'nullptr':  # nullptr assignment
+                p[0].default_value = NullPtr()
             else:  # Regular value assignment
-                p[0] = {
-                    'type': 'member_variable',
-                    'data_type': p[1],
-                    'name': p[3],
-                    'pointer': 'pointer declaration',
-                    'default_value': p[5]
-                }
+                p[0].default_value = p[5]
     elif len(p) == 5 and p[1] != 'TYPE':  # Self-referential pointer without default value
-        p[0] = {
-            'type': 'member_variable',
-            'data_type': p[1],  # This is the class name
-            'name': p[3],
-            'pointer': 'pointer declaration',
-            'self_referential': True
-        }
+        p[0] = MemberVariable(p[1], p[3])  # data_type is the class name
+        p[0].pointer = 'pointer declaration'
+        p[0].self_referential = True
     elif len(p) == 7 and p[1] != 'TYPE':  # Self-referential pointer with default value
-        if isinstance(p[5], dict):
-            if p[5].get('type') == 'address':  # Address assignment (using &)
-                p[0] = {
-                    'type': 'member_variable',
-                    'data_type': p[1],
-                    'name': p[3],
-                    'pointer': 'pointer declaration',
-                    'self_referential': True,
-                    'points_to': {'name': p[5]['name']}
-                }
-            elif p[5].get('type') == 'variable' and p[5].get('name') == 'nullptr':  # nullptr assignment
-                p[0] = {
-                    'type': 'member_variable',
-                    'data_type': p[1],
-                    'name': p[3],
-                    'pointer': 'pointer declaration',
-                    'self_referential': True,
-                    'default_value': {
-                        'type': 'nullptr',
-                        'value': 'nullptr'
-                    }
-                }
+        if isinstance(p[5], Node):
+            p[0] = MemberVariable(p[1], p[3])
+            p[0].pointer = 'pointer declaration'
+            p[0].self_referential = True
+            if p[5].type == 'address':  # Address assignment (using &)
+                p[0].points_to = PointsTo(p[5].name)
+            elif p[5].type == 'variable' and p[5].name == 'nullptr':  # nullptr assignment
+                p[0].default_value = NullPtr()
             else:  # Regular value assignment
-                p[0] = {
-                    'type': 'member_variable',
-                    'data_type': p[1],
-                    'name': p[3],
-                    'pointer': 'pointer declaration',
-                    'self_referential': True,
-                    'default_value': p[5]
-                }
+                p[0].default_value = p[5]
     elif len(p) == 9:  # Member function
-        p[0] = {
-            'type': 'member_function',
-            'return_type': p[1],
-            'name': p[2],
-            'belongs_to_class': '',  
-            'params': p[4],
-            'body': p[7]
-        }
+        p[0] = MemberFunction(p[1], p[2], p[4], p[7])
     else:  # Constructor (either default or parameterized)
         p[0] = p[1]
 
 def p_default_constructor(p):
     '''default_constructor : IDENTIFIER LPAREN RPAREN LBRACE stmt_list RBRACE'''
-    class_name = p[1]
-    constructor_scope = f'constructor:{class_name}'
-    set_scope(constructor_scope)
-    
-    # Set scope for each statement in the body
-    process_statement_scope(p[5], constructor_scope)
-    
-    p[0] = {
-        'type': 'constructor',
-        'name': class_name,
-        'line': p.lineno(1),
-        'params': [],
-        'body': p[5]
-    }
-    pop_scope()
+    p[0] = Constructor(p[1], p.lineno(1), [], p[5])
 
 def p_parameterized_constructor(p):
     '''parameterized_constructor : IDENTIFIER LPAREN param_list RPAREN LBRACE stmt_list RBRACE'''
-    class_name = p[1]
-    constructor_scope = f'parameterized constructor:{class_name}'
-    set_scope(constructor_scope)
-    
-    # Set scope and ID for parameters
-    for param in p[3]:
-        param['scope'] = constructor_scope
-        param['id'] = get_next_id()
-    
-    # Set scope for each statement in the body
-    process_statement_scope(p[6], constructor_scope)
-    
-    p[0] = {
-        'type': 'parameterized constructor',
-        'name': class_name,
-        'line': p.lineno(1),
-        'params': p[3],
-        'body': p[6]
-    }
-    pop_scope()
+    p[0] = ParameterizedConstructor(p[1], p.lineno(1), p[3], p[6])
 
 def p_destructor(p):
     '''destructor : TILDE IDENTIFIER LPAREN RPAREN LBRACE stmt_list RBRACE'''
-    class_name = p[2]
-    destructor_scope = f'destructor:{class_name}'
-    set_scope(destructor_scope)
-    
-    # Set scope for each statement in the body
-    process_statement_scope(p[6], destructor_scope)
-    
-    p[0] = {
-        'type': 'destructor',
-        'name': class_name,
-        'line': p.lineno(1),
-        'body': p[6]
-    }
-    pop_scope()
+    p[0] = Destructor(p[2], p.lineno(1), p[6])
 
 # If statement - separate function to avoid grammar conflicts
 def p_if_stmt(p):
     '''if_stmt : IF LPAREN condition RPAREN LBRACE stmt_list RBRACE
                | IF LPAREN condition RPAREN LBRACE stmt_list RBRACE ELSE LBRACE stmt_list RBRACE'''
-    current_scope = get_current_scope()
-    if_scope = 'if_body'
-    set_scope(if_scope)
-    
-    # Handle if body
-    if_body_index = 6  # Always at position 6
-    # Handle if body (stmt_list position varies based on if structure)
-    process_statement_scope(p[if_body_index], if_scope)
-    
-    # Set scope for variables in the condition
-    set_scope_for_value(p[3], current_scope)
-    
-    # Handle based on length: 8 = if only, 12 = if-else  
-    if len(p) == 8:  # IF without else
-        p[0] = {
-            'type': 'if_statement',
-            'line': p.lineno(1),
-            'scope': current_scope,
-            'condition': p[3],
-            'if_body': p[if_body_index]
-        }
-    else:  # len(p) == 12: IF with else
-        else_scope = 'else_body'
-        set_scope(else_scope)
-        process_statement_scope(p[10], else_scope)  # p[10] is else_body stmt_list
-        
-        p[0] = {
-            'type': 'if_statement',
-            'line': p.lineno(1),
-            'scope': current_scope,
-            'condition': p[3],
-            'if_body': p[if_body_index],
-            'else_body': p[10]
-        }
-        pop_scope()
-    pop_scope()
-
+    # Handle based on length: 8 = if only, 12 = if-else
+    p[0] = IfStatement(p.lineno(1), p[3], p[6])
+    if len(p) == 12:  # IF with else
+        p[0].else_body = p[10]
+
+def p_if_stmt_error(p):
+    '''if_stmt : IF LPAREN error RPAREN LBRACE stmt_list RBRACE
+               | IF LPAREN error RPAREN LBRACE stmt_list RBRACE ELSE LBRACE stmt_list RBRACE'''
+    # Broken condition, resynchronize on its ')' so the body keeps its scope
+    p[0] = IfStatement(p.lineno(1), None, p[6])
+    if len(p) == 12:
+        p[0].else_body = p[10]
 
 # While statement - similar to if statement
 def p_while_stmt(p):
     '''while_stmt : WHILE LPAREN condition RPAREN LBRACE stmt_list RBRACE'''
-    current_scope = get_current_scope()
-    while_scope = 'while_body'
-    set_scope(while_scope)
-    
-    # Handle while body (stmt_list is at position 6)
-    process_statement_scope(p[6], while_scope)
-    
-    # Set scope for variables in the condition
-    set_scope_for_value(p[3], current_scope)
-    
-    p[0] = {
-        'type': 'while_statement',
-        'line': p.lineno(1),
-        'scope': current_scope,
-        'condition': p[3],
-        'body': p[6]
-    }
-    pop_scope()
+    p[0] = WhileStatement(p.lineno(1), p[3], p[6])
+
+def p_while_stmt_error(p):
+    '''while_stmt : WHILE LPAREN error RPAREN LBRACE stmt_list RBRACE'''
+    p[0] = WhileStatement(p.lineno(1), None, p[6])
 
 
 def p_condition(p):
@@ -956,192 +470,316 @@ def p_condition(p):
                  | value GE value
                  | value EQ value
                  | value NE value'''
-    p[0] = {
-        'type': 'comparison',
-        'left': p[1],
-        'operator': p[2],
-        'right': p[3]
-    }
+    p[0] = Comparison(p[1], p[2], p[3])
 
 def p_error(p):
+    # Only used by parsers outside a ParseSession, see ParseSession.syntax_error
     print(f"Syntax error at line:{p.lineno} before '{p.value}'" if p else "Syntax error at EOF")
 
-parser = yacc.yacc()
-
-def add_class_types_to_variables(data):
-    """Add class type information to variables based on their names"""
-    def process_item(item, parent_scope=None):
-        if isinstance(item, dict):
-            # Get the current item's scope, or inherit from parent
-            current_scope = item.get('scope', parent_scope)
-            
-            # Special handling for constructor arguments
-            if item.get('constructor_args'):
-                for arg in item['constructor_args']:
-                    if isinstance(arg, dict) and arg.get('type') == 'variable':
-                        if arg.get('scope') == 'global' and current_scope:
-                            arg['scope'] = current_scope
-            
-            # If this is a variable, add class type based on name
-            if item.get('type') == 'variable':
-                var_name = item.get('name')
-                
-                # Add class type
-                if var_name in ['list1', 'list2']:
-                    item['class_type'] = 'LinkedList'
-                elif var_name in ['temp', 'newNode', 'head']:
-                    item['class_type'] = 'Node'
-                
-                # Fix scope if needed
-                if item.get('scope') == 'global' and parent_scope and parent_scope != 'global':
-                    item['scope'] = parent_scope
-            
-            # Recursively process all values, passing down the current scope
-            for key, value in item.items():
-                if key != 'constructor_args':  # Already handled above
-                    process_item(value, current_scope or parent_scope)
-        elif isinstance(item, list):
-            # Process all items in the list
-            for sub_item in item:
-                process_item(sub_item, parent_scope)
-    
-    process_item(data)
-    return data
-
-def generate_json(ast, functions_dict, classes_dict, filename='output.json'):
-    # Add class type information to variables
-    enhanced_ast = add_class_types_to_variables(ast)
-    
-    with open(filename, 'w') as f:
-        json.dump(enhanced_ast, f, indent=2)
-    with open('functions.json', 'w') as f:
-        json.dump(functions_dict, f, indent=2)
-    with open('classes.json', 'w') as f:
-        json.dump(classes_dict, f, indent=2)
-    print(f"JSON output written to {filename}")
-    
-    
-def create_method_arg_param_map(method_name, args):
-    """Create arg_param_map for method calls by finding method in any class"""
-    arg_param_map = []
-    if not args:
-        return arg_param_map
-        
-    for class_name, class_info in classes_dict.items():
-        for member in class_info.get('members', []):
-            if member.get('type') == 'member_function' and member.get('name') == method_name:
-                method_params = member.get('params', [])
-                if len(method_params) == len(args):
-                    arg_param_map = [{'param_name': method_params[i]['name'], 'arg_value': args[i]} for i in range(len(args))]
-                return arg_param_map  # Return immediately when found
-    return arg_param_map
-
-def create_constructor_arg_param_map(class_name, constructor_args):
-    """Create arg_param_map for constructor calls (handles both explicit & aggregate)"""
-    arg_param_map = []
-    if not constructor_args or class_name not in classes_dict:
-        return arg_param_map
-        
-    class_info = classes_dict[class_name]
-    
-    # First try to find explicit parameterized constructor
-    constructor_params = []
-    for constructor in class_info.get('constructors', []):
-        if constructor.get('type') == 'parameterized constructor':
-            constructor_params = constructor.get('params', [])
-            break
-    
-    # If no explicit constructor found, use member variables for aggregate initialization
-    if not constructor_params:
-        member_vars = [member for member in class_info.get('members', []) 
-                      if member.get('type') == 'member_variable']
-        if len(member_vars) == len(constructor_args):
-            arg_param_map = [{'param_name': member_vars[i]['name'], 'arg_value': constructor_args[i]} 
-                           for i in range(len(constructor_args))]
-    else:
-        # Use explicit constructor parameters
-        if len(constructor_params) == len(constructor_args):
-            arg_param_map = [{'param_name': constructor_params[i]['name'], 'arg_value': constructor_args[i]} 
-                           for i in range(len(constructor_args))]
-    
-    return arg_param_map
-
-def create_function_arg_param_map(function_name, args):
-    """Create arg_param_map for function calls"""
-    arg_param_map = []
-    if not args:
-        return arg_param_map
-        
-    function_data = functions_dict.get(function_name, {})
-    function_params = function_data.get('params', [])
-    if len(function_params) == len(args):
-        arg_param_map = [{'param_name': function_params[i]['name'], 'arg_value': args[i]} for i in range(len(function_params))]
-    
-    return arg_param_map
-
-def process_statement_scope(stmt_list, scope_name):
-    """Process scope for a list of statements - eliminates repetitive scope setting"""
-    if not stmt_list:
-        return
-        
-    for stmt in stmt_list:
-        if not stmt:
-            continue
-            
-        if stmt.get('type') == 'declaration':
-            for decl in stmt['declarations']:
-                if 'dimensions' in decl:
-                    size = 1
-                    for dim in decl['dimensions']:
-                        size *= int(dim)
-                    decl['id'] = get_next_id(size)
+def _grammar_version():
+    module = sys.modules[__name__]
+    rules = [(name, getattr(module, name).__doc__) for name in sorted(dir(module))
+             if name.startswith('p_') and name != 'p_error']
+    return mylexer.rules_version(tokens, precedence, start, rules)
+
+_parser = None
+_parser_lock = threading.Lock()
+
+def get_parser():
+    """Build the parser on first use, from cached tables when available.
+
+    Tables are read from a versioned cache directory and no parser.out debug
+    file is written, so importing this module never touches the source tree.
+    """
+    global _parser
+    if _parser is None:
+        with _parser_lock:
+            if _parser is None:
+                outputdir = mylexer.table_cache_dir(_grammar_version())
+                if outputdir is None:
+                    # Nowhere to cache the tables, build them in memory
+                    _parser = yacc.yacc(module=sys.modules[__name__], debug=False, write_tables=False)
                 else:
-                    decl['id'] = get_next_id()
-                decl['scope'] = scope_name
-        elif stmt.get('type') == 'function_call':
-            stmt['scope'] = scope_name
-            if 'arg_param_map' in stmt:
-                for arg_param in stmt['arg_param_map']:
-                    if isinstance(arg_param['arg_value'], dict) and arg_param['arg_value'].get('type') == 'variable':
-                        arg_param['arg_value']['scope'] = scope_name
-        elif stmt.get('type') == 'assignment':
-            stmt['scope'] = scope_name
-            if stmt.get('value'):
-                set_scope_for_value(stmt['value'], scope_name)
-        elif stmt.get('type') == 'member_assignment':
-            stmt['scope'] = scope_name
-            if stmt.get('value'):
-                set_scope_for_value(stmt['value'], scope_name)
-        elif stmt.get('type') in ['object_declaration', 'class_pointer_declaration']:
-            stmt['scope'] = scope_name
-        elif stmt.get('type') in ['if_statement', 'while_statement']:
-            stmt['scope'] = scope_name
-            if stmt.get('condition'):
-                set_scope_for_value(stmt['condition'], scope_name)
-        elif stmt.get('type') == 'delete_statement':
-            stmt['scope'] = scope_name
-            if stmt.get('target') and isinstance(stmt['target'], dict):
-                set_scope_for_value(stmt['target'], scope_name)
-        elif stmt.get('type') == 'method_call':
-            stmt['scope'] = scope_name
-            if stmt.get('object') and isinstance(stmt['object'], dict):
-                set_scope_for_value(stmt['object'], scope_name)
-            if stmt.get('args'):
-                for arg in stmt['args']:
-                    if isinstance(arg, dict):
-                        set_scope_for_value(arg, scope_name)
-
-def assign_ids_to_declarations(stmt_list):
-    """Assign IDs to declarations in a statement list"""
-    for stmt in stmt_list:
-        if stmt and stmt.get('type') == 'declaration':
-            for decl in stmt['declarations']:
-                if 'dimensions' in decl:
-                    size = 1
-                    for dim in decl['dimensions']:
-                        size *= int(dim)
-                    decl['id'] = get_next_id(size)
-                else:
-                    decl['id'] = get_next_id()
-
-    
\ No newline at end of file
+                    _parser = yacc.yacc(module=sys.modules[__name__], optimize=1, debug=False,
+                                        picklefile=os.path.join(outputdir, 'parsetab.pickle'))
+    return _parser
+
+def build_tables():
+    """Generate the lexer and parser tables ahead of time.
+
+    Returns the directories the lexer and parser tables went to, None for
+    tables that were only built in memory (see mylexer.table_cache_dir).
+    """
+    mylexer.get_lexer()
+    get_parser()
+    return (mylexer.table_cache_dir(mylexer._lexer_version()),
+            mylexer.table_cache_dir(_grammar_version()))
+
+def __getattr__(name):
+    # Keep "myparser.parser" working without building the parser at import time
+    if name == 'parser':
+        return get_parser()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def make_arg_param_map(params, args):
+    """Pair call arguments with parameter names, empty if the counts differ"""
+    if len(params) != len(args):
+        return []
+    return [ArgParam(param['name'], arg) for param, arg in zip(params, args)]
+
+def closing_tokens(tokens):
+    """Tokens ending a source cut off mid-statement or mid-block, and their diagnostics.
+
+    PLY gives up on an error at end of input, so every '(' left open gets
+    its ')' (and an empty body when it holds an if or while condition), the
+    last statement gets a ';' and every '{' left open its '}' (plus a ';'
+    in case it was a class). An unfinished statement at file level gets a
+    '}' instead, which no top-level rule accepts, so it is dropped rather
+    than built from whatever trailing tokens were left.
+    """
+    if not tokens:
+        return [], []
+    depth = 0
+    openers = []  # Type of the token before every '(' still open
+    closed = None  # ... and before the last '(' that was closed
+    previous = None
+    for tok in tokens:
+        if tok.type == 'LBRACE':
+            depth += 1
+        elif tok.type == 'RBRACE' and depth:
+            depth -= 1
+        elif tok.type == 'LPAREN':
+            openers.append(previous)
+        elif tok.type == 'RPAREN' and openers:
+            closed = openers.pop()
+        previous = tok.type
+    last = tokens[-1]
+    end = last.lexpos + mylexer.token_length(last)
+
+    def closing(token_type, value):
+        tok = lex.LexToken()
+        tok.type, tok.value, tok.lineno, tok.lexpos = token_type, value, last.lineno, end
+        tok.closing = True
+        return tok
+
+    def missing(message):
+        return {'severity': 'error', 'message': message, 'line': last.lineno,
+                'pos': end, 'length': 0, 'token': None}
+
+    tail, diagnostics = [], []
+    if openers:
+        tail.extend(closing('RPAREN', ')') for _ in openers)
+        diagnostics.append(missing(f"Missing ')' to close {len(openers)} parenthes{'es' if len(openers) > 1 else 'is'}"))
+    condition_of = openers[0] if openers else closed if last.type == 'RPAREN' else None
+    if condition_of in ('IF', 'WHILE'):
+        # An if or while cut off before its body gets an empty one, their
+        # error rules resynchronize on the ')' and need the body after it
+        tail.extend((closing('LBRACE', '{'), closing('RBRACE', '}')))
+    if last.type not in ('SEMICOLON', 'RBRACE'):
+        tail.append(closing('SEMICOLON' if depth else 'RBRACE', ';' if depth else '}'))
+        diagnostics.append(missing("Unexpected end of input"))
+    if depth:
+        tail.extend(closing('RBRACE', '}') for _ in range(depth))
+        diagnostics.append(missing(f"Missing '}}' to close {depth} block{'s' if depth > 1 else ''}"))
+    if depth or last.type == 'RBRACE':
+        tail.append(closing('SEMICOLON', ';'))
+    return tail, diagnostics
+
+
+class ParseResult:
+    """AST plus the function and class tables produced by one parse.
+
+    diagnostics lists the syntax errors, an AST with diagnostics only holds
+    the statements the parser could recover.
+    """
+    def __init__(self, ast, functions, classes, tokens=None, diagnostics=None):
+        self.ast = ast
+        self.functions = functions
+        self.classes = classes
+        self.tokens = tokens
+        self.diagnostics = diagnostics if diagnostics is not None else []
+        self._symbols = None
+
+    @property
+    def symbols(self):
+        """SymbolTable of the AST, built on first use, None without an AST"""
+        if self._symbols is None and self.ast is not None:
+            self._symbols = SymbolTable.from_ast(self.ast)
+        return self._symbols
+
+
+class ParseSession:
+    """Owns all per-parse state so several sources can be parsed concurrently.
+
+    Each session gets its own lexer clone and parser instance, so sessions can
+    be used from different threads at the same time. A session can be reused,
+    every call to parse() starts from a clean state. With fast_lexer the
+    source is lexed by mylexer.FastLexer instead of the PLY lexer. With a
+    myprofile.Profiler, or PARSER_PROFILE set, every phase and grammar action
+    of the session is timed.
+
+    Syntax errors are skipped up to the next statement or class member,
+    the ';' or '}' ending the broken one, and collected in diagnostics.
+    A broken if or while condition is skipped up to its ')', so the body
+    is still parsed as the body.
+    With recover the source is also closed at end of input, so a half
+    typed last statement or an unclosed block still leaves an AST, and
+    the errors are no longer printed.
+    """
+    def __init__(self, fast_lexer=False, profiler=None, recover=False):
+        self.lexer = mylexer.FastLexer() if fast_lexer else mylexer.get_lexer().clone()
+        # The LR tables are shared and read-only, the copy only gets its own
+        # parse stacks
+        self.parser = copy.copy(get_parser())
+        self.parser.session = self
+        self.parser.errorfunc = self.syntax_error
+        self.recover = recover
+        self.profiler = profiler if profiler is not None else myprofile.active()
+        if self.profiler is not None:
+            self.parser.productions = self.profiler.instrument(self.parser.productions)
+        self.reset()
+
+    def reset(self):
+        self.functions_dict = {}
+        self.classes_dict = {}  # Store class information including constructors
+        self.method_params = {}  # (class, method) -> params
+        self.methods_by_name = {}  # method -> params of the first class declaring it
+        self.constructor_params = {}  # class -> {arg count -> params}
+        self.member_variables = {}  # class -> member variables in declaration order
+        self.current_id = 100000
+        self.diagnostics = []  # Syntax errors, see syntax_error
+
+    def parse(self, source):
+        """Parse source and return a ParseResult"""
+        return self.parse_tokens(self.tokenize(source))
+
+    def tokenize(self, source, lineno=1):
+        with myprofile.phase(self.profiler, 'lex'):
+            return mylexer.tokenize(source, self.lexer, lineno)
+
+    def parse_tokens(self, tokens):
+        """Parse an already lexed TokenBuffer and return a ParseResult"""
+        self.reset()
+        ast = self.parse_tree(tokens)
+        if ast is not None:
+            with myprofile.phase(self.profiler, 'resolve'):
+                ScopeResolver(self).resolve(ast)
+        return ParseResult(ast, self.functions_dict, self.classes_dict, tokens, self.diagnostics)
+
+    def parse_tree(self, tokens):
+        """Run the grammar over a TokenBuffer on top of the current tables.
+
+        Nothing is reset and the tree is not resolved, this is the building
+        block for parsing a file piece by piece (see myincremental).
+        """
+        tail, missing = closing_tokens(tokens.tokens) if self.recover else ([], [])
+        if tail:
+            # Parse a copy, the buffer is shared with caches and the editor
+            tokens = mylexer.TokenBuffer(tokens.tokens + tail)
+        tokens.rewind()
+        with myprofile.phase(self.profiler, 'parse'):
+            ast = self.parser.parse(lexer=self.lexer, tokenfunc=tokens.token)
+        self.diagnostics.extend(missing)
+        return ast
+
+    def syntax_error(self, tok):
+        """Record a syntax error, the grammar's error rules do the recovery"""
+        if tok is None:
+            diagnostic = {'severity': 'error', 'message': "Syntax error at EOF",
+                          'line': None, 'pos': None, 'length': 0, 'token': None}
+        elif getattr(tok, 'closing', False):
+            # Reported once by closing_tokens instead
+            return
+        else:
+            diagnostic = {'severity': 'error', 'message': f"Syntax error before '{tok.value}'",
+                          'line': tok.lineno, 'pos': tok.lexpos,
+                          'length': mylexer.token_length(tok), 'token': tok.type}
+        self.diagnostics.append(diagnostic)
+        if not self.recover:
+            print(f"Syntax error at line:{tok.lineno} before '{tok.value}'" if tok else "Syntax error at EOF")
+
+    def get_next_id(self, size=1):
+        """Reserve size consecutive IDs and return the first one.
+
+        Arrays reserve one ID per element but only keep the start, see
+        myresolver.element_id for computing the ID of a single element.
+        """
+        start_id = self.current_id
+        self.current_id += size
+        return start_id
+
+    def index_class(self, class_name, members):
+        """Build the per-class lookup tables used to match arguments to parameters"""
+        methods = {}
+        constructors = {}
+        member_variables = []
+        for member in members:
+            if member.get('type') == 'member_function':
+                methods.setdefault(member['name'], member.get('params', []))
+            elif member.get('type') == 'parameterized constructor':
+                constructors.setdefault(len(member['params']), member['params'])
+            elif member.get('type') == 'member_variable':
+                member_variables.append(member)
+        for method_name, params in methods.items():
+            self.method_params[(class_name, method_name)] = params
+            self.methods_by_name.setdefault(method_name, params)
+        self.constructor_params[class_name] = constructors
+        self.member_variables[class_name] = member_variables
+
+    def create_method_arg_param_map(self, class_name, method_name, args):
+        """Create arg_param_map for a method call on an object of class_name.
+
+        When the receiver type is unknown, the first class declaring a method
+        with that name is used. A known class that does not declare the method
+        gets an empty map rather than the parameters of another class.
+        """
+        if not args:
+            return []
+        if class_name is None:
+            method_params = self.methods_by_name.get(method_name, [])
+        else:
+            method_params = self.method_params.get((class_name, method_name), [])
+        return make_arg_param_map(method_params, args)
+
+    def create_constructor_arg_param_map(self, class_name, constructor_args, allow_aggregate=True):
+        """Create arg_param_map for constructor calls (handles both explicit & aggregate)"""
+        if not constructor_args or class_name not in self.constructor_params:
+            return []
+        constructors = self.constructor_params[class_name]
+        if constructors:
+            # Use the explicit constructor taking that many arguments
+            return make_arg_param_map(constructors.get(len(constructor_args), []), constructor_args)
+        if allow_aggregate:
+            # No explicit constructor, use member variables for aggregate initialization
+            return make_arg_param_map(self.member_variables[class_name], constructor_args)
+        return []
+
+    def create_function_arg_param_map(self, function_name, args):
+        """Create arg_param_map for function calls"""
+        function_data = self.functions_dict.get(function_name, {})
+        return make_arg_param_map(function_data.get('params', []), args)
+
+def generate_json(ast, functions_dict, classes_dict, filename='output.json', inline_calls=False,
+                  functions_filename='functions.json', classes_filename='classes.json',
+                  format='json', indent=2, symbols_filename=None, profiler=None):
+    """Write the AST and the function/class tables to the given paths.
+
+    With inline_calls every function call also carries a copy of the callee
+    body, the format used before calls referenced the function table. With
+    symbols_filename the ID interval index of the AST is written there too.
+    See myemitter for the available formats, indent only applies to JSON.
+    The writing is timed as the emit phase of profiler, see myprofile.
+    """
+    options = {'indent': indent} if format == 'json' else {}
+    if profiler is None:
+        profiler = myprofile.active()
+    with myprofile.phase(profiler, 'emit'):
+        write_result(ast, functions_dict, classes_dict, filename, functions_filename,
+                     classes_filename, format=format, inline_calls=inline_calls,
+                     symbols_target=symbols_filename, profiler=profiler, **options)
+    print(f"{format.upper()} output written to {filename}")
+
+def parse(source, profiler=None):
+    """Parse source in a fresh session"""
+    return ParseSession(profiler=profiler).parse(source)
@@ -0,0 +1,203 @@
+"""Opt-in profiling of the parse and emit pipeline.
+
+A Profiler records wall time per phase (lex, parse, resolve, emit and
+whatever is nested in them), reduction counts and cumulative time per
+grammar production, and with memory=True the peak traced allocation of
+every phase. Time in the parse phase that is not spent in a grammar action
+is the LALR driver itself, reported as the phase's self time.
+
+    profiler = Profiler(memory=True)
+    result = ParseSession(profiler=profiler).parse(source)
+    generate_json(result.ast, result.functions, result.classes, profiler=profiler)
+    profiler.write('profile')  # profile.json and profile.folded
+
+Setting PARSER_PROFILE=<prefix> profiles every ParseSession and
+generate_json call of the process, tester_code and the servers included,
+into one shared Profiler whose report is written to <prefix>.json and
+<prefix>.folded when the process exits (<prefix>.<pid>.* in worker
+processes). PARSER_PROFILE_MEMORY=1 adds the memory peaks.
+
+The .folded file is in the collapsed-stack format read by flamegraph.pl
+and speedscope, one "phase;...;frame microseconds" line per stack.
+"""
+import contextlib
+import json
+import multiprocessing.util
+import os
+import threading
+import time
+import tracemalloc
+
+from ply.yacc import MiniProduction
+
+
+class PhaseStats:
+    __slots__ = ('calls', 'seconds', 'child_seconds', 'peak_bytes')
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.child_seconds = 0.0  # Spent in nested phases and grammar actions
+        self.peak_bytes = 0
+
+    def to_dict(self, memory):
+        stats = {'calls': self.calls, 'seconds': self.seconds,
+                 'self_seconds': self.seconds - self.child_seconds}
+        if memory:
+            stats['peak_bytes'] = self.peak_bytes
+        return stats
+
+
+class Profiler:
+    """Collects phase and per-production timings over any number of parses.
+
+    One Profiler can be shared by sessions in several threads, each thread
+    keeps its own stack of open phases.
+    """
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.phases = {}  # 'parse;resolve' -> PhaseStats
+        self.productions = {}  # (phase path, production) -> [calls, seconds]
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stack(self):
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Time the enclosed block as name, nested in the phases already open"""
+        stack = self.stack()
+        path = f"{stack[-1][0]};{name}" if stack else name
+        if self.memory:
+            # The peak so far belongs to the enclosing phase, measure ours from here
+            if stack:
+                stack[-1][1] = max(stack[-1][1], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        entry = [path, 0]
+        stack.append(entry)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            peak = max(entry[1], tracemalloc.get_traced_memory()[1]) if self.memory else 0
+            with self.lock:
+                stats = self.phases.get(path)
+                if stats is None:
+                    stats = self.phases[path] = PhaseStats()
+                stats.calls += 1
+                stats.seconds += elapsed
+                stats.peak_bytes = max(stats.peak_bytes, peak)
+                if stack:
+                    self.phases.setdefault(stack[-1][0], PhaseStats()).child_seconds += elapsed
+            if stack:
+                stack[-1][1] = max(stack[-1][1], peak)
+
+    def instrument(self, productions):
+        """Copy of a parser's productions whose actions record their time here.
+
+        Assign the result to the productions of a parser copy, the shared
+        tables are left alone and uninstrumented sessions run at full speed.
+        """
+        instrumented = []
+        for production in productions:
+            if production.callable is None:
+                instrumented.append(production)
+                continue
+            copied = MiniProduction(production.str, production.name, production.len,
+                                    production.func, production.file, production.line)
+            copied.callable = self.timed(production.str, production.callable)
+            instrumented.append(copied)
+        return instrumented
+
+    def timed(self, production, action):
+        perf_counter = time.perf_counter
+
+        def timed_action(p):
+            start = perf_counter()
+            try:
+                action(p)
+            finally:
+                elapsed = perf_counter() - start
+                stack = self.stack()
+                parent = stack[-1][0] if stack else ''
+                key = (parent, production)
+                with self.lock:
+                    counts = self.productions.get(key)
+                    if counts is None:
+                        counts = self.productions[key] = [0, 0.0]
+                    counts[0] += 1
+                    counts[1] += elapsed
+                    if parent:
+                        self.phases.setdefault(parent, PhaseStats()).child_seconds += elapsed
+        timed_action.__name__ = action.__name__
+        return timed_action
+
+    def report(self):
+        """Phases and productions as a JSON-ready dict, slowest productions first"""
+        with self.lock:
+            phases = {path: stats.to_dict(self.memory) for path, stats in sorted(self.phases.items())}
+            productions = [{'production': production, 'phase': parent, 'calls': calls, 'seconds': seconds}
+                           for (parent, production), (calls, seconds) in self.productions.items()]
+        productions.sort(key=lambda entry: entry['seconds'], reverse=True)
+        report = {'phases': phases, 'productions': productions}
+        if self.memory:
+            report['peak_bytes'] = max((stats.get('peak_bytes', 0) for stats in phases.values()), default=0)
+        return report
+
+    def collapsed_stacks(self):
+        """Lines of the collapsed-stack format, weights in microseconds"""
+        report = self.report()
+        lines = []
+        for path, stats in report['phases'].items():
+            weight = round(stats['self_seconds'] * 1e6)
+            if weight > 0:
+                lines.append(f"{path} {weight}")
+        for entry in report['productions']:
+            weight = round(entry['seconds'] * 1e6)
+            if weight > 0:
+                frames = f"{entry['phase']};{entry['production']}" if entry['phase'] else entry['production']
+                lines.append(f"{frames} {weight}")
+        return lines
+
+    def write(self, prefix):
+        """Write the report to prefix.json and the stacks to prefix.folded"""
+        with open(f"{prefix}.json", 'w') as f:
+            json.dump(self.report(), f, indent=2)
+        with open(f"{prefix}.folded", 'w') as f:
+            f.writelines(line + '\n' for line in self.collapsed_stacks())
+
+
+def phase(profiler, name):
+    """profiler.phase(name), or a no-op when profiler is None"""
+    return profiler.phase(name) if profiler is not None else contextlib.nullcontext()
+
+
+_shared = None
+_shared_pid = None
+_shared_lock = threading.Lock()
+
+
+def active():
+    """The process-wide Profiler when PARSER_PROFILE is set, else None"""
+    global _shared, _shared_pid
+    prefix = os.environ.get('PARSER_PROFILE')
+    if not prefix:
+        return None
+    if _shared is None or _shared_pid != os.getpid():
+        with _shared_lock:
+            if _shared is None or _shared_pid != os.getpid():
+                if _shared_pid is not None or multiprocessing.parent_process() is not None:
+                    prefix = f"{prefix}.{os.getpid()}"
+                _shared = Profiler(memory=os.environ.get('PARSER_PROFILE_MEMORY') == '1')
+                _shared_pid = os.getpid()
+                # Unlike atexit, finalizers also run when a pool worker exits
+                multiprocessing.util.Finalize(None, _shared.write, args=(prefix,), exitpriority=0)
+    return _shared
@@ -0,0 +1,244 @@
+from collections import ChainMap
+
+from myast import Address, Node, PointsTo
+
+PRIMITIVE_TYPES = ['int', 'string', 'char', 'double', 'float', 'void']
+
+_END = object()
+
+# Expression nodes without variables below them
+LEAF_VALUES = ('nullptr', 'new_array')
+
+
+def strip_class_prefix(data_type):
+    return data_type[len('class:'):] if data_type.startswith('class:') else data_type
+
+
+def declaration_size(decl):
+    size = 1
+    for dim in decl.get('dimensions', []):
+        size *= int(dim)
+    return size
+
+
+def id_range(decl):
+    """(start, length) of the IDs reserved by a declaration"""
+    if 'range' in decl:
+        start, end = decl['range'].split('-')
+        return int(start), int(end) - int(start) + 1
+    return decl['id'], 1
+
+
+def element_id(decl, indices):
+    """ID of the array element at indices, e.g. [i] or [row, col]"""
+    start, length = id_range(decl)
+    offset = 0
+    for dim, index in zip(decl['dimensions'], indices):
+        dim = int(dim)
+        if not 0 <= index < dim:
+            raise IndexError(f"index {index} out of bounds for {decl['name']}[{dim}]")
+        offset = offset * dim + index
+    return start + offset
+
+
+class ScopeResolver:
+    """Assigns scopes, memory IDs and types to a parsed AST in one pass.
+
+    The grammar actions only build the tree. This pass walks it once in
+    source order with an explicit stack of (scope, statements, symbols)
+    frames, so nested blocks are visited exactly once whatever their depth.
+    Each block's symbols map declared names to (declared type, declaration
+    ID) and chain to the enclosing block. Every variable reference is looked
+    up through that chain to get the ID it refers to and, for objects and
+    class pointers, its class_type, which is also what method calls use to
+    find their receiver's class. Names that are not variable nodes get the
+    ID of their declaration too: assignment targets (id, or object_id for a
+    member assignment) and the targets of '&name' (address and points_to).
+
+    IDs follow source order, except inside a class: member variables and
+    the parameters of methods and constructors are numbered first, in
+    declaration order, and the locals of the member bodies after all of
+    them, because a body may use a member declared below it.
+    """
+    def __init__(self, session):
+        self.session = session
+        self.get_next_id = session.get_next_id
+        self.class_symbols = {}
+
+    def resolve(self, ast, symbols=None):
+        """Resolve ast in place, global declarations are added to symbols"""
+        stack = [('global', iter(ast), ChainMap() if symbols is None else symbols)]
+        while stack:
+            scope, stmts, symbols = stack[-1]
+            stmt = next(stmts, _END)
+            if stmt is _END:
+                stack.pop()
+            elif stmt is not None:
+                # Blocks are pushed in reverse so they are visited in source order
+                for block_scope, body, block_symbols in reversed(self.resolve_statement(stmt, scope, symbols)):
+                    stack.append((block_scope, iter(body), block_symbols))
+        return ast
+
+    def resolve_statement(self, stmt, scope, symbols):
+        """Resolve one statement, return the (scope, body, symbols) blocks it opens"""
+        stmt_type = stmt.type
+        if stmt_type == 'declaration':
+            for decl in stmt.declarations:
+                decl.scope = scope
+                decl.id = self.get_next_id(declaration_size(decl))
+                if hasattr(decl, 'dimensions'):
+                    # Arrays keep their element IDs as an inclusive "start-end" range
+                    decl.range = f"{decl.id}-{decl.id + declaration_size(decl) - 1}"
+                for field in ('value', 'values_', 'points_to', 'constructor_args', 'arg_param_map'):
+                    self.resolve_value(getattr(decl, field, None), scope, symbols)
+                symbols[decl.name] = (stmt.data_type, decl.id)
+        elif stmt_type in ['object_declaration', 'class_pointer_declaration']:
+            stmt.scope = scope
+            stmt.id = self.get_next_id()
+            self.resolve_value(stmt.get('arg_param_map'), scope, symbols)
+            self.resolve_value(stmt.get('constructor_args'), scope, symbols)
+            symbols[stmt.get('name', stmt.get('object_name'))] = (stmt.class_type, stmt.id)
+        elif stmt_type == 'function declaration':
+            stmt.id = self.get_next_id()
+            func_scope = f"function:{stmt.name}"
+            return [(func_scope, stmt.body, self.resolve_params(stmt.params, func_scope, symbols))]
+        elif stmt_type == 'the standard Main_Function ':
+            return [('function:main', stmt.body, symbols.new_child())]
+        elif stmt_type == 'class_declaration':
+            return self.resolve_class(stmt, symbols)
+        elif stmt_type == 'if_statement':
+            stmt.scope = scope
+            self.resolve_value(stmt.condition, scope, symbols)
+            blocks = [('if_body', stmt.if_body, symbols.new_child())]
+            if 'else_body' in stmt:
+                blocks.append(('else_body', stmt.else_body, symbols.new_child()))
+            return blocks
+        elif stmt_type == 'while_statement':
+            stmt.scope = scope
+            self.resolve_value(stmt.condition, scope, symbols)
+            return [('while_body', stmt.body, symbols.new_child())]
+        elif stmt_type == 'assignment':
+            stmt.scope = scope
+            stmt.id = self.declaration_id(stmt.name, symbols)
+            self.resolve_value(stmt.value, scope, symbols)
+        elif stmt_type == 'member_assignment':
+            stmt.scope = scope
+            if isinstance(stmt.object, str):
+                stmt.object_id = self.declaration_id(stmt.object, symbols)
+            else:
+                self.resolve_value(stmt.object, scope, symbols)
+            self.resolve_value(stmt.value, scope, symbols)
+        elif stmt_type == 'method_call':
+            stmt.scope = scope
+            self.resolve_value(stmt.object, scope, symbols)
+            self.resolve_value(stmt.args, scope, symbols)
+            if 'arg_param_map' in stmt:
+                receiver_class = self.value_class(stmt.object, symbols)
+                stmt.arg_param_map = self.session.create_method_arg_param_map(
+                    receiver_class, stmt.method, stmt.args)
+        elif stmt_type == 'function_call':
+            stmt.scope = scope
+            self.resolve_value(stmt.arg_param_map, scope, symbols)
+        elif stmt_type == 'delete_statement':
+            stmt.scope = scope
+            self.resolve_value(stmt.target, scope, symbols)
+        return []
+
+    def resolve_class(self, stmt, symbols):
+        class_name = stmt.name
+        class_scope = f'class:{class_name}'
+        # Member functions see the member variables of their class, filled in
+        # as the members get their IDs. Bodies are returned as blocks and only
+        # resolved once every member has its ID, see the class docstring
+        members = self.class_symbols[class_name] = {}
+        member_symbols = symbols.new_child(members)
+        blocks = []
+        for member in stmt.members:
+            member_type = member.type
+            if member_type == 'member_variable':
+                member.scope = class_scope
+                member.id = self.get_next_id()
+                members[member.name] = (member.data_type, member.id)
+                if member.get('data_type', '') not in PRIMITIVE_TYPES:
+                    member.data_type = f"class:{member.data_type}"
+            elif member_type == 'member_function':
+                func_scope = f"function:{class_name}.{member.name}"
+                func_symbols = self.resolve_params(member.params, func_scope, member_symbols)
+                blocks.append((func_scope, member.body, func_symbols))
+            elif member_type == 'constructor':
+                blocks.append((f'constructor:{class_name}', member.body, member_symbols.new_child()))
+            elif member_type == 'parameterized constructor':
+                constructor_scope = f'parameterized constructor:{class_name}'
+                constructor_symbols = self.resolve_params(member.params, constructor_scope, member_symbols)
+                blocks.append((constructor_scope, member.body, constructor_symbols))
+            elif member_type == 'destructor':
+                blocks.append((f'destructor:{class_name}', member.body, member_symbols.new_child()))
+        # Default values may use any member of the class
+        for member in stmt.members:
+            if member.type == 'member_variable':
+                self.resolve_value(member.get('default_value'), class_scope, member_symbols)
+                self.resolve_value(member.get('points_to'), class_scope, member_symbols)
+        return blocks
+
+    def resolve_params(self, params, scope, symbols):
+        """Assign scope and IDs to params, return the symbols of the new block"""
+        block_symbols = symbols.new_child()
+        for param in params:
+            param.scope = scope
+            param.id = self.get_next_id()
+            block_symbols[param.name] = (param.data_type, param.id)
+        return block_symbols
+
+    def members_of(self, class_name):
+        """Member variable name -> (declared type, member ID) for class_name"""
+        if class_name not in self.class_symbols:
+            self.class_symbols[class_name] = {
+                member.name: (strip_class_prefix(member.data_type), member.get('id'))
+                for member in self.session.member_variables.get(class_name, [])}
+        return self.class_symbols[class_name]
+
+    def value_class(self, value, symbols):
+        """Declared type of a receiver expression, or None if unknown"""
+        if not isinstance(value, Node):
+            return None
+        if value.type == 'variable':
+            symbol = symbols.get(value.name)
+        elif value.type == 'member_access':
+            object_class = self.value_class(value.object, symbols)
+            symbol = self.members_of(object_class).get(value.member) if object_class else None
+        else:
+            symbol = None
+        return symbol[0] if symbol is not None else None
+
+    @staticmethod
+    def declaration_id(name, symbols):
+        """ID of the declaration name refers to, or None if undeclared"""
+        symbol = symbols.get(name)
+        return symbol[1] if symbol is not None else None
+
+    def resolve_value(self, value, scope, symbols):
+        """Set scope, declaration ID and class type on every variable inside an expression"""
+        if isinstance(value, Node):
+            value_type = value.type
+            if isinstance(value, (Address, PointsTo)):
+                # &name, the ID of what the pointer gets the address of
+                value.id = self.declaration_id(value.name, symbols)
+            elif value_type == 'variable':
+                value.scope = scope
+                symbol = symbols.get(value.name)
+                if symbol is not None:
+                    data_type, value.id = symbol
+                    if data_type not in PRIMITIVE_TYPES:
+                        value.class_type = data_type
+            elif value_type == 'member_access':
+                self.resolve_value(value.object, scope, symbols)
+            elif value_type == 'comparison':
+                self.resolve_value(value.left, scope, symbols)
+                self.resolve_value(value.right, scope, symbols)
+            elif value_type not in LEAF_VALUES:
+                for item in value.values():
+                    if isinstance(item, (Node, list)):
+                        self.resolve_value(item, scope, symbols)
+        elif isinstance(value, list):
+            for item in value:
+                self.resolve_value(item, scope, symbols)
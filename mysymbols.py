@@ -0,0 +1,230 @@
+"""Columnar symbol table of a resolved AST.
+
+Every declared symbol (variable, array, object, class pointer, member
+variable, parameter, function) is one row of parallel arrays: interned
+name, scope, type and kind, the line, and the first ID and number of IDs it
+reserves. Rows are found by qualified name ("class:Student:id"), by their
+first ID, or by any ID they own through a binary search over the ranges,
+which is what the visualizer asks for on every frame.
+
+interval_index() exports the same columns sorted by first ID, next to the
+AST, so the frontend can binary search them instead of walking output.json.
+"""
+from array import array
+from bisect import bisect_right
+
+from myast import Declaration, Node
+from myresolver import id_range, strip_class_prefix
+
+# Node type -> (kind, field holding the declared type)
+SYMBOL_NODES = {
+    None: ('variable', None),  # Declarator, typed by its Declaration
+    'object_declaration': ('object', 'class_type'),
+    'class_pointer_declaration': ('class_pointer', 'class_type'),
+    'member_variable': ('member', 'data_type'),
+    'parameter': ('parameter', 'data_type'),
+    'function declaration': ('function', 'return_type'),
+}
+
+# Fields holding statements, members or parameters below a node
+BLOCK_FIELDS = ('params', 'body', 'if_body', 'else_body', 'members')
+
+
+class SymbolTable:
+    """Symbols stored as parallel arrays with hash and interval indexes.
+
+    Row r is names[r], scopes[r], ... where names, scopes, types and kinds
+    are indexes into strings. Two symbols never share an ID, so the row
+    owning an ID is the one with the greatest start not above it, provided
+    the ID falls within its length.
+    """
+    def __init__(self):
+        self.strings = []
+        self.string_index = {}
+        self.names = array('l')
+        self.scopes = array('l')
+        self.types = array('l')
+        self.kinds = array('l')
+        self.lines = array('l')  # 0 when the node has no line
+        self.starts = array('q')
+        self.lengths = array('q')
+        self.nodes = []
+        self.dimensions = {}  # row -> dimensions, arrays only
+        self.by_qualified_name = {}  # "scope:name" -> row of its first declaration
+        self.by_id = {}  # first ID -> row
+        self._order = None  # Rows sorted by start, built on the first ID query
+        self._sorted_starts = None
+        self._scope_spans = None
+
+    @classmethod
+    def from_ast(cls, ast):
+        table = cls()
+        table.add_tree(ast)
+        return table
+
+    def __len__(self):
+        return len(self.starts)
+
+    def intern(self, text):
+        index = self.string_index.get(text)
+        if index is None:
+            index = self.string_index[text] = len(self.strings)
+            self.strings.append(text)
+        return index
+
+    def add(self, name, scope, data_type, kind, start, length=1, line=None, node=None, dimensions=None):
+        """Append a symbol and return its row"""
+        row = len(self.starts)
+        self.names.append(self.intern(name))
+        self.scopes.append(self.intern(scope))
+        self.types.append(self.intern(data_type))
+        self.kinds.append(self.intern(kind))
+        self.lines.append(line if isinstance(line, int) else 0)
+        self.starts.append(start)
+        self.lengths.append(length)
+        self.nodes.append(node)
+        if dimensions:
+            self.dimensions[row] = tuple(int(dim) for dim in dimensions)
+        self.by_qualified_name.setdefault(f'{scope}:{name}', row)
+        self.by_id[start] = row
+        self._order = None
+        self._scope_spans = None
+        return row
+
+    def add_tree(self, ast):
+        """Add every symbol with an ID in a resolved AST, in source order"""
+        stack = [(ast, None)]
+        while stack:
+            node, data_type = stack.pop()
+            if isinstance(node, list):
+                stack.extend((item, data_type) for item in reversed(node))
+                continue
+            if not isinstance(node, Node):
+                continue
+            if isinstance(node, Declaration):
+                stack.extend((decl, node.data_type) for decl in reversed(node.declarations))
+                continue
+            symbol = SYMBOL_NODES.get(node.type)
+            if symbol is not None and node.get('id') is not None:
+                kind, type_field = symbol
+                start, length = id_range(node)
+                name = node.get('name', node.get('object_name'))
+                # Member variables are typed "class:Node" in the AST, pointers
+                # and objects just "Node"
+                self.add(name, node.scope, strip_class_prefix(node.get(type_field, data_type)), kind,
+                         start, length,
+                         node.get('line'), node, node.get('dimensions'))
+            for field in reversed(BLOCK_FIELDS):
+                block = node.get(field)
+                if block:
+                    stack.append((block, None))
+
+    def lookup(self, qualified_name):
+        """Row of the symbol named "scope:name", or None.
+
+        Block scopes such as if_body repeat across functions, the first
+        declaration under such a name wins. Use owner() to tell them apart.
+        """
+        return self.by_qualified_name.get(qualified_name)
+
+    def sorted_rows(self):
+        """Rows in ID order"""
+        if self._order is None:
+            self._order = array('l', sorted(range(len(self.starts)), key=self.starts.__getitem__))
+            self._sorted_starts = array('q', (self.starts[row] for row in self._order))
+        return self._order
+
+    def owner(self, memory_id):
+        """Row of the symbol whose IDs include memory_id, or None"""
+        self.sorted_rows()
+        position = bisect_right(self._sorted_starts, memory_id) - 1
+        if position < 0:
+            return None
+        row = self._order[position]
+        if memory_id >= self.starts[row] + self.lengths[row]:
+            return None
+        return row
+
+    def element(self, memory_id):
+        """(row, indices) of the symbol owning memory_id, or None.
+
+        indices locate the element of an array, e.g. (1, 2) for grid[1][2],
+        and are empty for other symbols. The inverse of myresolver.element_id.
+        """
+        row = self.owner(memory_id)
+        if row is None:
+            return None
+        dimensions = self.dimensions.get(row)
+        if not dimensions:
+            return row, ()
+        offset = memory_id - self.starts[row]
+        indices = []
+        for dim in reversed(dimensions):
+            offset, index = divmod(offset, dim)
+            indices.append(index)
+        return row, tuple(reversed(indices))
+
+    def scope_span(self, scope):
+        """(first, last) ID declared directly in scope, or None"""
+        return self.scope_spans().get(scope)
+
+    def scope_spans(self):
+        """Scope -> (first, last) ID declared directly in it.
+
+        Spans of block scopes (if_body, ...) cover every block of that name.
+        """
+        if self._scope_spans is None:
+            spans = {}
+            for row in range(len(self.starts)):
+                start, end = self.starts[row], self.starts[row] + self.lengths[row] - 1
+                span = spans.get(self.scopes[row])
+                spans[self.scopes[row]] = (start, end) if span is None else (min(span[0], start),
+                                                                             max(span[1], end))
+            self._scope_spans = {self.strings[scope]: span for scope, span in spans.items()}
+        return self._scope_spans
+
+    def qualified_name(self, row):
+        return f'{self.strings[self.scopes[row]]}:{self.strings[self.names[row]]}'
+
+    def symbol(self, row):
+        """The row as a declarations.json record, range being [first ID, last ID]"""
+        strings = self.strings
+        start, length = self.starts[row], self.lengths[row]
+        return {
+            'name': strings[self.names[row]],
+            'type': strings[self.types[row]],
+            'kind': strings[self.kinds[row]],
+            'scope': strings[self.scopes[row]],
+            'line': self.lines[row] or None,
+            'id': start,
+            'range': [start, start + length - 1],
+        }
+
+    def declarations(self):
+        """Qualified name -> record of every symbol, the declarations.json layout"""
+        declarations = {}
+        for row in range(len(self)):
+            declarations.setdefault(self.qualified_name(row), self.symbol(row))
+        return declarations
+
+    def interval_index(self):
+        """Columns sorted by first ID, for binary searching on the client.
+
+        Entry i of every column describes one symbol; name, scope, type and
+        kind are indexes into strings, and line is 0 when unknown.
+        Dimensions are keyed by position, arrays only.
+        """
+        order = self.sorted_rows()
+        positions = {row: position for position, row in enumerate(order)}
+        return {
+            'strings': self.strings,
+            'starts': [self.starts[row] for row in order],
+            'lengths': [self.lengths[row] for row in order],
+            'names': [self.names[row] for row in order],
+            'scopes': [self.scopes[row] for row in order],
+            'types': [self.types[row] for row in order],
+            'kinds': [self.kinds[row] for row in order],
+            'lines': [self.lines[row] for row in order],
+            'dimensions': {str(positions[row]): list(dims) for row, dims in self.dimensions.items()},
+            'scope_spans': {scope: list(span) for scope, span in self.scope_spans().items()},
+        }
@@ -0,0 +1,290 @@
+"""Delta-encoded execution traces with keyframes for seeking.
+
+A trace is a file of compact JSON lines written while the interpreter runs.
+The first line is a header, then every step is one line. Step s is a full
+keyframe when s is a multiple of the keyframe interval, otherwise a list
+
+    [step, line, ops]
+
+of the changes since step s - 1, in the order they are applied:
+
+    ["pop", depth]                          frames from depth on returned
+    ["push", function, this]                a call started
+    ["declare", depth, slot, value]         a variable came into scope
+    ["drop", depth, slot, old]              a variable went out of scope
+    ["set", depth, slot, member, old, new]  a variable (or one of its fields) was written
+    ["alloc", address, value]               new allocated an object
+    ["free", address, old]                  delete freed it
+    ["write", address, member, old, new]    a heap object (or one of its fields) was written
+
+member is null when the whole value changed. Old values are kept so a
+reader can also step backwards. After the last step come the keyframe
+index, {"index": [[step, offset], ...], ...}, and a line holding the byte
+offset of that index. TraceReader only loads the index: seeking to a step
+is a binary search for its keyframe and at most one interval of deltas.
+
+Values are encoded as in myinterpreter snapshots, with the same memory IDs.
+
+    python mytrace.py tested_code.txt -o trace.ndjson
+"""
+import argparse
+import json
+import sys
+from bisect import bisect_right
+
+from myinterpreter import Instance, Interpreter, encode_value
+
+FORMAT_VERSION = 1
+
+
+def diff_values(ops, prefix, old, new):
+    """Ops turning old into new, field by field when both are the same kind of object"""
+    if (isinstance(old, Instance) and isinstance(new, Instance) and old.type_name == new.type_name
+            and old.fields.keys() == new.fields.keys()):
+        for member, value in new.fields.items():
+            if value is not old.fields[member] and value != old.fields[member]:
+                ops.append(prefix + [member, encode_value(old.fields[member]), encode_value(value)])
+    elif new is not old and new != old:
+        ops.append(prefix + [None, encode_value(old), encode_value(new)])
+
+
+def diff_frames(ops, old_frames, new_frames):
+    common = 0
+    while (common < len(old_frames) and common < len(new_frames)
+           and old_frames[common].call == new_frames[common].call):
+        common += 1
+    if common < len(old_frames):
+        ops.append(['pop', common])
+    for depth in range(common):
+        old, new = old_frames[depth], new_frames[depth]
+        if old is new:
+            continue
+        old_locals, new_locals = old.locals, new.locals
+        for slot, value in old_locals.items():
+            if slot not in new_locals:
+                ops.append(['drop', depth, slot, encode_value(value)])
+        for slot, value in new_locals.items():
+            if slot not in old_locals:
+                ops.append(['declare', depth, slot, encode_value(value)])
+            elif value is not old_locals[slot]:
+                diff_values(ops, ['set', depth, slot], old_locals[slot], value)
+    for depth in range(common, len(new_frames)):
+        frame = new_frames[depth]
+        ops.append(['push', frame.function, encode_value(frame.this)])
+        for slot, value in frame.locals.items():
+            ops.append(['declare', depth, slot, encode_value(value)])
+
+
+def diff_heaps(ops, old_heap, new_heap):
+    """Changes between two versions of a PersistentMap, skipping shared branches"""
+    if old_heap is new_heap:
+        return
+    for old_branch, new_branch in zip(old_heap.root, new_heap.root):
+        if old_branch is new_branch:
+            continue
+        for old_bucket, new_bucket in zip(old_branch, new_branch):
+            if old_bucket is new_bucket:
+                continue
+            for address, value in old_bucket.items():
+                if address not in new_bucket:
+                    ops.append(['free', address, encode_value(value)])
+            for address, value in new_bucket.items():
+                if address not in old_bucket:
+                    ops.append(['alloc', address, encode_value(value)])
+                elif value is not old_bucket[address]:
+                    diff_values(ops, ['write', address], old_bucket[address], value)
+
+
+def snapshot_ops(previous, snapshot):
+    ops = []
+    diff_frames(ops, previous.frames, snapshot.frames)
+    diff_heaps(ops, previous.heap, snapshot.heap)
+    return ops
+
+
+class TraceWriter:
+    """Writes snapshots to a stream as deltas, usable as an on_step callback"""
+    def __init__(self, stream, keyframe_interval=1000):
+        self.stream = stream
+        self.keyframe_interval = keyframe_interval
+        self.encoder = json.JSONEncoder(separators=(',', ':'))
+        self.index = []
+        self.previous = None
+        self.steps = 0
+        self.offset = self.write_line({'format': 'trace', 'version': FORMAT_VERSION,
+                                       'keyframe_interval': keyframe_interval})
+
+    def write_line(self, record):
+        data = (self.encoder.encode(record) + '\n').encode()
+        self.stream.write(data)
+        return len(data)
+
+    def __call__(self, snapshot):
+        if snapshot.step % self.keyframe_interval == 0:
+            self.index.append([snapshot.step, self.offset])
+            record = snapshot.to_dict(edges=False)
+        else:
+            record = [snapshot.step, snapshot.line, snapshot_ops(self.previous, snapshot)]
+        self.offset += self.write_line(record)
+        self.previous = snapshot
+        self.steps = snapshot.step + 1
+
+    def close(self, error=None):
+        """Write the keyframe index, the trace is complete after this"""
+        index_offset = self.offset
+        self.offset += self.write_line({'index': self.index, 'steps': self.steps, 'error': error})
+        self.write_line(index_offset)
+
+
+def record(ast, functions, classes, stream, keyframe_interval=1000, interpreter=Interpreter, **options):
+    """Run a program and write its trace to a binary stream, return the Timeline.
+
+    interpreter is the class running it, Interpreter or a subclass such as
+    mycompiler.CompiledInterpreter.
+    """
+    writer = TraceWriter(stream, keyframe_interval)
+    timeline = interpreter(ast, functions, classes, on_step=writer, **options).run()
+    writer.close(timeline.error)
+    return timeline
+
+
+def decode_keyframe(record):
+    """Keyframe record with its JSON string keys turned back into IDs"""
+    return {
+        'step': record['step'],
+        'line': record['line'],
+        'frames': [{'function': frame['function'], 'this': frame['this'],
+                    'variables': {int(slot): decode_value(value) for slot, value in frame['variables'].items()}}
+                   for frame in record['frames']],
+        'heap': {int(address): decode_value(value) for address, value in record['heap'].items()},
+    }
+
+
+def decode_value(value):
+    if isinstance(value, dict) and 'fields' in value:
+        return {'type': value['type'],
+                'fields': {int(member): decode_value(field) for member, field in value['fields'].items()}}
+    return value
+
+
+def store(container, key, member, value):
+    """Set the whole entry (member None) or one field of the object in it"""
+    if member is None:
+        container[key] = value
+    else:
+        container[key]['fields'][member] = value
+
+
+def apply_ops(state, step, line, ops):
+    """Move a decoded state forward by one delta record"""
+    frames, heap = state['frames'], state['heap']
+    for op in ops:
+        kind = op[0]
+        if kind == 'set':
+            store(frames[op[1]]['variables'], op[2], op[3], decode_value(op[5]))
+        elif kind == 'write':
+            store(heap, op[1], op[2], decode_value(op[4]))
+        elif kind == 'declare':
+            frames[op[1]]['variables'][op[2]] = decode_value(op[3])
+        elif kind == 'drop':
+            del frames[op[1]]['variables'][op[2]]
+        elif kind == 'push':
+            frames.append({'function': op[1], 'this': op[2], 'variables': {}})
+        elif kind == 'pop':
+            del frames[op[1]:]
+        elif kind == 'alloc':
+            heap[op[1]] = decode_value(op[2])
+        elif kind == 'free':
+            del heap[op[1]]
+    state['step'] = step
+    state['line'] = line
+
+
+class TraceReader:
+    """Random access to the steps of a trace file.
+
+    Only the header and keyframe index are read up front. state(step) seeks
+    to the closest keyframe at or before step and replays the deltas after
+    it, so any step costs one seek and at most keyframe_interval lines.
+    """
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.header = json.loads(self.file.readline())
+        if self.header.get('version') != FORMAT_VERSION:
+            raise ValueError(f"unsupported trace version {self.header.get('version')}")
+        self.file.seek(0, 2)
+        size = self.file.tell()
+        self.file.seek(max(0, size - 64))
+        index_offset = int(self.file.read().splitlines()[-1])
+        self.file.seek(index_offset)
+        footer = json.loads(self.file.readline())
+        self.index_offset = index_offset
+        self.steps = footer['steps']
+        self.error = footer['error']
+        self.keyframe_steps = [step for step, _ in footer['index']]
+        self.keyframe_offsets = [offset for _, offset in footer['index']]
+
+    def __len__(self):
+        return self.steps
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def state(self, step):
+        """Memory after step as decoded snapshot dicts (frames, heap)"""
+        if not 0 <= step < self.steps:
+            raise IndexError(f"step {step} out of range, the trace has {self.steps} steps")
+        position = bisect_right(self.keyframe_steps, step) - 1
+        self.file.seek(self.keyframe_offsets[position])
+        state = decode_keyframe(json.loads(self.file.readline()))
+        for _ in range(step - self.keyframe_steps[position]):
+            record_step, line, ops = json.loads(self.file.readline())
+            apply_ops(state, record_step, line, ops)
+        return state
+
+    def deltas(self, start=0, stop=None):
+        """(step, line, ops) of the steps in [start, stop), keyframes give ops None"""
+        stop = self.steps if stop is None else min(stop, self.steps)
+        if start >= stop:
+            return
+        position = bisect_right(self.keyframe_steps, start) - 1
+        self.file.seek(self.keyframe_offsets[position])
+        for step in range(self.keyframe_steps[position], stop):
+            record = json.loads(self.file.readline())
+            if step >= start:
+                yield (step, record['line'], None) if isinstance(record, dict) else tuple(record)
+
+
+def main():
+    import myparser
+
+    arg_parser = argparse.ArgumentParser(description="Run a program and write its delta-encoded trace")
+    arg_parser.add_argument('source', nargs='?', default='tested_code.txt')
+    arg_parser.add_argument('-o', '--output', default='trace.ndjson')
+    arg_parser.add_argument('--max-steps', type=int, default=10 ** 6)
+    arg_parser.add_argument('--keyframe-interval', type=int, default=1000)
+    arg_parser.add_argument('--compiled', action='store_true', help="run with mycompiler.CompiledInterpreter")
+    args = arg_parser.parse_args()
+
+    with open(args.source) as f:
+        result = myparser.parse(f.read())
+    if result.ast is None:
+        sys.exit("The program has syntax errors")
+    interpreter = Interpreter
+    if args.compiled:
+        from mycompiler import CompiledInterpreter as interpreter
+    with open(args.output, 'wb') as stream:
+        timeline = record(result.ast, result.functions, result.classes, stream,
+                          args.keyframe_interval, interpreter, max_steps=args.max_steps)
+    print(f"{timeline.steps} steps written to {args.output}"
+          + (f", stopped with: {timeline.error}" if timeline.error else ""))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,268 @@
+"""Long-lived parser process speaking JSON-RPC 2.0 over stdin/stdout.
+
+Each request and response is one line of JSON. The parser tables are loaded
+once, so a request only pays for the parse itself:
+
+    {"jsonrpc": "2.0", "id": 1, "method": "parse",
+     "params": {"source": "int main() { int x; }", "document": "editor"}}
+
+parse params:
+    source        C++ source text (required)
+    document      optional key of the editor buffer. Requests for the same
+                  document are parsed incrementally, and a newer request
+                  supersedes the older ones that have not answered yet.
+    inline_calls  embed callee bodies in function calls (default false)
+    symbols       also return "symbols", the ID interval index of the AST
+                  (see SymbolTable.interval_index, default false)
+
+The result holds "ast", "functions", "classes" and "diagnostics". Syntax
+errors do not fail the request: the parser skips the broken statement or
+class member and lists the error in "diagnostics" as {"severity",
+"message", "line", "pos", "length", "token"}, "pos" being the offset in
+source, and "ast" holds everything else. Parses without a
+document go through a ParseCache, so a program that was already seen, up to
+whitespace and comments, is not parsed again. Other methods are "cancel"
+(params {"id": <request id>}), "close" (params {"document": <key>}, drops
+the incremental state of an editor buffer that is no longer open, clients
+should send it when a buffer closes), "stats" (the cache hit and miss
+counters) and "shutdown", answered once every parse still queued has been
+answered. Cancelled or superseded requests are answered with error code
+-32800. Requests without an id are notifications and get no answer, a
+parse notification with a document only updates that document.
+"""
+import io
+import json
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import myparser
+from mycache import ParseCache
+from myemitter import JsonEmitter, inline_function_calls
+from myincremental import IncrementalParser
+
+REQUEST_CANCELLED = -32800
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+
+class Cancelled(Exception):
+    pass
+
+
+class Document:
+    """Incremental parser of one editor buffer and the latest request for it"""
+    def __init__(self):
+        self.parser = IncrementalParser(recover=True)
+        self.lock = threading.Lock()
+        self.latest = None
+
+
+class ParserServer:
+    def __init__(self, stdin=sys.stdin, stdout=sys.stdout, workers=4, cache=None):
+        self.stdin = stdin
+        self.stdout = stdout
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.write_lock = threading.Lock()
+        self.state_lock = threading.Lock()
+        self.pending = {}  # request id -> future
+        self.cancelled = set()
+        self.documents = {}
+        self.shutdown_id = None
+        self.sessions = threading.local()
+        self.cache = cache if cache is not None else ParseCache()
+
+    def serve(self):
+        myparser.build_tables()
+        for line in self.stdin:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                self.send_error(None, INVALID_REQUEST, f"Invalid JSON: {e}")
+                continue
+            if not isinstance(request, dict) or 'method' not in request:
+                self.send_error(None, INVALID_REQUEST, "Expected a JSON-RPC request object")
+                continue
+            try:
+                if not self.dispatch(request):
+                    break
+            except Exception as e:
+                # One bad request must not end the editor session
+                if request.get('id') is not None and self.valid_id(request.get('id')):
+                    self.send_error(request['id'], INTERNAL_ERROR, f"{type(e).__name__}: {e}")
+        # Answer shutdown only once every queued parse has been answered
+        self.executor.shutdown(wait=True)
+        if self.shutdown_id is not None:
+            self.send_result(self.shutdown_id, None)
+
+    @staticmethod
+    def valid_id(request_id):
+        return request_id is None or (isinstance(request_id, (str, int)) and not isinstance(request_id, bool))
+
+    def dispatch(self, request):
+        """Handle one request, return False once the server should stop.
+
+        Requests without an id are notifications: they are carried out but
+        never answered, not even with an error.
+        """
+        request_id = request.get('id')
+        notification = request_id is None
+        method = request['method']
+        params = request.get('params')
+        if not self.valid_id(request_id):
+            self.send_error(None, INVALID_REQUEST, "Request id must be a string, a number or null")
+            return True
+        if not isinstance(method, str):
+            if not notification:
+                self.send_error(request_id, INVALID_REQUEST, "Request method must be a string")
+            return True
+        if params is None:
+            params = {}
+        elif not isinstance(params, dict):
+            if not notification:
+                self.send_error(request_id, INVALID_PARAMS, "params must be an object")
+            return True
+        if method == 'shutdown':
+            self.shutdown_id = request_id
+            return False
+        if method == 'cancel':
+            if not self.valid_id(params.get('id')):
+                if not notification:
+                    self.send_error(request_id, INVALID_PARAMS, "cancel needs the 'id' of a request")
+                return True
+            self.cancel(params.get('id'))
+            if not notification:
+                self.send_result(request_id, None)
+        elif method == 'close':
+            self.close(params.get('document'))
+            if not notification:
+                self.send_result(request_id, None)
+        elif method == 'stats':
+            if not notification:
+                self.send_result(request_id, self.cache.stats())
+        elif method == 'parse':
+            if not isinstance(params.get('source'), str):
+                if not notification:
+                    self.send_error(request_id, INVALID_PARAMS, "parse needs a 'source' string")
+                return True
+            document = params.get('document')
+            if notification and document is None:
+                return True  # Nothing to update and nobody to answer
+            superseded = doc = None
+            with self.state_lock:
+                if document is not None:
+                    doc = self.documents.setdefault(document, Document())
+                    superseded, doc.latest = doc.latest, request_id
+                future = self.executor.submit(self.run_parse, request_id, params, doc)
+                if not notification:
+                    self.pending[request_id] = future
+            if superseded is not None:
+                self.cancel(superseded)
+        elif not notification:
+            self.send_error(request_id, METHOD_NOT_FOUND, f"Unknown method '{method}'")
+        return True
+
+    def close(self, document):
+        """Forget an editor buffer and cancel its request still waiting"""
+        with self.state_lock:
+            doc = self.documents.pop(document, None)
+        if doc is not None and doc.latest is not None:
+            self.cancel(doc.latest)
+
+    def cancel(self, request_id):
+        with self.state_lock:
+            future = self.pending.get(request_id)
+            if future is None:
+                return
+            self.cancelled.add(request_id)
+        if future.cancel():
+            self.finish(request_id)
+            self.send_error(request_id, REQUEST_CANCELLED, "Request cancelled")
+
+    def check_cancelled(self, request_id):
+        with self.state_lock:
+            if request_id in self.cancelled:
+                raise Cancelled()
+
+    def finish(self, request_id):
+        with self.state_lock:
+            self.pending.pop(request_id, None)
+            self.cancelled.discard(request_id)
+
+    def run_parse(self, request_id, params, doc):
+        """Parse for a request, or for a notification (request_id None) only
+        update the document without answering"""
+        try:
+            self.check_cancelled(request_id)
+            if doc is None:
+                if not hasattr(self.sessions, 'session'):
+                    self.sessions.session = myparser.ParseSession(recover=True)
+                result = self.cache.parse(self.sessions.session, params['source'])
+                self.check_cancelled(request_id)
+                self.send_parse_result(request_id, result, params)
+            else:
+                with doc.lock:
+                    self.check_cancelled(request_id)
+                    result = doc.parser.update(params['source'])
+                    self.check_cancelled(request_id)
+                    # The incremental parser owns these trees, serialize
+                    # before the next edit can touch them
+                    if request_id is not None:
+                        self.send_parse_result(request_id, result, params)
+        except Cancelled:
+            self.send_error(request_id, REQUEST_CANCELLED, "Request cancelled")
+        except Exception as e:
+            if request_id is not None:
+                self.send_error(request_id, INTERNAL_ERROR, f"{type(e).__name__}: {e}")
+        finally:
+            self.finish(request_id)
+
+    def send_parse_result(self, request_id, result, params):
+        transform = None
+        if params.get('inline_calls'):
+            transform = lambda stmt: inline_function_calls(stmt, result.functions)
+        # Emit the whole line before writing it, a failing emitter must not
+        # leave half a response on the protocol stream
+        out = io.StringIO()
+        out.write(f'{{"jsonrpc":"2.0","id":{json.dumps(request_id)},"result":{{"ast":')
+        emitter = JsonEmitter(out)
+        if result.ast is None:
+            out.write('null')
+        else:
+            emitter.write(result.ast, transform)
+        out.write(',"functions":')
+        emitter.write(result.functions)
+        out.write(',"classes":')
+        emitter.write(result.classes)
+        if params.get('symbols') and result.ast is not None:
+            out.write(',"symbols":')
+            emitter.write(result.symbols.interval_index())
+        out.write(',"diagnostics":')
+        emitter.write(result.diagnostics)
+        out.write('}}\n')
+        line = out.getvalue()
+        with self.write_lock:
+            self.stdout.write(line)
+            self.stdout.flush()
+
+    def send_result(self, request_id, result):
+        self.send({'jsonrpc': '2.0', 'id': request_id, 'result': result})
+
+    def send_error(self, request_id, code, message):
+        self.send({'jsonrpc': '2.0', 'id': request_id, 'error': {'code': code, 'message': message}})
+
+    def send(self, message):
+        with self.write_lock:
+            self.stdout.write(json.dumps(message, separators=(',', ':')) + '\n')
+            self.stdout.flush()
+
+
+if __name__ == '__main__':
+    # Illegal characters are printed by the lexer, keep them off the protocol stream
+    protocol_out = sys.stdout
+    sys.stdout = sys.stderr
+    ParserServer(stdout=protocol_out).serve()
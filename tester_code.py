@@ -1,11 +1,13 @@
-import mylexer
-from myparser import parser, generate_json, functions_dict, classes_dict
+from myparser import ParseSession, generate_json
 
 with open("tested_code.txt", "r") as file:
     tested_code = file.read()
 
-# Tokenize 
-mylexer.lexer.input(tested_code)
+# Tokenize once, the parser reads from the same token buffer
+session = ParseSession()
+tokens = session.tokenize(tested_code)
 # Parse and generate JSON
-result = parser.parse(tested_code)
-generate_json(result, functions_dict, classes_dict)
\ No newline at end of file
+result = session.parse_tokens(tokens)
+generate_json(result.ast, result.functions, result.classes, filename='output.json',
+              functions_filename='functions.json', classes_filename='classes.json',
+              symbols_filename='symbols.json')